@@ -1,9 +1,10 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Header, Response
 from fastapi.staticfiles import StaticFiles
-import pyrebase
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 import json
 from pydantic import BaseModel
-import uvicorn
+from typing import Optional
 
 API_URL = "http://127.0.0.1:8000"
 
@@ -13,10 +14,19 @@ import os
 # Add the project root directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Import your chains
-from src.combined_chain import CombinedLegalChatbot     
-from src.document_chain import DocumentGeneratorChain
+# Only light modules are imported here. The chains (LangChain, Ollama,
+# sentence-transformers/torch, Pinecone) and pyrebase load on first use, so
+# the worker boots and answers /healthz immediately.
 from src.history_manager import HistoryManager
+from src.resources import process_rss_mb, loaded_resources, get_or_create
+from src.warmup import WARMUP_ON_STARTUP, warmup_state, is_ready, mark_ready, start_warmup_thread
+from src.session_store import SessionStore
+from src.metrics import DEBUG_TIMINGS, start_trace, server_timing, render_prometheus
+import time
+import threading
+from contextlib import contextmanager
+
+BOOT_TIME = time.time()
 
 app = FastAPI(title="Legal Aid Assistant API")
 
@@ -28,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Mount generated documents directory
@@ -35,28 +46,122 @@ os.makedirs("generated_documents", exist_ok=True)
 app.mount("/generated_documents", StaticFiles(directory="generated_documents"), name="generated_documents")
 
 # Global State
-# active_sessions = { "user_id": CombinedLegalChatbot_instance }
-active_sessions = {}
+# active_sessions: bounded LRU/idle-TTL store of CombinedLegalChatbot instances,
+# evicted sessions are spilled to disk and rehydrated on next access
 history_manager = HistoryManager()
-doc_chain = DocumentGeneratorChain()
 
-def get_session(user_id: str):
-    """Get or create a chatbot session for a specific user."""
+def get_doc_chain():
+    """DocumentGeneratorChain, built by warm-up or the first /document/generate."""
+    from src.document_chain import get_document_chain
+    return get_document_chain()
+
+# Session creation metrics (latency + resident memory growth)
+session_metrics = {
+    "created": 0,
+    "total_creation_seconds": 0.0,
+    "last_creation_seconds": 0.0,
+    "max_creation_seconds": 0.0,
+    "total_rss_delta_mb": 0.0,
+}
+
+def _create_session():
+    from src.combined_chain import CombinedLegalChatbot
+
+    rss_before = process_rss_mb()
+    start = time.perf_counter()
+
+    chatbot = CombinedLegalChatbot()
+
+    elapsed = time.perf_counter() - start
+    session_metrics["created"] += 1
+    session_metrics["total_creation_seconds"] += elapsed
+    session_metrics["last_creation_seconds"] = elapsed
+    session_metrics["max_creation_seconds"] = max(session_metrics["max_creation_seconds"], elapsed)
+    session_metrics["total_rss_delta_mb"] += process_rss_mb() - rss_before
+    return chatbot
+
+active_sessions = SessionStore(factory=_create_session)
+
+def acquire_session(user_id: str):
+    """
+    Get, rehydrate or create a chatbot session for a specific user, pinned
+    so it can't be evicted (and spilled) mid-request. Pair with release_session.
+    """
     if user_id not in active_sessions:
-        print(f"✨ Creating new session for user: {user_id}")
-        active_sessions[user_id] = CombinedLegalChatbot()
-    return active_sessions[user_id]
+        print(f"✨ Loading session for user: {user_id}")
+    return active_sessions.acquire(user_id)
+
+def release_session(user_id: str):
+    active_sessions.release(user_id)
+
+@contextmanager
+def use_session(user_id: str):
+    chatbot = acquire_session(user_id)
+    try:
+        yield chatbot
+    finally:
+        release_session(user_id)
+
+# Persist the conversation after every /chat turn (append-only, so each
+# save only writes the new user/assistant messages)
+AUTO_PERSIST_CHAT = os.getenv("AUTO_PERSIST_CHAT", "0") == "1"
+# One lock per user (striped): saves of one conversation are serialized,
+# saves of different users don't wait on each other
+PERSIST_LOCK_STRIPES = 64
+_persist_locks = [threading.Lock() for _ in range(PERSIST_LOCK_STRIPES)]
+
+def _persist_lock(user_id: str):
+    return _persist_locks[hash(user_id) % PERSIST_LOCK_STRIPES]
+
+def persist_session(user_id: str, chatbot):
+    """
+    Append the chatbot's unsaved messages to chat_history.db and remember
+    the session id it was saved under. Returns that id (None if empty).
+
+    The chatbot's own session_id is the source of truth: /chat/new clears
+    it and /chat/restore sets it, so a stale id held by a client can't
+    attach a new chat to an old session.
+    """
+    # Serialized so two saves of one conversation can't both create its session
+    with _persist_lock(user_id):
+        messages = list(chatbot.memory.get_history())
+        if not messages:
+            return None
+        chatbot.session_id = history_manager.save_session(
+            user_id, messages, session_id=chatbot.session_id
+        )
+        return chatbot.session_id
+
+def persist_user_session(user_id: str):
+    """Background save after a reply, with the session pinned while it runs."""
+    with use_session(user_id) as chatbot:
+        persist_session(user_id, chatbot)
+
+@app.on_event("startup")
+def warm_up():
+    """
+    Preload models in the background; /readyz reports 503 until done so the
+    load balancer only routes traffic to a warm worker.
+    """
+    if WARMUP_ON_STARTUP:
+        start_warmup_thread()
+    else:
+        mark_ready()
+
+@app.on_event("shutdown")
+def flush_sessions():
+    """Spill live sessions so they survive a restart."""
+    active_sessions.flush()
 
 # ----------- MODELS -----------
 class ChatRequest(BaseModel):
     user_query: str
     user_id: str = "default_user"  # Added user_id
 
-from typing import Optional
-
 class SaveChatRequest(BaseModel):
     user_id: str = "default_user"
-    session_id: Optional[str] = None  # Added session_id
+    # Informational only: saves go to the server-side chatbot.session_id
+    session_id: Optional[str] = None
 
 class ResetRequest(BaseModel):
     user_id: str = "default_user"
@@ -64,6 +169,7 @@ class ResetRequest(BaseModel):
 class RestoreRequest(BaseModel):
     user_id: str
     messages: list
+    session_id: Optional[str] = None  # further saves append to this session
 
 class DocumentRequest(BaseModel):
     template_name: str
@@ -72,73 +178,140 @@ class DocumentRequest(BaseModel):
 
 # ----------- ENDPOINTS -----------
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe: answers as soon as the process is up, loads nothing."""
+    return {"status": "ok", "uptime_s": round(time.time() - BOOT_TIME, 1)}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 once warm-up has finished, with per-step timings."""
+    return JSONResponse(status_code=200 if is_ready() else 503, content=warmup_state)
+
+@app.get("/metrics")
+def metrics():
+    """Per-stage latency histograms in Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.post("/chat")
-def chat_endpoint(request: ChatRequest):
-    chatbot = get_session(request.user_id)
-    response = chatbot.generate(request.user_query)
-    return {"response": response}
+async def chat_endpoint(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    x_debug_timings: Optional[str] = Header(None),
+):
+    # Session lookup may touch disk (rehydration), keep it off the event loop
+    chatbot = await run_in_threadpool(acquire_session, request.user_id)
+    try:
+        trace = start_trace()
+        reply = await chatbot.agenerate(request.user_query)
+    finally:
+        release_session(request.user_id)
+    if DEBUG_TIMINGS or x_debug_timings:
+        response.headers["Server-Timing"] = server_timing(trace)
+    if AUTO_PERSIST_CHAT:
+        # Runs after the response is sent
+        background_tasks.add_task(persist_user_session, request.user_id)
+    return {"response": reply}
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, x_debug_timings: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of the reply.
+    Each token arrives as `data: {"token": ...}`, followed by a final
+    `event: done` carrying the full response and time-to-first-token
+    (plus the per-stage timings in debug mode; headers are already sent).
+    """
+    chatbot = await run_in_threadpool(acquire_session, request.user_id)
+    debug = DEBUG_TIMINGS or bool(x_debug_timings)
+
+    async def event_stream():
+        trace = start_trace()
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        # The body runs after this handler returns; keep the session pinned
+        # until the reply (and its memory update) is complete
+        try:
+            async for token in chatbot.astream(request.user_query):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        finally:
+            release_session(request.user_id)
+
+        done = {
+            "response": "".join(parts).strip(),
+            "ttft_ms": round((ttft or 0.0) * 1000, 1),
+            "total_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        if debug:
+            done["timings"] = server_timing(trace)
+        yield f"event: done\ndata: {json.dumps(done)}\n\n"
+
+        if AUTO_PERSIST_CHAT:
+            await run_in_threadpool(persist_user_session, request.user_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/chat/save")
 def save_chat(request: SaveChatRequest):
     """Saves the current chat session to SQLite database."""
-    print(f"DEBUG: Saving chat for user {request.user_id}, session {request.session_id}")
-    chatbot = get_session(request.user_id)
-    
-    # Debug: Print memory type and contents
-    print(f"DEBUG: Chatbot memory type: {type(chatbot.memory)}")
-    try:
-        messages = chatbot.memory.get_history()
-        print(f"DEBUG: Retrieved messages count: {len(messages) if messages else 0}")
-        if messages:
-            print(f"DEBUG: First message: {messages[0]}")
-    except Exception as e:
-        print(f"DEBUG: Error getting history: {e}")
-        messages = []
-    
-    if not messages:
-        print("DEBUG: No messages to save")
+    with use_session(request.user_id) as chatbot:
+        # Appends only the messages added since the last save of this session
+        session_id = persist_session(request.user_id, chatbot)
+
+    if session_id is None:
         return {"status": "ignored", "message": "No messages to save"}
-    
-    session_id = history_manager.save_session(request.user_id, messages)
-    print(f"DEBUG: Saved session {session_id}")
-    
-    # If an old session_id was provided, delete it to avoid duplicates
-    if request.session_id:
-        print(f"DEBUG: Deleting old session {request.session_id}")
-        history_manager.delete_session(request.session_id)
-        
     return {"status": "saved", "session_id": session_id}
 
 @app.post("/chat/restore")
 def restore_chat(request: RestoreRequest):
     """Restores chat history into the chatbot's memory."""
-    chatbot = get_session(request.user_id)
-    
-    # Clear existing memory first
-    chatbot.memory.history.clear()
-    
-    # Restore messages
-    for msg in request.messages:
-        if msg.get("role") == "user":
-            chatbot.memory.add_user_message(msg.get("content"))
-        elif msg.get("role") == "assistant":
-            chatbot.memory.add_assistant_response(msg.get("content"))
-            
-    return {"status": "success", "message": "Chat history restored"}
+    with use_session(request.user_id) as chatbot:
+        # Clear existing memory first
+        chatbot.memory.history.clear()
+        chatbot.session_id = request.session_id
+
+        # Restore messages
+        for msg in request.messages:
+            if msg.get("role") == "user":
+                chatbot.memory.add_user_message(msg.get("content"))
+            elif msg.get("role") == "assistant":
+                chatbot.memory.add_assistant_response(msg.get("content"))
+
+        return {"status": "success", "message": "Chat history restored"}
 
 @app.get("/chat/session/{session_id}")
-def get_session_history(session_id: str):
-    messages = history_manager.get_session_messages(session_id)
+def get_session_history(session_id: str, limit: Optional[int] = None, cursor: Optional[int] = None):
+    """
+    Messages of a saved session, oldest first. Without `limit` the whole
+    session is returned; with it, pages continue from `next_cursor`.
+    `session_id` in the response is the canonical id: clients holding a
+    legacy (pre-ULID) id should switch to it.
+    """
+    session_id = history_manager.resolve_session_id(session_id)
+    next_cursor = None
+    if limit is None:
+        messages = history_manager.get_session_messages(session_id)
+    else:
+        limit = max(1, min(limit, 500))
+        messages, next_cursor = history_manager.get_messages_page(session_id, limit=limit, cursor=cursor)
     # Convert back to role/content format for frontend
     formatted_messages = []
     for m in messages:
         role = "user" if m["type"] == "human" else "assistant"
         formatted_messages.append({"role": role, "content": m["content"]})
-    return {"messages": formatted_messages}
+    return {"session_id": session_id, "messages": formatted_messages, "next_cursor": next_cursor}
 
 @app.post("/document/generate")
 def generate_document(request: DocumentRequest):
-    pdf_path, text = doc_chain.generate(
+    pdf_path, text = get_doc_chain().generate(
         template_name=request.template_name,
         field_values=request.user_inputs,
         user_query=request.user_query
@@ -186,27 +359,84 @@ def list_templates():
     return {"templates": templates}
 
 @app.get("/chat/history")
-def get_history(user_id: str = "default_user"):
-    """Retrieves the last 3 chat sessions from SQLite."""
-    sessions = history_manager.get_recent_sessions(user_id, limit=3)
-    return {"sessions": sessions}
+def get_history(user_id: str = "default_user", limit: int = 3, cursor: Optional[str] = None):
+    """
+    Retrieves a user's chat sessions from SQLite, most recently active first
+    (last 3 by default), so a continued chat moves back to the top. Pass
+    `next_cursor` back as `cursor` for the next page.
+    """
+    limit = max(1, min(limit, 100))
+    sessions, next_cursor = history_manager.get_sessions_page(user_id, limit=limit, cursor=cursor)
+    return {"sessions": sessions, "next_cursor": next_cursor}
+
+@app.get("/chat/search")
+def search_history(q: str, user_id: str = "default_user", limit: int = 20):
+    """
+    Full-text search over a user's saved chats. Each result points at its
+    session and carries a snippet with the matched words in <mark> tags.
+    """
+    limit = max(1, min(limit, 100))
+    results = history_manager.search_messages(user_id, q, limit=limit)
+    for r in results:
+        r["role"] = "user" if r.pop("type") == "human" else "assistant"
+    return {"query": q, "results": results}
 
 @app.post("/chat/new")
 def new_chat(request: ResetRequest):
     """Clears the current memory to start a fresh chat."""
-    chatbot = get_session(request.user_id)
-    
-    # Clear the in-memory history
-    chatbot.memory.history.clear()
-    # Reset any active document state
-    chatbot._clear_document_state()
-    return {"status": "success", "message": "New chat started, memory cleared"}
+    with use_session(request.user_id) as chatbot:
+        # Clear the in-memory history
+        chatbot.memory.history.clear()
+        # Next save starts a new stored session
+        chatbot.session_id = None
+        # Reset any active document state
+        chatbot._clear_document_state()
+        return {"status": "success", "message": "New chat started, memory cleared"}
+
+@app.get("/sessions/stats")
+def session_stats():
+    """Session-creation latency and resident memory per session."""
+    from src.memory_chain import extraction_snapshot
+    from src.fast_path import fast_path_snapshot
+
+    created = session_metrics["created"]
+    return {
+        "active_sessions": len(active_sessions),
+        "sessions_created": created,
+        "avg_creation_ms": (session_metrics["total_creation_seconds"] / created * 1000) if created else 0.0,
+        "last_creation_ms": session_metrics["last_creation_seconds"] * 1000,
+        "max_creation_ms": session_metrics["max_creation_seconds"] * 1000,
+        "process_rss_mb": process_rss_mb(),
+        "avg_rss_per_session_mb": (session_metrics["total_rss_delta_mb"] / created) if created else 0.0,
+        "shared_resources": loaded_resources(),
+        "store": active_sessions.stats(),
+        "fact_extraction": extraction_snapshot(),
+        "fast_path": fast_path_snapshot(),
+    }
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the query-embedding, retrieval and answer caches."""
+    from src.answer_cache import get_answer_cache
+    from src.retrieval_cache import get_retrieval_cache
+    from src.resources import get_embeddings
+
+    stats = {
+        "retrieval": get_retrieval_cache().stats(),
+        "answer": get_answer_cache().stats(),
+    }
+    if "embeddings" in loaded_resources():
+        embeddings = get_embeddings()
+        if hasattr(embeddings, "cache_stats"):
+            stats["query_embedding"] = embeddings.cache_stats()
+    return stats
 
 @app.post("/session/reset")
 def reset_memory(request: ResetRequest):
-    chatbot = get_session(request.user_id)
-    chatbot.memory.history.clear()
-    return {"status": "Memory cleared"}
+    with use_session(request.user_id) as chatbot:
+        chatbot.memory.history.clear()
+        chatbot.session_id = None
+        return {"status": "Memory cleared"}
 
 
 # ----------- AUTHENTICATION -----------
@@ -222,8 +452,12 @@ firebaseConfig = {
     "measurementId": "G-GEW1E0F7F1"
 }
 
-firebase = pyrebase.initialize_app(firebaseConfig)
-auth = firebase.auth()
+def get_auth():
+    """pyrebase auth client, initialized on the first signup/login."""
+    def build():
+        import pyrebase
+        return pyrebase.initialize_app(firebaseConfig).auth()
+    return get_or_create("firebase_auth", build)
 
 USERS_FILE = "users.json"
 
@@ -270,7 +504,7 @@ class SignupUser(User):
 @app.post("/signup")
 def signup(user: SignupUser):
     try:
-        auth.create_user_with_email_and_password(user.email, user.password)
+        get_auth().create_user_with_email_and_password(user.email, user.password)
         # Save additional details to local file
         save_user_to_file(user.dict())
         return {"message": "Signup successful"}
@@ -290,7 +524,7 @@ def signup(user: SignupUser):
 @app.post("/login")
 def login(user: User):
     try:
-        auth.sign_in_with_email_and_password(user.email, user.password)
+        get_auth().sign_in_with_email_and_password(user.email, user.password)
         # Fetch user details
         user_data = get_user_from_file(user.email)
         response = {"message": "Login successful"}
@@ -317,4 +551,5 @@ def login(user: User):
 
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("api_server:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,113 @@
+# benchmarks/compare.py
+"""
+Regression check of a benchmark run against a stored baseline.
+
+Each tracked metric has a direction (lower or higher is better) and a relative
+tolerance. Quality metrics are deterministic offline, so their tolerance is 0;
+timings get headroom for machine noise.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/latest.json
+    python -m benchmarks.compare new.json --baseline old.json --tolerance-scale 2
+"""
+
+import os
+import sys
+import json
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# (dotted path, better direction, relative tolerance)
+METRICS = [
+    ("performance.response_time.total.mean", "lower", 0.15),
+    ("performance.response_time.total.median", "lower", 0.15),
+    ("performance.response_time.rag.mean", "lower", 0.50),
+    ("performance.throughput.queries_per_minute", "higher", 0.15),
+    ("performance.retrieval_ms.mean", "lower", 0.50),
+    ("performance.document_generation.mean", "lower", 0.15),
+    ("performance.history.save_ms.mean", "lower", 0.50),
+    ("performance.history.load_ms.mean", "lower", 0.50),
+    ("performance.history.search_ms.mean", "lower", 0.50),
+    ("rag_quality.precision.mean", "higher", 0.0),
+    ("rag_quality.recall.mean", "higher", 0.0),
+    ("rag_quality.mrr.mean", "higher", 0.0),
+    ("memory_accuracy.overall_accuracy", "higher", 0.0),
+    ("document_quality.completion_rate.mean", "higher", 0.0),
+    ("document_quality.success_rate", "higher", 0.0),
+]
+
+# Float noise allowed on the deterministic (tolerance 0) metrics
+EPSILON = 1e-9
+
+
+def lookup(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(current, baseline, tolerance_scale=1.0):
+    """Return one row per metric with status ok / improved / regressed / missing."""
+    rows = []
+    for path, direction, tolerance in METRICS:
+        new, old = lookup(current, path), lookup(baseline, path)
+        row = {"metric": path, "baseline": old, "current": new, "change": None, "status": "missing"}
+        if new is None or old is None:
+            rows.append(row)
+            continue
+
+        change = (new - old) / abs(old) if old else (0.0 if new == old else float("inf"))
+        row["change"] = change
+
+        # Positive = worse, in relative terms
+        worse = change if direction == "lower" else -change
+        allowed = tolerance * tolerance_scale
+        if worse > allowed + EPSILON:
+            row["status"] = "regressed"
+        elif worse < -(allowed + EPSILON):
+            row["status"] = "improved"
+        else:
+            row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def print_report(rows):
+    icons = {"ok": "✅", "improved": "🚀", "regressed": "❌", "missing": "⚠️"}
+    print(f"\n{'metric':<44} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        old = "-" if row["baseline"] is None else f"{row['baseline']:.4g}"
+        new = "-" if row["current"] is None else f"{row['current']:.4g}"
+        change = "-" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        print(f"{row['metric']:<44} {old:>12} {new:>12} {change:>9}  {icons[row['status']]} {row['status']}")
+
+    regressed = [r["metric"] for r in rows if r["status"] == "regressed"]
+    if regressed:
+        print(f"\n❌ {len(regressed)} regression(s): {', '.join(regressed)}")
+    else:
+        print("\n✅ No regressions against the baseline.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a benchmark run with the baseline")
+    parser.add_argument("results")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance-scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with open(args.results, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    rows = compare(current, baseline, tolerance_scale=args.tolerance_scale)
+    print_report(rows)
+    sys.exit(1 if any(r["status"] == "regressed" for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
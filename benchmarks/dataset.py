@@ -0,0 +1,189 @@
+# benchmarks/dataset.py
+"""
+Fixed inputs for the benchmark suite: a small legal corpus for the local
+index, labelled retrieval queries, the chat workload and the memory facts.
+Changing anything here changes the numbers, so update baseline.json with it.
+"""
+
+# ---------------------------------------------------------
+# Corpus (id → passage)
+# ---------------------------------------------------------
+CORPUS = {
+    "tenancy-deposit": (
+        "A landlord must return the tenant's security deposit when the tenancy ends, "
+        "after deducting only unpaid rent or damage recorded in the rent agreement."
+    ),
+    "tenancy-eviction": (
+        "A tenant cannot be evicted without a notice and an order from the Rent Controller; "
+        "cutting water or electricity to force a tenant out is illegal."
+    ),
+    "tenancy-agreement": (
+        "A rent agreement longer than eleven months must be registered, and it should state "
+        "the rent, the security deposit, the notice period and who pays for repairs."
+    ),
+    "fir-registration": (
+        "Under Section 154 CrPC the police must register an FIR for any cognizable offence; "
+        "the complainant is entitled to a free copy of the FIR."
+    ),
+    "fir-refusal": (
+        "If the police refuse to register an FIR, the complainant can send the complaint to "
+        "the Superintendent of Police or ask the Magistrate to order registration under Section 156(3) CrPC."
+    ),
+    "zero-fir": (
+        "A Zero FIR can be filed at any police station regardless of jurisdiction and is later "
+        "transferred to the police station where the offence happened."
+    ),
+    "rti-filing": (
+        "Any citizen can file an RTI application with the Public Information Officer of a public "
+        "authority by paying a fee of ten rupees; no reason for the request is needed."
+    ),
+    "rti-appeal": (
+        "If the Public Information Officer does not reply to an RTI application within thirty days, "
+        "the applicant can file a first appeal and then a second appeal to the Information Commission."
+    ),
+    "harassment-workplace": (
+        "The POSH Act requires every employer with ten or more employees to set up an Internal "
+        "Committee to hear complaints of sexual harassment at the workplace."
+    ),
+    "harassment-dowry": (
+        "Dowry harassment by a husband or his relatives is punishable under Section 498A IPC, "
+        "and demanding dowry is an offence under the Dowry Prohibition Act."
+    ),
+    "domestic-violence": (
+        "A woman facing domestic violence can seek a protection order, residence order and "
+        "monetary relief from the Magistrate under the Domestic Violence Act."
+    ),
+    "consumer-complaint": (
+        "A consumer can file a complaint about defective goods or deficient services before the "
+        "District Consumer Commission, and complaints can also be filed online through e-Daakhil."
+    ),
+    "wages-unpaid": (
+        "An employer who does not pay wages on time violates the Payment of Wages Act; "
+        "the worker can complain to the Labour Commissioner for recovery of unpaid wages."
+    ),
+    "legal-aid": (
+        "Free legal aid is available through the District Legal Services Authority to women, "
+        "children, workers and anyone below the income limit."
+    ),
+    "property-dispute": (
+        "A property dispute between family members over inheritance is decided by a civil court "
+        "through a partition suit, based on the succession law that applies."
+    ),
+    "cyber-fraud": (
+        "Online banking fraud should be reported immediately on the cybercrime helpline 1930 "
+        "and at cybercrime.gov.in, and the bank must be informed to block the transaction."
+    ),
+}
+
+
+# ---------------------------------------------------------
+# Retrieval queries (query, relevant ids)
+# ---------------------------------------------------------
+RAG_QUERIES = [
+    ("My landlord refuses to return my security deposit, what are my rights as a tenant?",
+     ["tenancy-deposit", "tenancy-agreement"]),
+    ("Can my landlord cut electricity to evict me from the house?",
+     ["tenancy-eviction", "tenancy-deposit"]),
+    ("The police station refused to register my FIR, what can I do?",
+     ["fir-refusal", "fir-registration"]),
+    ("How to file an RTI application and what is the fee?",
+     ["rti-filing", "rti-appeal"]),
+    ("No reply to my RTI application after thirty days",
+     ["rti-appeal", "rti-filing"]),
+    ("How do I report sexual harassment at my workplace?",
+     ["harassment-workplace", "domestic-violence"]),
+    ("My employer has not paid my wages for three months",
+     ["wages-unpaid", "legal-aid"]),
+    ("I lost money in an online banking fraud, where do I complain?",
+     ["cyber-fraud", "consumer-complaint"]),
+]
+
+# Queries that hinge on exact tokens (section numbers, act names, helplines),
+# where dense embeddings blur and BM25 matches literally
+EXACT_QUERIES = [
+    ("What does Section 154 CrPC say?",
+     ["fir-registration", "fir-refusal"]),
+    ("Section 156(3) CrPC application to the Magistrate",
+     ["fir-refusal", "fir-registration"]),
+    ("Is 498A IPC bailable?",
+     ["harassment-dowry", "domestic-violence"]),
+    ("Call 1930 for what?",
+     ["cyber-fraud", "consumer-complaint"]),
+    ("How to use e-Daakhil?",
+     ["consumer-complaint", "cyber-fraud"]),
+    ("POSH Act Internal Committee rules",
+     ["harassment-workplace", "domestic-violence"]),
+]
+
+
+# ---------------------------------------------------------
+# Chat workload for response time / throughput
+# ---------------------------------------------------------
+CHAT_QUERIES = [
+    "Hello",
+    "What are my rights as a tenant if the landlord keeps my deposit?",
+    "How to file an FIR for a stolen phone?",
+    "The police refused to register my FIR, is that legal?",
+    "How to file an RTI application?",
+    "What happens if the RTI officer does not reply?",
+    "Is dowry harassment a crime under the law?",
+    "Thanks, that helps",
+    "Can a landlord evict a tenant without notice?",
+    "How do I complain about harassment at work?",
+    "What is a Zero FIR?",
+    "My employer has not paid wages, what is the law?",
+    "Can I get free legal aid?",
+    "What are the rights of a woman facing domestic violence?",
+    "How is a property dispute between brothers settled under the law?",
+    "Where do I report online fraud to the police?",
+    "Is it illegal to cut water supply to a tenant?",
+    "What should a rent agreement contain under the law?",
+    "How long does the police have to act on an FIR?",
+    "Can I file a consumer complaint online?",
+    "What are my rights if I am arrested by the police?",
+    "Who decides a tenancy dispute?",
+    "Ok, goodbye",
+    "What is the fee for an RTI?",
+    "Can I appeal if my RTI is rejected?",
+]
+
+
+# ---------------------------------------------------------
+# Memory facts (field, user message, expected stored value)
+# ---------------------------------------------------------
+MEMORY_FACTS = [
+    ("name", "My name is Ramesh Kumar", "ramesh kumar"),
+    ("location", "I live in Mysuru", "mysuru"),
+    ("age", "I am 34 years old", "34"),
+    ("phone", "My phone number is 9876543210", "9876543210"),
+    ("email", "My email is ramesh@example.com", "ramesh@example.com"),
+]
+
+
+# ---------------------------------------------------------
+# Document field values (shared by every template)
+# ---------------------------------------------------------
+DOCUMENT_VALUES = {
+    "name": "Ramesh Kumar",
+    "complainant_name": "Ramesh Kumar",
+    "applicant_name": "Ramesh Kumar",
+    "sender_name": "Ramesh Kumar",
+    "tenant_name": "Ramesh Kumar",
+    "address": "12 Temple Road, Mysuru",
+    "sender_address": "12 Temple Road, Mysuru",
+    "property_address": "45 Lake View Layout, Mysuru",
+    "recipient_name": "Suresh Rao",
+    "recipient_address": "8 Market Street, Mysuru",
+    "landlord_name": "Suresh Rao",
+    "date": "2025-11-02",
+    "details": "My mobile phone was stolen at the bus stand",
+    "issue_details": "The landlord has not returned the security deposit",
+    "subject": "Refund of security deposit",
+    "resolution": "Return the deposit within fifteen days",
+    "reason": "Scholarship application",
+    "annual_income": "180000",
+    "public_authority": "Mysuru City Corporation",
+    "information_needed": "Status of road repair works in Ward 12",
+    "period": "January 2024 to October 2025",
+    "duration": "Two years",
+}
@@ -0,0 +1,158 @@
+# benchmarks/fakes.py
+"""
+Offline stand-ins for the two external models.
+
+- FakeOllama: a LangChain chat model that behaves like ChatOllama from the
+  caller's side (invoke / ainvoke / stream), with a configurable
+  time-to-first-token and token rate instead of a real model behind it.
+- HashingEmbeddings: deterministic bag-of-words vectors (feature hashing),
+  so the local vector index can be built and searched without the
+  sentence-transformers model.
+"""
+
+import re
+import time
+import zlib
+import asyncio
+import numpy as np
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+TOKEN_PATTERN = re.compile(r"\S+\s*")
+
+CANNED_ANSWER = (
+    "Under Indian law you can file a written complaint with the local police "
+    "station, and if they refuse to register an FIR you may approach the "
+    "Superintendent of Police or the Magistrate under Section 156(3) CrPC."
+)
+
+
+# ---------------------------------------------------------
+# Default responder
+# ---------------------------------------------------------
+def default_responder(prompt: str):
+    """
+    Cheap imitation of what llama2 returns for each prompt the app sends:
+    - fact extraction → "{}" (no fact), so only the regex tier fills memory
+    - document drafting → the title and filled fields echoed back
+    - everything else → a fixed two-sentence answer
+    """
+    if "Return strict JSON" in prompt:
+        return "{}"
+
+    if "Template fields filled by user:" in prompt:
+        title = re.search(r"Template title: (.*)", prompt)
+        fields = prompt.split("Template fields filled by user:", 1)[1]
+        fields = fields.split("Human:", 1)[0].strip()
+        heading = title.group(1).strip() if title else "Legal Document"
+        return f"{heading.upper()}\n\n{fields}\n\nSigned,\n[Signature]"
+
+    return CANNED_ANSWER
+
+
+def _prompt_text(messages):
+    return "\n".join(str(m.content) for m in messages)
+
+
+# ---------------------------------------------------------
+# Fake Ollama chat model
+# ---------------------------------------------------------
+class FakeOllama(BaseChatModel):
+    """Chat model with ChatOllama's latency profile and canned replies."""
+
+    model: str = "llama2"
+    latency_ms: float = 100.0         # time to first token
+    tokens_per_sec: float = 400.0     # decode rate after the first token
+    responder: Optional[Callable[[str], str]] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-ollama"
+
+    def _reply(self, messages):
+        self.calls += 1
+        return (self.responder or default_responder)(_prompt_text(messages))
+
+    def _tokens(self, text):
+        return TOKEN_PATTERN.findall(text) or [text]
+
+    def _duration(self, text):
+        return self.latency_ms / 1000 + len(self._tokens(text)) / self.tokens_per_sec
+
+    def _result(self, text):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        time.sleep(self._duration(text))
+        return self._result(text)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        await asyncio.sleep(self._duration(text))
+        return self._result(text)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        time.sleep(self.latency_ms / 1000)
+        for token in self._tokens(text):
+            time.sleep(1 / self.tokens_per_sec)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._reply(messages)
+        await asyncio.sleep(self.latency_ms / 1000)
+        for token in self._tokens(text):
+            await asyncio.sleep(1 / self.tokens_per_sec)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+# ---------------------------------------------------------
+# Hashing embeddings
+# ---------------------------------------------------------
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "of", "to", "in", "on", "for", "and",
+    "or", "by", "with", "can", "i", "my", "me", "what", "how", "do", "does",
+    "if", "under", "be", "it", "at", "as", "from", "who", "which", "when",
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """Signed feature hashing of lowercase word tokens (MiniLM's 384 dims)."""
+
+    def __init__(self, dim: int = 384, encode_latency_ms: float = 0.0):
+        self.dim = dim
+        self.encode_latency_ms = encode_latency_ms
+
+    def _vector(self, text: str):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            if token in STOPWORDS:
+                continue
+            h = zlib.crc32(token.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _encode(self, texts: List[str]):
+        if self.encode_latency_ms:
+            time.sleep(self.encode_latency_ms / 1000)
+        return np.stack([self._vector(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_query_array(text).tolist()
+
+    def embed_query_array(self, text: str):
+        return self._encode([text])[0]
+
+    async def aembed_query_array(self, text: str):
+        return self.embed_query_array(text)
@@ -0,0 +1,443 @@
+# benchmarks/run.py
+"""
+Reproducible end-to-end benchmark suite.
+
+Runs fully offline: Ollama is replaced by FakeOllama (fixed time-to-first-token
+and token rate), the embedding model by HashingEmbeddings, and Pinecone by the
+local vector index built from benchmarks/dataset.py. Everything is written to a
+throwaway working directory, never to chat_history.db or generated_documents/.
+
+Covers CombinedLegalChatbot.generate, retrieval, HistoryManager and
+DocumentGeneratorChain, and writes the same JSON schema as
+evaluation_results/evaluation_results.json (plus a few extra timing keys),
+then compares the run against benchmarks/baseline.json.
+
+Usage:
+    python -m benchmarks.run                        # run + compare to baseline
+    python -m benchmarks.run --update-baseline      # store this run as the baseline
+    python -m benchmarks.run --llm-latency-ms 800 --llm-tokens-per-sec 25
+    python -m benchmarks.run --retriever-mode hybrid --no-compare   # dense + BM25 (RRF)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import tempfile
+import statistics
+import subprocess
+from typing import Any, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from langchain_core.retrievers import BaseRetriever
+
+from benchmarks.fakes import FakeOllama, HashingEmbeddings
+from benchmarks.dataset import CORPUS, RAG_QUERIES, CHAT_QUERIES, MEMORY_FACTS, DOCUMENT_VALUES
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "latest.json")
+TEMPLATE_DIR = os.path.join(ROOT, "src", "templates")
+
+TOP_K = 5
+# Passes over RAG_QUERIES for retrieval latency (single calls are too noisy)
+RETRIEVAL_PASSES = 20
+
+# (temperature, max_tokens) of every client the app asks src.resources for:
+# chat answers, fact extraction, document drafting
+LLM_CONFIGS = [(0.2, 200), (0, None), (0.2, 700)]
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def summarize(values):
+    if not values:
+        return {"mean": 0.0, "median": 0.0, "std_dev": 0.0, "min": 0.0, "max": 0.0}
+    return {
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "std_dev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_env(cached: bool):
+    """Must run before anything under src/ is imported (flags are read at import)."""
+    os.environ["VECTOR_BACKEND"] = "local"
+    os.environ["ANSWER_CACHE_ENABLED"] = "1" if cached else "0"
+    os.environ["RETRIEVAL_CACHE_ENABLED"] = "1" if cached else "0"
+
+
+class TimedRetriever(BaseRetriever):
+    """Records the wall time of every retrieval done through it (seconds)."""
+
+    retriever: Any
+    times: List[float] = []
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None):
+        start = time.perf_counter()
+        docs = self.retriever.invoke(query)
+        self.times.append(time.perf_counter() - start)
+        return docs
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None):
+        start = time.perf_counter()
+        docs = await self.retriever.ainvoke(query)
+        self.times.append(time.perf_counter() - start)
+        return docs
+
+
+# ---------------------------------------------------------
+# Setup: local index + fake models in the resource registry
+# ---------------------------------------------------------
+def setup(args, workdir):
+    from src import resources
+    from src.local_index import LocalVectorIndex, LocalIndexRetriever
+    from src.bm25 import BM25Index, HybridRetriever
+    from src.retriever import HYBRID_CANDIDATE_FACTOR
+
+    embeddings = HashingEmbeddings(encode_latency_ms=args.embed_latency_ms)
+
+    index = LocalVectorIndex(os.path.join(workdir, "vector_index"))
+    ids = list(CORPUS)
+    texts = [CORPUS[i] for i in ids]
+    metadatas = [{"text": t, "source": i} for i, t in zip(ids, texts)]
+    index.upsert(ids, embeddings.embed_documents(texts), metadatas)
+    index.save()
+
+    if args.retriever_mode == "hybrid":
+        sparse = BM25Index.build(ids, metadatas, os.path.join(workdir, "bm25_index"))
+        sparse.save()
+        candidates = TOP_K * HYBRID_CANDIDATE_FACTOR
+        dense = LocalIndexRetriever(index=index, embeddings=embeddings, k=candidates)
+        inner = HybridRetriever(dense=dense, sparse=sparse, k=TOP_K, candidates=candidates)
+    else:
+        inner = LocalIndexRetriever(index=index, embeddings=embeddings, k=TOP_K)
+    retriever = TimedRetriever(retriever=inner)
+
+    resources.clear()
+    resources.register("embeddings", embeddings)
+    resources.register(f"retriever:{TOP_K}", retriever)
+    for temperature, max_tokens in LLM_CONFIGS:
+        resources.register(
+            resources.llm_key("llama2", temperature, max_tokens),
+            FakeOllama(latency_ms=args.llm_latency_ms, tokens_per_sec=args.llm_tokens_per_sec)
+        )
+    return retriever
+
+
+def wait_for_fact_worker():
+    from src.resources import get_resource
+    worker = get_resource("fact_worker")
+    if worker is not None:
+        worker.wait_idle()
+
+
+# ---------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------
+def bench_chat(retriever, rounds: int):
+    """Response time of CombinedLegalChatbot.generate over the chat workload."""
+    from src.combined_chain import CombinedLegalChatbot
+
+    retriever.times.clear()
+    times = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        chatbot = CombinedLegalChatbot()
+        for query in CHAT_QUERIES:
+            t0 = time.perf_counter()
+            chatbot.generate(query)
+            times.append(time.perf_counter() - t0)
+    wait_for_fact_worker()
+    duration = time.perf_counter() - start
+
+    rag = summarize(list(retriever.times))
+    return {
+        "response_time": {
+            "total": summarize(times),
+            "rag": {key: rag[key] for key in ("mean", "median", "std_dev")},
+            "raw_times": times,
+        },
+        "throughput": {
+            "queries_per_minute": len(times) / (duration / 60) if duration else 0.0,
+            "total_queries": len(times),
+            "duration_minutes": duration / 60,
+        },
+    }
+
+
+def bench_retrieval(retriever):
+    """precision@k, recall@k and MRR on the labelled queries, plus latency (ms)."""
+    precision, recall, mrr, latency_ms = [], [], [], []
+
+    for query, relevant in RAG_QUERIES:
+        docs = retriever.retriever.invoke(query)
+        ids = [d.metadata.get("id") for d in docs]
+        hits = [i for i in ids if i in relevant]
+        precision.append(len(hits) / len(ids) if ids else 0.0)
+        recall.append(len(hits) / len(relevant))
+        rank = next((n for n, i in enumerate(ids, start=1) if i in relevant), None)
+        mrr.append(1 / rank if rank else 0.0)
+
+    for _ in range(RETRIEVAL_PASSES):
+        for query, _ in RAG_QUERIES:
+            t0 = time.perf_counter()
+            retriever.retriever.invoke(query)
+            latency_ms.append((time.perf_counter() - t0) * 1000)
+
+    def spread(values):
+        return statistics.stdev(values) if len(values) > 1 else 0.0
+
+    quality = {
+        "precision": {"mean": statistics.mean(precision), "std_dev": spread(precision), "values": precision},
+        "recall": {"mean": statistics.mean(recall), "std_dev": spread(recall), "values": recall},
+        "mrr": {"mean": statistics.mean(mrr), "values": mrr},
+    }
+    return quality, summarize(latency_ms)
+
+
+def bench_memory():
+    """Share of MEMORY_FACTS recalled after going through generate()."""
+    from src.combined_chain import CombinedLegalChatbot
+
+    chatbot = CombinedLegalChatbot()
+    for _, message, _ in MEMORY_FACTS:
+        chatbot.generate(message)
+    wait_for_fact_worker()
+
+    by_type = {}
+    for field, _, expected in MEMORY_FACTS:
+        value = chatbot.memory.get_fact(field)
+        by_type[field] = 100.0 if str(value or "").strip().lower() == expected else 0.0
+
+    correct = sum(1 for v in by_type.values() if v)
+    return {
+        "overall_accuracy": correct / len(MEMORY_FACTS) * 100,
+        "correct": correct,
+        "total": len(MEMORY_FACTS),
+        "by_type": by_type,
+    }
+
+
+def bench_documents():
+    """Field completion and PDF success for every template, plus draft time (s)."""
+    from src.document_chain import DocumentGeneratorChain
+
+    chain = DocumentGeneratorChain(template_dir=TEMPLATE_DIR)
+    completion, times = [], []
+    successes = 0
+    templates = sorted(f[:-5] for f in os.listdir(TEMPLATE_DIR) if f.endswith(".json"))
+
+    for name in templates:
+        fields = chain.load_template(name)["fields"]
+        inputs = {key: DOCUMENT_VALUES.get(key, f"Sample {label}") for key, label in fields.items()}
+        try:
+            t0 = time.perf_counter()
+            pdf_path, content = chain.generate_document(
+                name, inputs, memory_string="name: Ramesh Kumar", rag_context=CORPUS["legal-aid"]
+            )
+            times.append(time.perf_counter() - t0)
+        except Exception as e:
+            print(f"⚠️ Document '{name}' failed: {e}")
+            completion.append(0.0)
+            continue
+
+        filled = sum(1 for value in inputs.values() if value in content)
+        completion.append(filled / len(inputs) * 100)
+        if content and os.path.exists(pdf_path):
+            successes += 1
+
+    quality = {
+        "completion_rate": {
+            "mean": statistics.mean(completion),
+            "std_dev": statistics.stdev(completion) if len(completion) > 1 else 0,
+            "values": completion,
+        },
+        "success_rate": successes / len(templates) * 100,
+    }
+    return quality, summarize(times)
+
+
+def bench_history(workdir, users: int, sessions: int, turns: int):
+    """HistoryManager latencies (ms): per-turn save, load, recent list, search."""
+    from src.history_manager import HistoryManager
+
+    hm = HistoryManager(db_path=os.path.join(workdir, "bench_history.db"))
+    save_ms, load_ms, recent_ms, search_ms = [], [], [], []
+    user_ids = [f"bench_user_{u}@example.com" for u in range(users)]
+    session_ids = []
+
+    for user_id in user_ids:
+        for s in range(sessions):
+            history = []
+            session_id = None
+            for t in range(turns):
+                query, _ = RAG_QUERIES[(s + t) % len(RAG_QUERIES)]
+                history += [
+                    {"type": "human", "content": query},
+                    {"type": "ai", "content": CORPUS[list(CORPUS)[(s + t) % len(CORPUS)]]},
+                ]
+                t0 = time.perf_counter()
+                session_id = hm.save_session(user_id, history, session_id=session_id)
+                save_ms.append((time.perf_counter() - t0) * 1000)
+            session_ids.append(session_id)
+
+    for session_id in session_ids:
+        t0 = time.perf_counter()
+        hm.get_session_messages(session_id)
+        load_ms.append((time.perf_counter() - t0) * 1000)
+
+    for user_id in user_ids:
+        for query in ("security deposit", "rti appeal", "harassment"):
+            t0 = time.perf_counter()
+            hm.get_recent_sessions(user_id, limit=3)
+            recent_ms.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            hm.search_messages(user_id, query, limit=20)
+            search_ms.append((time.perf_counter() - t0) * 1000)
+
+    fts = hm.has_fts()
+    hm.close()
+    return {
+        "save_ms": summarize(save_ms),
+        "load_ms": summarize(load_ms),
+        "recent_ms": summarize(recent_ms),
+        "search_ms": summarize(search_ms),
+        "messages": len(user_ids) * sessions * turns * 2,
+        "fts": fts,
+    }
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def run(args):
+    configure_env(args.cached)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="legal_aid_bench_") as workdir:
+        # Relative paths in src/ (generated_documents/, ...) land in workdir
+        os.chdir(workdir)
+        try:
+            retriever = setup(args, workdir)
+
+            print("⏱️ Chat workload...")
+            chat = bench_chat(retriever, args.rounds)
+            print("⏱️ Retrieval quality...")
+            rag_quality, retrieval_ms = bench_retrieval(retriever)
+            print("⏱️ Memory accuracy...")
+            memory = bench_memory()
+            print("⏱️ Document generation...")
+            documents, document_times = bench_documents()
+            print("⏱️ Chat history...")
+            history = bench_history(workdir, args.history_users, args.history_sessions, args.history_turns)
+        finally:
+            os.chdir(cwd)
+
+    performance = dict(chat)
+    performance["retrieval_ms"] = retrieval_ms
+    performance["document_generation"] = document_times
+    performance["history"] = history
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "performance": performance,
+        "rag_quality": rag_quality,
+        "memory_accuracy": memory,
+        "document_quality": documents,
+        "response_times": chat["response_time"]["raw_times"],
+        "config": {
+            "git_revision": git_revision(),
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_tokens_per_sec": args.llm_tokens_per_sec,
+            "embed_latency_ms": args.embed_latency_ms,
+            "cached": args.cached,
+            "rounds": args.rounds,
+            "retriever_mode": args.retriever_mode,
+        },
+    }
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark suite")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write this run to the baseline file instead of comparing")
+    parser.add_argument("--no-compare", action="store_true")
+    parser.add_argument("--tolerance-scale", type=float, default=1.0,
+                        help="multiply every regression tolerance (e.g. 2 on noisy machines)")
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0, help="fake time to first token")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=400.0, help="fake decode rate")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="added cost per encode call")
+    parser.add_argument("--rounds", type=int, default=1, help="passes over the chat workload")
+    parser.add_argument("--cached", action="store_true",
+                        help="keep the retrieval / answer caches on (off by default)")
+    parser.add_argument("--retriever-mode", choices=["dense", "hybrid"], default="dense",
+                        help="hybrid = dense + BM25 fused with RRF (the baseline is dense)")
+    parser.add_argument("--history-users", type=int, default=4)
+    parser.add_argument("--history-sessions", type=int, default=25)
+    parser.add_argument("--history-turns", type=int, default=10)
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+
+    results = run(args)
+    write_json(output, results)
+    print(f"✅ Results written to {output}")
+
+    total = results["performance"]["response_time"]["total"]
+    print(f"   generate: mean {total['mean']:.3f}s  median {total['median']:.3f}s  "
+          f"qpm {results['performance']['throughput']['queries_per_minute']:.1f}")
+    print(f"   precision {results['rag_quality']['precision']['mean']:.2f}  "
+          f"recall {results['rag_quality']['recall']['mean']:.2f}  "
+          f"mrr {results['rag_quality']['mrr']['mean']:.2f}  "
+          f"memory {results['memory_accuracy']['overall_accuracy']:.0f}%  "
+          f"documents {results['document_quality']['success_rate']:.0f}%")
+
+    if args.update_baseline:
+        write_json(baseline_path, results)
+        print(f"✅ Baseline updated: {baseline_path}")
+        return
+
+    if args.no_compare:
+        return
+    if not os.path.exists(baseline_path):
+        print(f"⚠️ No baseline at {baseline_path}; run with --update-baseline to create one.")
+        return
+
+    from benchmarks.compare import compare, print_report
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, tolerance_scale=args.tolerance_scale)
+    print_report(rows)
+    if any(row["status"] == "regressed" for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,9 @@ const ChatPage = ({ user }) => {
                     const response = await fetch(`${API_URL}/chat/session/${location.state.session_id}`);
                     if (response.ok) {
                         const data = await response.json();
+                        // Legacy ids come back as their canonical (ULID) id
+                        const sessionId = data.session_id || location.state.session_id;
+                        setCurrentSessionId(sessionId);
                         if (data.messages && data.messages.length > 0) {
                             setMessages(data.messages);
 
@@ -54,7 +57,8 @@ const ChatPage = ({ user }) => {
                                     headers: { 'Content-Type': 'application/json' },
                                     body: JSON.stringify({
                                         user_id: user.email,
-                                        messages: data.messages
+                                        messages: data.messages,
+                                        session_id: sessionId
                                     })
                                 });
                             }
@@ -157,7 +161,8 @@ const ChatPage = ({ user }) => {
                     body: JSON.stringify({ user_id: user.email }),
                 });
 
-                // 3. Reset UI
+                // 3. Reset UI (the new chat is saved as a new session)
+                setCurrentSessionId(null);
                 setMessages([
                     { role: 'assistant', content: 'Greetings. I am the Legal Aid Assistant. How may I assist you with your legal queries today?' }
                 ]);
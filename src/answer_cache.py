@@ -0,0 +1,121 @@
+# src/answer_cache.py
+"""
+Semantic answer cache for non-personal legal questions.
+
+An answer is reused when a new query
+- embeds within `threshold` cosine similarity of a cached query, and
+- retrieved exactly the same documents (same fingerprint),
+so a changed index or a different retrieval result never serves a stale answer.
+Entries expire after `ttl` seconds; the oldest entries are dropped past `max_entries`.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+
+from src.resources import get_or_create
+
+load_dotenv()
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+
+
+def documents_fingerprint(docs):
+    """Order-sensitive hash of the retrieved documents' content."""
+    h = hashlib.sha1()
+    for d in docs:
+        h.update(d.page_content.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold=None, ttl=None, max_entries=None):
+        self.threshold = float(threshold or os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+        self.ttl = float(ttl or os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+        self.max_entries = int(max_entries or os.getenv("ANSWER_CACHE_MAX_ENTRIES", 1000))
+
+        # entry_id -> (fingerprint, unit query vector, answer, created_at)
+        self._entries = OrderedDict()
+        # fingerprint -> {entry_id}: only entries with the same documents compete
+        self._by_fingerprint = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------
+    def lookup(self, query_vector, fingerprint: str):
+        query = self._unit(query_vector)
+        now = time.time()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_fingerprint.get(fingerprint, ())):
+                _, vector, _, created = self._entries[entry_id]
+                if now - created > self.ttl:
+                    self._remove(entry_id)
+                    continue
+                score = float(vector @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, query_vector, fingerprint: str, answer: str):
+        if not answer:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (fingerprint, self._unit(query_vector), answer, time.time())
+            self._by_fingerprint.setdefault(fingerprint, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # ------------------------------------------------------------
+    def _remove(self, entry_id):
+        fingerprint = self._entries.pop(entry_id)[0]
+        ids = self._by_fingerprint.get(fingerprint)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_fingerprint[fingerprint]
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def get_answer_cache():
+    return get_or_create("answer_cache", SemanticAnswerCache)
@@ -0,0 +1,345 @@
+# src/bm25.py
+"""
+Sparse BM25 index over the same chunks as the vector index.
+
+Dense MiniLM embeddings blur exact tokens ("Section 154 CrPC", "498A"),
+BM25 matches them literally. The inverted index is kept in CSR form:
+
+- indptr.npy    int64 [V+1]  postings of term t are rows indptr[t]:indptr[t+1]
+- doc_ids.npy   int32 [nnz]  chunk row of each posting
+- weights.npy   float32 [nnz] precomputed BM25 weight (idf × saturated tf)
+- vocab.json    terms in term-id order
+- metadata.jsonl  one JSON object per chunk row: {"id": ..., "metadata": {...}}
+- manifest.json {"count", "terms", "version", "k1", "b", "text_key", "files"}
+
+As in src/local_index.py, each save writes the data files under versioned
+names (indptr.v3.npy, ...) and then switches manifest.json to them.
+
+Weights are computed at build time, so a query is one vectorised
+scatter-add per query term. The index is rebuilt from the stored chunk
+texts whenever ingestion changes it.
+
+HybridRetriever runs the dense retriever and BM25 side by side and fuses
+the two rankings with reciprocal-rank fusion (RRF). A serving process holds
+the BM25 index through a LiveIndex (src/local_index.py), so it reloads on
+the same manifest version bump as the dense index.
+"""
+
+import os
+import re
+import json
+import asyncio
+import contextvars
+import numpy as np
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.metrics import span
+from src.resources import get_or_create
+
+MANIFEST_FILE = "manifest.json"
+METADATA_FILE = "metadata.jsonl"
+VOCAB_FILE = "vocab.json"
+ARRAY_FILES = ("indptr", "doc_ids", "weights")
+# Versioned and legacy data file names (see save)
+DATA_FILE_PATTERN = re.compile(r"^(indptr|doc_ids|weights|vocab|metadata)(\.v\d+)?\.(npy|json|jsonl)(\.tmp)?$")
+
+
+def _file_names(version: int = None):
+    """Data file names of one version (None: the unversioned legacy layout)."""
+    tag = f".v{version}" if version is not None else ""
+    names = {name: f"{name}{tag}.npy" for name in ARRAY_FILES}
+    names["vocab"] = f"vocab{tag}.json"
+    names["metadata"] = f"metadata{tag}.jsonl"
+    return names
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its "
+    "me my of on or that the their there they this to was what when where which "
+    "who will with you your".split()
+)
+
+
+def tokenize(text: str):
+    """Lowercase alphanumeric tokens; numbers are kept ("154", "498a")."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, index_dir: str = None, k1: float = 1.2, b: float = 0.75, text_key: str = "text"):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self.text_key = text_key
+        self.version = 0
+
+        self.ids = []
+        self.metadatas = []
+        self.vocab = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self._row_by_id = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self._row_by_id
+
+    # ------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------
+    @classmethod
+    def build(cls, ids: List[str], metadatas: List[dict], index_dir: str = None, **kwargs):
+        """Build the CSR postings from each metadata's `text_key` field."""
+        index = cls(index_dir, **kwargs)
+        index.ids = list(ids)
+        index.metadatas = list(metadatas)
+        index._row_by_id = {id_: i for i, id_ in enumerate(index.ids)}
+
+        vocab = {}
+        term_ids, rows, tfs = [], [], []
+        doc_len = np.zeros(len(index.ids), dtype=np.float32)
+        for row, meta in enumerate(index.metadatas):
+            counts = Counter(tokenize(meta.get(index.text_key, "")))
+            doc_len[row] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                rows.append(row)
+                tfs.append(tf)
+
+        index.vocab = vocab
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # Group postings by term (stable, so rows stay ascending per term)
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, rows, tfs = term_ids[order], rows[order], tfs[order]
+        df = np.bincount(term_ids, minlength=len(vocab)).astype(np.float32)
+        index.indptr = np.concatenate([[0], np.cumsum(df, dtype=np.int64)])
+
+        n = max(len(index.ids), 1)
+        avgdl = float(doc_len.mean()) if len(doc_len) else 1.0
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = index.k1 * (1 - index.b + index.b * doc_len / max(avgdl, 1e-9))
+        index.doc_ids = rows
+        index.weights = (idf[term_ids] * tfs * (index.k1 + 1) / (tfs + norm[rows])).astype(np.float32)
+        return index
+
+    # ------------------------------------------------------------
+    # Load / save
+    # ------------------------------------------------------------
+    @classmethod
+    def load(cls, index_dir: str):
+        """Memory-map the postings and read the vocabulary and metadata."""
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"BM25 index not found at: {index_dir}")
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        index = cls(index_dir, k1=manifest.get("k1", 1.2), b=manifest.get("b", 0.75),
+                    text_key=manifest.get("text_key", "text"))
+        index.version = manifest.get("version", 0)
+        files = manifest.get("files") or _file_names()
+
+        for name in ARRAY_FILES:
+            setattr(index, name, np.load(os.path.join(index_dir, files[name]), mmap_mode="r"))
+
+        with open(os.path.join(index_dir, files["vocab"]), "r", encoding="utf-8") as f:
+            index.vocab = {term: i for i, term in enumerate(json.load(f))}
+
+        with open(os.path.join(index_dir, files["metadata"]), "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                index.ids.append(row["id"])
+                index.metadatas.append(row.get("metadata", {}))
+
+        index._row_by_id = {id_: i for i, id_ in enumerate(index.ids)}
+        return index
+
+    def save(self, index_dir: str = None):
+        """Write the next version's files, then switch the manifest to them."""
+        self.index_dir = index_dir or self.index_dir
+        os.makedirs(self.index_dir, exist_ok=True)
+        manifest_path = os.path.join(self.index_dir, MANIFEST_FILE)
+        previous = self._read_manifest(manifest_path)
+        previous_files = set((previous.get("files") or _file_names()).values()) if previous else set()
+        # Never reuse a version number that may still be on disk
+        self.version = max(self.version, previous.get("version", 0)) + 1
+
+        # Fresh names: no reader has these open (or memory-mapped) yet
+        files = _file_names(self.version)
+        for name in ARRAY_FILES:
+            np.save(os.path.join(self.index_dir, files[name]), np.ascontiguousarray(getattr(self, name)))
+
+        with open(os.path.join(self.index_dir, files["vocab"]), "w", encoding="utf-8") as f:
+            json.dump(sorted(self.vocab, key=self.vocab.get), f)
+
+        with open(os.path.join(self.index_dir, files["metadata"]), "w", encoding="utf-8") as f:
+            for id_, meta in zip(self.ids, self.metadatas):
+                f.write(json.dumps({"id": id_, "metadata": meta}) + "\n")
+
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "count": len(self.ids),
+                "terms": len(self.vocab),
+                "version": self.version,
+                "k1": self.k1,
+                "b": self.b,
+                "text_key": self.text_key,
+                "files": files,
+            }, f, indent=2)
+        os.replace(tmp, manifest_path)
+
+        # Previous version stays for loads in flight; older files go
+        # (retried on the next save if still mapped on Windows)
+        keep = set(files.values()) | previous_files
+        for name in os.listdir(self.index_dir):
+            if name not in keep and DATA_FILE_PATTERN.match(name):
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read_manifest(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # ------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------
+    def search(self, query: str, k: int = 5):
+        """Return [(row, score)] for the top-k rows by BM25 score."""
+        term_ids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not term_ids or not len(self.ids):
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for t in term_ids:
+            start, end = self.indptr[t], self.indptr[t + 1]
+            # A row appears at most once per term, so plain fancy-index add is exact
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+
+        candidates = np.flatnonzero(scores)
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(r), float(scores[r])) for r in top]
+
+    def to_document(self, row: int, score: float = None):
+        meta = dict(self.metadatas[row])
+        text = meta.pop(self.text_key, "")
+        meta["id"] = self.ids[row]
+        if score is not None:
+            meta["bm25_score"] = score
+        return Document(page_content=text, metadata=meta)
+
+
+def get_live_bm25_index(index_dir: str):
+    """One shared, self-reloading BM25 index per directory."""
+    from src.local_index import LiveIndex
+
+    return get_or_create(
+        f"bm25_index:{os.path.abspath(index_dir)}",
+        lambda: LiveIndex(index_dir, loader=BM25Index.load, label="BM25 index"),
+    )
+
+
+def _snapshot(index):
+    """Current BM25Index of a LiveIndex (or the index itself)."""
+    current = getattr(index, "current", None)
+    return current() if current else index
+
+
+# ---------------------------------------------------------
+# Retrievers
+# ---------------------------------------------------------
+# Standard RRF damping constant (Cormack et al.): rank 1 scores 1/61
+RRF_K = 60
+
+# BM25 runs here while the calling thread embeds the query / hits Pinecone
+_sparse_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+
+def _doc_key(doc):
+    """Chunk id when the backend returns one, else the text itself."""
+    return doc.metadata.get("id") or getattr(doc, "id", None) or doc.page_content
+
+
+def rrf_fuse(rankings, k: int, rrf_k: int = RRF_K):
+    """Reciprocal-rank fusion of several ranked Document lists, top-k."""
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            # Keep the first copy seen (dense, when both found it)
+            docs.setdefault(key, doc)
+
+    fused = []
+    for key in sorted(scores, key=scores.get, reverse=True)[:k]:
+        doc = docs[key]
+        fused.append(Document(page_content=doc.page_content,
+                              metadata={**doc.metadata, "rrf_score": scores[key]}))
+    return fused
+
+
+class BM25Retriever(BaseRetriever):
+    """LangChain retriever over a BM25Index or LiveIndex alone (sparse baseline)."""
+
+    index: Any
+    k: int = 5
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        index = _snapshot(self.index)
+        with span("sparse_search"):
+            hits = index.search(query, self.k)
+        return [index.to_document(row, score) for row, score in hits]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense + BM25 retrieval fused with RRF.
+
+    `dense` should fetch `candidates` documents (deeper than `k`) so that a
+    chunk ranked low by one side can still be lifted by the other.
+    """
+
+    dense: Any
+    sparse: Any
+    k: int = 5
+    candidates: int = 20
+    rrf_k: int = RRF_K
+
+    def _sparse_documents(self, query: str):
+        index = _snapshot(self.sparse)
+        with span("sparse_search"):
+            hits = index.search(query, self.candidates)
+        return [index.to_document(row, score) for row, score in hits]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        # copy_context keeps the request trace for the span in the pool thread
+        future = _sparse_pool.submit(contextvars.copy_context().run, self._sparse_documents, query)
+        dense_docs = self.dense.invoke(query) or []
+        return rrf_fuse([dense_docs, future.result()], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        dense_docs, sparse_docs = await asyncio.gather(
+            self.dense.ainvoke(query),
+            asyncio.to_thread(self._sparse_documents, query),
+        )
+        return rrf_fuse([dense_docs or [], sparse_docs], self.k, self.rrf_k)
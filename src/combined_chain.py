@@ -1,11 +1,17 @@
 # src/combined_chain.py
 
 import re
-from langchain_ollama import ChatOllama
+import time
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
 
-from src.retriever import build_retriever
+from src.resources import get_llm, get_retriever, get_embeddings
 from src.memory_chain import MemoryChatbot
+from src.answer_cache import ANSWER_CACHE_ENABLED, documents_fingerprint, get_answer_cache
+from src.retrieval_cache import RETRIEVAL_CACHE_ENABLED, get_retrieval_cache
+from src.metrics import span, timed, observe_llm_reply, StreamTimer
+from src.intent_router import route, aroute
+from src.fast_path import fast_reply
 
 
 
@@ -14,11 +20,8 @@ from src.memory_chain import MemoryChatbot
 # Load LLM
 # ---------------------------------------------------------
 def load_llm(model_name="llama2"):
-    return ChatOllama(
-        model=model_name,
-        temperature=0.2,
-        max_tokens=200
-    )
+    # Shared process-wide client (see src/resources.py)
+    return get_llm(model_name, temperature=0.2, max_tokens=200)
 
 
 # ---------------------------------------------------------
@@ -51,35 +54,28 @@ prompt_template = ChatPromptTemplate.from_messages([
 
 
 # ---------------------------------------------------------
-# Intent Classification
+# Intent Classification (see src/intent_router.py)
 # ---------------------------------------------------------
-PERSONAL_PATTERNS = [
-    r"my name",
-    r"who am i",
-    r"where do i live",
-    r"i live",
-    r"i am a",
-    r"what do i do",
-    r"what is my",
-]
-
-LEGAL_PATTERNS = [
-    r"dispute",
-    r"rights",
-    r"law",
-    r"illegal",
-    r"how to file",
-    r"fir",
-    r"rti",
-    r"tenant",
-    r"harassment",
-    r"police",
-]
+def is_legal_query(q):
+    return route(q).legal
 
 
-def is_legal_query(q):
-    q = q.lower()
-    return any(re.search(p, q) for p in LEGAL_PATTERNS)
+# Words that tie a question to the user or to earlier turns
+# ("my rights", "what about this?"); such answers are never cached.
+CONTEXT_DEPENDENT_PATTERN = re.compile(
+    r"\b(i|i'm|im|me|my|mine|we|our|us|this|these|those|he|she|him|her|his|they|them|their)\b"
+)
+
+
+def is_cacheable_query(q):
+    """
+    Self-contained, non-personal legal question: its answer depends only on
+    the query and the retrieved context, not on memory or history.
+    """
+    intent = route(q)
+    if not intent.legal or intent.personal:
+        return False
+    return not CONTEXT_DEPENDENT_PATTERN.search(q.lower())
 
 
 # ---------------------------------------------------------
@@ -87,10 +83,51 @@ def is_legal_query(q):
 # ---------------------------------------------------------
 class CombinedLegalChatbot:
     def __init__(self, model_name="llama2"):
+        # Shared, process-wide resources
+        self.top_k = 5
         self.llm = load_llm(model_name)
-        self.retriever = build_retriever(5)
+        self.retriever = get_retriever(self.top_k)
+
+        # Per-user state
         self.memory = MemoryChatbot()
+        # Stable chat_history.db id of the current conversation (None until first save)
+        self.session_id = None
+
+        # Document state
+        self.active_document = None
+        self.document_fields = {}
+        self.document_field_order = []
+        self.current_field_index = 0
+
+    # -----------------------------------------------------
+    def _clear_document_state(self):
+        self.active_document = None
+        self.document_fields = {}
+        self.document_field_order = []
+        self.current_field_index = 0
 
+    # -----------------------------------------------------
+    def export_state(self):
+        """Serializable snapshot of everything that belongs to this user."""
+        state = self.memory.export_state()
+        state["session_id"] = self.session_id
+        state["document"] = {
+            "active_document": self.active_document,
+            "document_fields": dict(self.document_fields),
+            "document_field_order": list(self.document_field_order),
+            "current_field_index": self.current_field_index,
+        }
+        return state
+
+    def load_state(self, state: dict):
+        self.memory.load_state(state)
+        self.session_id = state.get("session_id")
+
+        doc = state.get("document") or {}
+        self.active_document = doc.get("active_document")
+        self.document_fields = dict(doc.get("document_fields", {}))
+        self.document_field_order = list(doc.get("document_field_order", []))
+        self.current_field_index = doc.get("current_field_index", 0)
 
     # -----------------------------------------------------
     def _get_memory_string(self):
@@ -110,45 +147,302 @@ class CombinedLegalChatbot:
         return "\n".join(out)
 
     # -----------------------------------------------------
-    def _retrieve_context(self, user_query):
+    def _retrieve_documents(self, user_query):
         """Use RAG ONLY for legal queries."""
         if not is_legal_query(user_query):
-            return "None"
+            return []
+
+        with span("retrieval"):
+            docs = self._cached_documents(user_query)
+            if docs is None:
+                docs = self.retriever.invoke(user_query) or []
+                self._store_documents(user_query, docs)
+        return docs
+
+    async def _aretrieve_documents(self, user_query):
+        if not is_legal_query(user_query):
+            return []
 
-        docs = self.retriever.invoke(user_query)
+        with span("retrieval"):
+            docs = self._cached_documents(user_query)
+            if docs is None:
+                docs = await self.retriever.ainvoke(user_query) or []
+                self._store_documents(user_query, docs)
+        return docs
+
+    def _cached_documents(self, user_query):
+        if not RETRIEVAL_CACHE_ENABLED:
+            return None
+        return get_retrieval_cache().get(user_query, self.top_k)
+
+    def _store_documents(self, user_query, docs):
+        if RETRIEVAL_CACHE_ENABLED:
+            get_retrieval_cache().put(user_query, self.top_k, docs)
+
+    def _retrieve_context(self, user_query):
+        return self._format_docs(self._retrieve_documents(user_query))
+
+    def _format_docs(self, docs):
         if docs:
             return "\n---\n".join([d.page_content for d in docs])
         return "None"
 
+    # -----------------------------------------------------
+    # Semantic answer cache
+    # -----------------------------------------------------
+    def _uses_answer_cache(self, user_query, docs):
+        if not ANSWER_CACHE_ENABLED or self.active_document or not docs:
+            return False
+        return is_cacheable_query(user_query)
+
+    def _answer_cache_key(self, user_query, docs):
+        """(query embedding, document fingerprint), or None to bypass the cache."""
+        if not self._uses_answer_cache(user_query, docs):
+            return None
+        try:
+            embeddings = get_embeddings()
+            embed = getattr(embeddings, "embed_query_array", None) or embeddings.embed_query
+            return embed(user_query), documents_fingerprint(docs)
+        except Exception as e:
+            print(f"⚠️ Answer cache disabled for this query: {e}")
+            return None
+
+    async def _aanswer_cache_key(self, user_query, docs):
+        """Async _answer_cache_key: a cache-miss encode must not block the event loop."""
+        if not self._uses_answer_cache(user_query, docs):
+            return None
+        try:
+            embeddings = get_embeddings()
+            aembed = getattr(embeddings, "aembed_query_array", None) or embeddings.aembed_query
+            return await aembed(user_query), documents_fingerprint(docs)
+        except Exception as e:
+            print(f"⚠️ Answer cache disabled for this query: {e}")
+            return None
+
+    def _cached_answer(self, cache_key):
+        if cache_key is None:
+            return None
+        return get_answer_cache().lookup(*cache_key)
+
+    def _cache_answer(self, cache_key, response):
+        if cache_key is not None:
+            get_answer_cache().store(*cache_key, response)
+
+    # -----------------------------------------------------
+    # Fast path (no RAG, no LLM)
+    # -----------------------------------------------------
+    def _fast_reply(self, user_query):
+        """Deterministic reply for greetings / stored-fact questions, or None."""
+        if self.active_document:
+            return None
+        return fast_reply(user_query, self.memory.memory_store)
+
+    # -----------------------------------------------------
+    @timed("prompt_build")
+    def _build_prompt(self, user_query, context, shared=False):
+        """
+        shared=True: the answer goes into the cross-user answer cache, so the
+        prompt must not carry this user's facts or conversation.
+        """
+        return prompt_template.invoke({
+            "memory": "None" if shared else self._get_memory_string(),
+            "context": context,
+            "history": "None" if shared else self._summarize_history(),
+            "query": user_query
+        })
+
+    def _invoke_llm(self, prompt):
+        start = time.perf_counter()
+        message = self.llm.invoke(prompt)
+        observe_llm_reply(message, time.perf_counter() - start)
+        return message.content.strip()
+
+    async def _ainvoke_llm(self, prompt):
+        start = time.perf_counter()
+        message = await self.llm.ainvoke(prompt)
+        observe_llm_reply(message, time.perf_counter() - start)
+        return message.content.strip()
+
 
 
     # -----------------------------------------------------
     # MAIN GENERATE FUNCTION
     # -----------------------------------------------------
+    @timed("generate")
     def generate(self, user_query):
 
-        # 1️⃣ Update memory
-        self.memory.add_user_message(user_query)
+        # Greeting or question about a stored fact → answered without the LLM.
+        # Checked before the memory update in every entry point: such a
+        # message states no new fact, so the answer is the same either way.
+        response = self._fast_reply(user_query)
+        if response is not None:
+            self._update_memory(user_query)
+            self.memory.add_assistant_response(response)
+            return response
+
+        # 1️⃣ Update memory (small talk carries no facts)
+        self._update_memory(user_query)
 
         # 2️⃣ RAG context if legal
-        context = self._retrieve_context(user_query)
+        docs = self._retrieve_documents(user_query)
+
+        # Repeated non-personal legal question → cached answer
+        cache_key = self._answer_cache_key(user_query, docs)
+        response = self._cached_answer(cache_key)
+        if response is not None:
+            self.memory.add_assistant_response(response)
+            return response
 
         # 3️⃣ Build final prompt
-        prompt = prompt_template.invoke({
-            "memory": self._get_memory_string(),
-            "context": context,
-            "history": self._summarize_history(),
-            "query": user_query
-        })
+        prompt = self._build_prompt(user_query, self._format_docs(docs), shared=cache_key is not None)
+
+        # 4️⃣ Generate answer
+        response = self._invoke_llm(prompt)
+        self._cache_answer(cache_key, response)
+
+        # 5️⃣ Save assistant reply in memory
+        self.memory.add_assistant_response(response)
+
+        return response
+
+    # -----------------------------------------------------
+    # ASYNC GENERATE (used by the API server)
+    # -----------------------------------------------------
+    @timed("generate")
+    async def agenerate(self, user_query):
+        """
+        Same pipeline as generate(), but fact extraction and retrieval run
+        concurrently and every LLM call is awaited, so the event loop is free
+        to serve other users while Ollama is busy.
+        """
+        # Classify off the loop once; every later route() call is a cache hit
+        await aroute(user_query)
+
+        response = self._fast_reply(user_query)
+        if response is not None:
+            await self._aupdate_memory(user_query)
+            self.memory.add_assistant_response(response)
+            return response
+
+        docs = await self._aprepare(user_query)
+
+        cache_key = await self._aanswer_cache_key(user_query, docs)
+        response = self._cached_answer(cache_key)
+        if response is not None:
+            self.memory.add_assistant_response(response)
+            return response
+
+        prompt = self._build_prompt(user_query, self._format_docs(docs), shared=cache_key is not None)
 
         # 4️⃣ Generate answer
-        response = self.llm.invoke(prompt).content.strip()
+        response = await self._ainvoke_llm(prompt)
+        self._cache_answer(cache_key, response)
 
         # 5️⃣ Save assistant reply in memory
         self.memory.add_assistant_response(response)
 
         return response
 
+    async def _aprepare(self, user_query):
+        # 1️⃣ + 2️⃣ Update memory and fetch RAG documents concurrently
+        _, docs = await asyncio.gather(
+            self._aupdate_memory(user_query),
+            self._aretrieve_documents(user_query)
+        )
+        return docs
+
+    def _update_memory(self, user_query):
+        with span("memory_update"):
+            self.memory.add_user_message(user_query, extract=not route(user_query).greeting)
+
+    async def _aupdate_memory(self, user_query):
+        with span("memory_update"):
+            await self.memory.aadd_user_message(user_query, extract=not route(user_query).greeting)
+
+    # -----------------------------------------------------
+    # STREAMING GENERATE
+    # -----------------------------------------------------
+    def stream(self, user_query):
+        """
+        Yield the reply token by token as ChatOllama produces it.
+        The full reply is committed to memory once the stream ends.
+        """
+        fast = self._fast_reply(user_query)
+        if fast is not None:
+            self._update_memory(user_query)
+            self.memory.add_assistant_response(fast)
+            yield fast
+            return
+
+        self._update_memory(user_query)
+        docs = self._retrieve_documents(user_query)
+
+        cache_key = self._answer_cache_key(user_query, docs)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            self.memory.add_assistant_response(cached)
+            yield cached
+            return
+
+        prompt = self._build_prompt(user_query, self._format_docs(docs), shared=cache_key is not None)
+
+        parts = []
+        completed = False
+        timer = StreamTimer()
+        try:
+            for chunk in self.llm.stream(prompt):
+                timer.chunk(chunk)
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+            completed = True
+        finally:
+            # Runs on normal completion and on client disconnect
+            timer.finish()
+            response = "".join(parts).strip()
+            self.memory.add_assistant_response(response)
+            if completed:
+                self._cache_answer(cache_key, response)
+
+    async def astream(self, user_query):
+        """Async variant of stream(), used by the /chat/stream endpoint."""
+        await aroute(user_query)
+
+        fast = self._fast_reply(user_query)
+        if fast is not None:
+            await self._aupdate_memory(user_query)
+            self.memory.add_assistant_response(fast)
+            yield fast
+            return
+
+        docs = await self._aprepare(user_query)
+
+        cache_key = await self._aanswer_cache_key(user_query, docs)
+        cached = self._cached_answer(cache_key)
+        if cached is not None:
+            self.memory.add_assistant_response(cached)
+            yield cached
+            return
+
+        prompt = self._build_prompt(user_query, self._format_docs(docs), shared=cache_key is not None)
+
+        parts = []
+        completed = False
+        timer = StreamTimer()
+        try:
+            async for chunk in self.llm.astream(prompt):
+                timer.chunk(chunk)
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+            completed = True
+        finally:
+            timer.finish()
+            response = "".join(parts).strip()
+            self.memory.add_assistant_response(response)
+            if completed:
+                self._cache_answer(cache_key, response)
+
 # src/combined_chain.py
 # src/combined_chain.py
 
@@ -6,7 +6,8 @@ from fpdf import FPDF
 import datetime
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
+
+from src.resources import get_llm, get_or_create
 
 
 class DocumentGeneratorChain:
@@ -19,7 +20,7 @@ class DocumentGeneratorChain:
     """
 
     def __init__(self, model_name="llama2", template_dir="src/templates"):
-        self.llm = ChatOllama(model=model_name, temperature=0.2, max_tokens=700)
+        self.llm = get_llm(model_name, temperature=0.2, max_tokens=700)
         self.template_dir = template_dir
 
         self.prompt_template = ChatPromptTemplate.from_messages([
@@ -130,3 +131,7 @@ Follow these rules:
 
         return os.path.abspath(save_path)
 
+
+def get_document_chain():
+    """Process-wide DocumentGeneratorChain (stateless between requests)."""
+    return get_or_create("doc_chain", DocumentGeneratorChain)
@@ -5,24 +5,293 @@ Uses a LOCAL SentenceTransformer model (MiniLM) for consistent RAG performance.
 """
 
 import os
-from sentence_transformers import SentenceTransformer
-from langchain.embeddings.base import Embeddings
+import time
+import queue
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from dotenv import load_dotenv
 
+from src.metrics import span
+
 load_dotenv()
 MODEL_PATH = os.getenv("MODEL_PATH")
+# Hub model used when MODEL_PATH is missing (downloaded and cached by sentence-transformers)
+DEFAULT_HF_MODEL = "all-MiniLM-L6-v2"
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 2048))
+QUERY_CACHE_DB = os.getenv("QUERY_CACHE_DB")  # optional on-disk tier
+# Inference backend for the local model: torch (fp32), int8 (dynamically
+# quantized Linear layers) or onnx (ONNX Runtime via sentence-transformers)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")  # e.g. onnx/model_qint8_avx2.onnx
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "1") == "1"
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", 32))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", 5))
+
+
+def normalize_query(text: str):
+    """Cache key: case- and whitespace-insensitive query text."""
+    return " ".join(text.lower().split())
+
+
+# ---------------------------------------------------------
+# Query embedding cache (in-memory LRU + optional SQLite tier)
+# ---------------------------------------------------------
+class QueryEmbeddingCache:
+    """
+    Keeps query embeddings as float32 arrays.
+    Memory tier is an LRU of `max_size` entries; when `db_path` is set,
+    misses fall through to a SQLite table that survives restarts.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, db_path: str = QUERY_CACHE_DB):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    vector = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        vector.setflags(write=False)  # shared between callers
+        with self._lock:
+            self._remember(key, vector)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                    (key, vector.tobytes())
+                )
+                self._db.commit()
+        return vector
+
+    def _remember(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+# ---------------------------------------------------------
+# Model loading per backend
+# ---------------------------------------------------------
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+
+
+def load_sentence_transformer(model_path: str, backend: str = EMBEDDING_BACKEND):
+    """
+    Load the SentenceTransformer for `backend`. Falls back to plain torch
+    when the optional runtime for the requested backend is missing.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
+    # Imported here: pulls in torch, which should not load with this module
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        kwargs = {"backend": "onnx"}
+        if EMBEDDING_ONNX_FILE:
+            kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_FILE}
+        try:
+            # Exports the model to ONNX on first load if no .onnx file exists
+            return SentenceTransformer(model_path, **kwargs)
+        except (ImportError, TypeError, ValueError) as e:
+            # ImportError: optimum/onnxruntime missing; TypeError:
+            # sentence-transformers < 3.2 has no backend argument
+            print(f"⚠️ ONNX embedding backend unavailable ({e}), using torch")
+            return SentenceTransformer(model_path)
+
+    model = SentenceTransformer(model_path)
+    if backend == "int8":
+        import torch
+        # int8 weights for every Linear layer, activations quantized on the fly
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+# ---------------------------------------------------------
+# Micro-batching of concurrent query embeddings
+# ---------------------------------------------------------
+class EmbeddingMicroBatcher:
+    """
+    Coalesces query embeddings submitted from concurrent requests into one
+    `encode_batch(texts)` call (a single model forward pass) and fans the
+    vectors back out to the waiting callers.
+
+    A worker thread takes everything already queued (up to `max_batch`).
+    Under concurrent load it also holds the batch open for up to
+    `max_wait_ms` to collect more, but only until it is as large as the
+    previous batch or holds every outstanding request, so steady load never
+    pays the full window. A lone caller is never delayed.
+    """
+
+    def __init__(self, encode_batch, max_batch: int = EMBED_BATCH_MAX,
+                 max_wait_ms: float = EMBED_BATCH_WAIT_MS):
+        self.encode_batch = encode_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._last_batch_size = 0
+        self._inflight = 0  # submitted, result not yet delivered
+        self._inflight_lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+
+    def submit(self, text: str) -> Future:
+        """Queue `text`; the Future resolves to its float32 vector."""
+        self._ensure_worker()
+        future = Future()
+        with self._inflight_lock:
+            self._inflight += 1
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str):
+        return self.submit(text).result()
+
+    async def aembed(self, text: str):
+        return await asyncio.wrap_future(self.submit(text))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "queued": self._queue.qsize(),
+        }
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="embedding-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        # Only wait for stragglers when requests are actually overlapping
+        if len(batch) > 1 or self._last_batch_size > 1:
+            deadline = time.monotonic() + self.max_wait
+            target = min(self.max_batch, max(self._last_batch_size, self._inflight))
+            while len(batch) < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._last_batch_size = len(batch)
+
+            # Identical concurrent queries are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            error = None
+            try:
+                by_text = dict(zip(texts, self.encode_batch(texts)))
+            except Exception as e:
+                error = e
+
+            with self._inflight_lock:
+                self._inflight -= len(batch)
+            for text, future in batch:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(by_text[text])
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
 
 class LocalSentenceTransformerEmbeddings(Embeddings):
     """
     LangChain-compatible wrapper for your local SentenceTransformer model.
+    Query embeddings are cached (see QueryEmbeddingCache); cache misses from
+    concurrent requests are encoded together (see EmbeddingMicroBatcher).
     """
 
-    def __init__(self, model_path: str):
-        if not os.path.exists(model_path):
+    def __init__(self, model_path: str, cache: QueryEmbeddingCache = None,
+                 microbatch: bool = EMBED_MICROBATCH, backend: str = EMBEDDING_BACKEND,
+                 from_hub: bool = False):
+        """from_hub: model_path is a Hugging Face model name, not a directory."""
+        if not from_hub and not os.path.exists(model_path):
             raise FileNotFoundError(f"Embedding model not found at: {model_path}")
 
-        print(f"🔧 Loading embeddings model from: {model_path}")
-        self.model = SentenceTransformer(model_path)
+        print(f"🔧 Loading embeddings model from: {model_path} (backend: {backend})")
+        self.backend = backend
+        self.model = load_sentence_transformer(model_path, backend)
+        self.cache = cache or QueryEmbeddingCache()
+        self.batcher = EmbeddingMicroBatcher(self._encode_batch) if microbatch else None
+
+    def _encode_batch(self, texts):
+        return self.model.encode(
+            texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32, copy=False)
 
     def embed_documents(self, texts):
         """
@@ -30,11 +299,48 @@ class LocalSentenceTransformerEmbeddings(Embeddings):
         """
         return self.model.encode(texts, show_progress_bar=False).tolist()
 
+    def embed_query_array(self, text):
+        """
+        Embed a single query → returns a read-only float32 array (cached).
+        """
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            with span("embedding"):
+                if self.batcher is not None:
+                    encoded = self.batcher.embed(text)
+                else:
+                    encoded = self.model.encode(text, show_progress_bar=False)
+            vector = self.cache.put(key, encoded)
+        return vector
+
+    async def aembed_query_array(self, text):
+        """Async embed_query_array: awaits the batcher instead of a thread."""
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            with span("embedding"):
+                if self.batcher is not None:
+                    encoded = await self.batcher.aembed(text)
+                else:
+                    encoded = await asyncio.to_thread(self.model.encode, text, show_progress_bar=False)
+            vector = self.cache.put(key, encoded)
+        return vector
+
     def embed_query(self, text):
         """
         Embed a single query → returns a vector.
         """
-        return self.model.encode(text, show_progress_bar=False).tolist()
+        return self.embed_query_array(text).tolist()
+
+    async def aembed_query(self, text):
+        return (await self.aembed_query_array(text)).tolist()
+
+    def cache_stats(self):
+        stats = self.cache.stats()
+        if self.batcher is not None:
+            stats["microbatch"] = self.batcher.stats()
+        return stats
 
 
 # ---------------------------------------------------------
@@ -45,10 +351,11 @@ def load_embedding_model():
     """
     Loads the sentence transformer model.
     If local path exists, use it. Otherwise, use a default HuggingFace model.
+    Either way it runs on EMBEDDING_BACKEND with the query cache and
+    micro-batching.
     """
     if MODEL_PATH and os.path.exists(MODEL_PATH):
         return LocalSentenceTransformerEmbeddings(model_path=MODEL_PATH)
-    
-    print(f"Local model not found at {MODEL_PATH}. Using default HuggingFace model: all-MiniLM-L6-v2")
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+    print(f"Local model not found at {MODEL_PATH}. Using default HuggingFace model: {DEFAULT_HF_MODEL}")
+    return LocalSentenceTransformerEmbeddings(model_path=DEFAULT_HF_MODEL, from_hub=True)
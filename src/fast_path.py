@@ -0,0 +1,196 @@
+# src/fast_path.py
+"""
+Deterministic replies that never need the LLM:
+- greetings, thanks and goodbyes (the intent router's greeting intent)
+- direct questions about facts already in MemoryChatbot.memory_store
+  ("what is my name?", "where do I live?")
+
+Anything else, including a fact question whose answer is not stored yet,
+returns None and goes through RAG + LLM as before.
+"""
+
+import os
+import re
+from dotenv import load_dotenv
+
+from src.intent_router import route, normalize_message
+
+load_dotenv()
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+
+# Longer personal questions usually need the LLM ("... given my age, can I ...")
+FACT_QUESTION_MAX_WORDS = 12
+
+# Process-wide counters (how many replies skipped the LLM)
+fast_path_stats = {
+    "messages": 0,
+    "greetings": 0,
+    "facts": 0,
+    "fact_misses": 0,  # fact question, but the fact is not known yet
+}
+
+
+def fast_path_snapshot():
+    stats = dict(fast_path_stats)
+    hits = stats["greetings"] + stats["facts"]
+    stats["hit_rate"] = hits / stats["messages"] if stats["messages"] else 0.0
+    return stats
+
+
+# ---------------------------------------------------------
+# Greetings
+# ---------------------------------------------------------
+GREETING_REPLIES = [
+    (re.compile(r"\b(thanks|thank you|thx)\b"),
+     "You're welcome{name}! Let me know if you have any other legal questions."),
+    (re.compile(r"\b(bye|goodbye|see you|good night)\b"),
+     "Goodbye{name}! Take care, and come back any time you need legal help."),
+    (re.compile(r"\bhow are you\b"),
+     "I'm doing well, thank you{name}! How can I help you with a legal question today?"),
+    (re.compile(r"\b(hi|hii|hello|hey|namaste|namaskar|good morning|good afternoon|good evening)\b"),
+     "Hello{name}! I'm your legal assistant. How can I help you today?"),
+]
+DEFAULT_GREETING_REPLY = "Glad I could help{name}. Is there anything else you'd like to know?"
+
+
+def greeting_reply(text: str, memory_store: dict):
+    name = memory_store.get("name")
+    suffix = f", {_display(name).split()[0]}" if name else ""
+    normalized = normalize_message(text)
+    for pattern, reply in GREETING_REPLIES:
+        if pattern.search(normalized):
+            return reply.format(name=suffix)
+    return DEFAULT_GREETING_REPLY.format(name=suffix)
+
+
+# ---------------------------------------------------------
+# Stored-fact questions
+# ---------------------------------------------------------
+# A question only takes the fast path when it is nothing but lookups:
+# "what is my name", "who am i", "where do i live and how old am i".
+# "How do I change my name?" mentions a fact but asks something else.
+FACT_SUBJECTS = {
+    "name": r"my (?:full )?name",
+    "location": r"my (?:location|address|city|hometown)",
+    "age": r"my age",
+    "occupation": r"my (?:job|occupation|profession)",
+    "phone": r"my (?:phone|mobile)(?: number)?",
+    "email": r"my (?:email|e-mail|mail id)(?: address)?",
+}
+FACT_DIRECT_QUESTIONS = {
+    "name": [r"who am i"],
+    "location": [r"where do i (?:live|stay)", r"where am i from"],
+    "age": [r"how old am i"],
+    "occupation": [r"what do i do(?: for a living)?"],
+}
+LOOKUP_PREFIX = r"(?:what(?: is|'s)|(?:can you |please )?(?:tell|remind) me|do you (?:know|remember))"
+
+
+def _lookup_pattern(bare_subject: bool):
+    alternatives = []
+    for field, subject in FACT_SUBJECTS.items():
+        forms = [f"{LOOKUP_PREFIX} {subject}"] + FACT_DIRECT_QUESTIONS.get(field, [])
+        if bare_subject:
+            forms.append(subject)
+        alternatives.append(f"(?P<{field}>{'|'.join(forms)})")
+    return re.compile("|".join(alternatives))
+
+
+# After the first lookup, "and my age" may drop the question words
+FACT_LOOKUP_PATTERN = _lookup_pattern(bare_subject=False)
+FACT_FOLLOWUP_PATTERN = _lookup_pattern(bare_subject=True)
+LOOKUP_SEPARATOR = re.compile(r"\s*(?:,|\band\b)\s*")
+
+# memory_store keys that may hold each fact (regex tier first, then
+# names the LLM extraction tends to choose)
+FACT_KEYS = {
+    "name": ("name", "full_name"),
+    "location": ("location", "city", "address", "hometown"),
+    "age": ("age",),
+    "occupation": ("occupation", "job", "profession"),
+    "phone": ("phone", "phone_number", "mobile"),
+    "email": ("email", "email_address"),
+}
+
+FACT_REPLIES = {
+    "name": "Your name is {}.",
+    "location": "You live in {}.",
+    "age": "You are {} years old.",
+    "occupation": "Your occupation is {}.",
+    "phone": "Your phone number is {}.",
+    "email": "Your email is {}.",
+}
+
+
+# Regex-extracted values are lowercase; restore capitals for proper nouns
+TITLE_CASE_FIELDS = {"name", "location"}
+
+
+def _display(value, field="name"):
+    value = str(value).strip()
+    return value.title() if field in TITLE_CASE_FIELDS and value.islower() else value
+
+
+def asked_facts(text: str):
+    """Fact fields a short question asks for, in order; [] unless it only looks facts up."""
+    intent = route(text)
+    if len(text.split()) > FACT_QUESTION_MAX_WORDS or not intent.question:
+        return []
+    if intent.legal or intent.name == "document":
+        return []
+    parts = LOOKUP_SEPARATOR.split(normalize_message(text).rstrip("?!. "))
+    fields = []
+    for i, part in enumerate(parts):
+        pattern = FACT_FOLLOWUP_PATTERN if i else FACT_LOOKUP_PATTERN
+        match = pattern.fullmatch(part)
+        if match is None:
+            return []
+        if match.lastgroup not in fields:
+            fields.append(match.lastgroup)
+    return fields
+
+
+def lookup_fact(field: str, memory_store: dict):
+    for key in FACT_KEYS[field]:
+        value = memory_store.get(key)
+        if value:
+            return value
+    return None
+
+
+def fact_reply(fields, memory_store: dict):
+    """One sentence per asked fact, or None if any of them is unknown."""
+    sentences = []
+    for field in fields:
+        value = lookup_fact(field, memory_store)
+        if value is None:
+            return None
+        if field == "occupation":
+            value = re.sub(r"^(a|an)\s+", "", str(value).strip(), flags=re.IGNORECASE)
+        sentences.append(FACT_REPLIES[field].format(_display(value, field)))
+    return " ".join(sentences)
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def fast_reply(text: str, memory_store: dict):
+    """Deterministic reply for `text`, or None if the LLM is needed."""
+    if not FAST_PATH_ENABLED:
+        return None
+    fast_path_stats["messages"] += 1
+
+    intent = route(text)
+    if intent.greeting and not intent.question:
+        fast_path_stats["greetings"] += 1
+        return greeting_reply(text, memory_store)
+
+    fields = asked_facts(text)
+    if fields:
+        reply = fact_reply(fields, memory_store)
+        if reply is not None:
+            fast_path_stats["facts"] += 1
+            return reply
+        fast_path_stats["fact_misses"] += 1
+    return None
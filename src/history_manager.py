@@ -1,141 +1,585 @@
+import re
+import time
+import hashlib
+import secrets
 import sqlite3
-import json
-from datetime import datetime
-from typing import List, Dict, Any
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+# Per-connection tuning, applied once when a thread opens its connection
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",      # readers no longer block the writer
+    "PRAGMA synchronous=NORMAL",    # safe with WAL, far fewer fsyncs
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+]
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache reuses the prepared versions instead of re-parsing them.
+INSERT_SESSION_SQL = (
+    "INSERT INTO sessions (session_id, user_id, preview, message_count, content_hash, last_activity) "
+    "VALUES (?, ?, ?, 0, ?, ?)"
+)
+INSERT_MESSAGE_SQL = "INSERT INTO messages (session_id, type, content) VALUES (?, ?, ?)"
+# Sessions are listed by last activity: last_activity is a fresh ULID set on
+# every append, so it orders like a timestamp, is unique, and is itself the
+# pagination cursor
+RECENT_SESSIONS_SQL = """
+    SELECT session_id, timestamp, preview, last_activity 
+    FROM sessions 
+    WHERE user_id = ? 
+    ORDER BY last_activity DESC 
+    LIMIT ?
+"""
+# Keyset pages: continue strictly after the last activity key / message id
+# seen, so deep pages cost the same as the first one
+SESSIONS_PAGE_SQL = """
+    SELECT session_id, timestamp, preview, last_activity 
+    FROM sessions 
+    WHERE user_id = ? AND last_activity < ? 
+    ORDER BY last_activity DESC 
+    LIMIT ?
+"""
+# Databases not migrated to v8 (no last_activity column) page by session
+# id, i.e. creation order
+LEGACY_RECENT_SESSIONS_SQL = """
+    SELECT session_id, timestamp, preview, session_id 
+    FROM sessions 
+    WHERE user_id = ? 
+    ORDER BY session_id DESC 
+    LIMIT ?
+"""
+LEGACY_SESSIONS_PAGE_SQL = """
+    SELECT session_id, timestamp, preview, session_id 
+    FROM sessions 
+    WHERE user_id = ? AND session_id < ? 
+    ORDER BY session_id DESC 
+    LIMIT ?
+"""
+SESSION_MESSAGES_SQL = """
+    SELECT type, content, timestamp 
+    FROM messages 
+    WHERE session_id = ? 
+    ORDER BY id ASC
+"""
+MESSAGES_PAGE_SQL = """
+    SELECT id, type, content, timestamp 
+    FROM messages 
+    WHERE session_id = ? AND id > ? 
+    ORDER BY id ASC 
+    LIMIT ?
+"""
+SESSION_HEAD_SQL = "SELECT user_id, message_count, content_hash FROM sessions WHERE session_id = ?"
+SESSION_ALIAS_SQL = "SELECT session_id FROM session_aliases WHERE legacy_id = ?"
+BUMP_MESSAGE_COUNT_SQL = (
+    "UPDATE sessions SET message_count = message_count + ?, content_hash = ?, last_activity = ? "
+    "WHERE session_id = ?"
+)
+SEARCH_FTS_SQL = """
+    SELECT m.session_id, m.type, 
+           snippet(messages_fts, 0, '<mark>', '</mark>', '…', 12), 
+           m.timestamp, s.preview 
+    FROM messages_fts 
+    JOIN messages m ON m.id = messages_fts.rowid 
+    JOIN sessions s ON s.session_id = m.session_id 
+    WHERE messages_fts MATCH ? AND s.user_id = ? 
+    ORDER BY messages_fts.rowid DESC 
+    LIMIT ?
+"""
+DELETE_MESSAGES_SQL = "DELETE FROM messages WHERE session_id = ?"
+DELETE_SESSION_SQL = "DELETE FROM sessions WHERE session_id = ?"
+
+
+# ---------------------------------------------------------
+# Full-text search
+# ---------------------------------------------------------
+FTS_SCHEMA = [
+    # External content: the index stores no copy of the text. The source view
+    # adds the owning user as a second indexed column (hex-encoded, so it is
+    # one exact token), letting a search walk only that user's postings.
+    """
+    CREATE VIEW IF NOT EXISTS messages_fts_source AS
+    SELECT m.id AS id, m.content AS content, hex(s.user_id) AS user_key
+    FROM messages m JOIN sessions s ON s.session_id = m.session_id
+    """,
+    """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        content, user_key,
+        content='messages_fts_source', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    # Triggers keep the index in sync with messages. The session row must
+    # still exist when its messages are deleted (delete_session does that).
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, content, user_key)
+        VALUES (new.id, new.content,
+                (SELECT hex(user_id) FROM sessions WHERE session_id = new.session_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, user_key)
+        VALUES ('delete', old.id, old.content,
+                (SELECT hex(user_id) FROM sessions WHERE session_id = old.session_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, user_key)
+        VALUES ('delete', old.id, old.content,
+                (SELECT hex(user_id) FROM sessions WHERE session_id = old.session_id));
+        INSERT INTO messages_fts (rowid, content, user_key)
+        VALUES (new.id, new.content,
+                (SELECT hex(user_id) FROM sessions WHERE session_id = new.session_id));
+    END
+    """,
+    # Index everything saved before this migration
+    "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')",
+]
+
+SEARCH_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def _create_fts(conn):
+    """Create the FTS index, or leave search on the LIKE fallback if this
+    SQLite build has no FTS5."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError:
+        print("⚠️ SQLite was built without FTS5, chat search will use LIKE")
+        return
+    for sql in FTS_SCHEMA:
+        conn.execute(sql)
+
+
+def fts_match_query(query: str, user_id: str) -> Optional[str]:
+    """
+    Turn free user text into a safe FTS5 MATCH expression: every word is a
+    quoted term (so operators/punctuation in the input are inert) and all
+    terms must match. No prefix terms: FTS5 has to merge every token under a
+    prefix, which is slow on big indexes; the porter stemmer already matches
+    evict/evicted/eviction.
+    """
+    terms = SEARCH_TOKEN_PATTERN.findall(query.lower())
+    if not terms:
+        return None
+    words = " ".join(f'"{t}"' for t in terms)
+    # Same encoding as SQLite's hex() in messages_fts_source
+    user_key = user_id.encode("utf-8").hex().upper()
+    return f'content : ({words}) AND user_key : "{user_key}"'
+
+
+def highlight(content: str, terms: List[str], width: int = 80) -> str:
+    """Plain-Python snippet for the LIKE fallback."""
+    lower = content.lower()
+    pos = min((lower.find(t) for t in terms if t in lower), default=0)
+    start = max(0, pos - width // 2)
+    text = content[start:start + width]
+    for t in terms:
+        text = re.sub(f"({re.escape(t)})", r"<mark>\1</mark>", text, flags=re.IGNORECASE)
+    return ("…" if start > 0 else "") + text + ("…" if start + width < len(content) else "")
+
+
+# ---------------------------------------------------------
+# Session ids: ULIDs (48-bit ms timestamp + 80 random bits, Crockford base32).
+# Lexicographic order == creation order, and ids generated in the same
+# millisecond by this process stay strictly increasing. The same generator
+# produces the sessions.last_activity keys.
+# ---------------------------------------------------------
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+RANDOM_BITS = 80
+
+_ulid_lock = threading.Lock()
+_last_ulid = [0, 0]  # [ms, random part] of the last id generated
+
+
+def encode_ulid(ms: int, rand: int) -> str:
+    value = (ms << RANDOM_BITS) | rand
+    chars = []
+    for _ in range(26):
+        chars.append(CROCKFORD_BASE32[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_session_id() -> str:
+    with _ulid_lock:
+        ms = int(time.time() * 1000)
+        if ms <= _last_ulid[0]:
+            # Same millisecond (or the clock stepped back): bump the random part
+            ms, rand = _last_ulid[0], _last_ulid[1] + 1
+            if rand >> RANDOM_BITS:
+                ms, rand = ms + 1, 0
+        else:
+            rand = secrets.randbits(RANDOM_BITS)
+        _last_ulid[0], _last_ulid[1] = ms, rand
+        return encode_ulid(ms, rand)
+
+
+def _legacy_session_ms(session_id: str, timestamp) -> int:
+    """Creation time of a pre-ULID session (`{user_id}_{unix seconds}`)."""
+    try:
+        created = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        return int(created.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(session_id.rsplit("_", 1)[1]) * 1000
+    except (IndexError, ValueError):
+        return int(time.time() * 1000)
+
+
+def _migrate_session_ids(conn):
+    """
+    Rewrite `{user_id}_{seconds}` ids as ULIDs carrying their original
+    creation time, so id order matches history order. Old ids are kept in
+    session_aliases for clients still holding them.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_aliases (
+            legacy_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL
+        )
+    """)
+    rows = conn.execute("SELECT session_id, timestamp FROM sessions").fetchall()
+    mapping = [
+        (encode_ulid(_legacy_session_ms(sid, ts), secrets.randbits(RANDOM_BITS)), sid)
+        for sid, ts in rows
+    ]
+    conn.executemany("UPDATE sessions SET session_id = ? WHERE session_id = ?", mapping)
+    conn.executemany("UPDATE messages SET session_id = ? WHERE session_id = ?", mapping)
+    conn.executemany("INSERT INTO session_aliases (session_id, legacy_id) VALUES (?, ?)", mapping)
+
+
+# ---------------------------------------------------------
+# Content hash: a running hash over the saved messages (type + content, in
+# order), so a save can check that the conversation really continues the
+# stored one before appending to it.
+# ---------------------------------------------------------
+EMPTY_CONTENT_HASH = hashlib.sha256(b"").hexdigest()
+
+
+def chain_hash(messages, start: str = EMPTY_CONTENT_HASH) -> str:
+    """Extend the running hash `start` with (type, content) pairs."""
+    digest = start
+    for type_, content in messages:
+        h = hashlib.sha256(digest.encode("ascii"))
+        h.update(type_.encode("utf-8") + b"\0" + content.encode("utf-8"))
+        digest = h.hexdigest()
+    return digest
+
+
+def _backfill_content_hashes(conn):
+    rows = conn.execute("SELECT session_id FROM sessions").fetchall()
+    updates = []
+    for (session_id,) in rows:
+        messages = conn.execute(
+            "SELECT type, content FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+        updates.append((chain_hash(messages), session_id))
+    conn.executemany("UPDATE sessions SET content_hash = ? WHERE session_id = ?", updates)
+
+
+def _backfill_last_activity(conn):
+    """Last activity of existing sessions: the time of their newest message."""
+    rows = conn.execute("""
+        SELECT s.session_id, MAX(m.timestamp)
+        FROM sessions s LEFT JOIN messages m ON m.session_id = s.session_id
+        GROUP BY s.session_id
+    """).fetchall()
+    updates = []
+    for session_id, last_message in rows:
+        if last_message is None:
+            updates.append((session_id, session_id))
+        else:
+            ms = _legacy_session_ms(session_id, last_message)
+            updates.append((encode_ulid(ms, secrets.randbits(RANDOM_BITS)), session_id))
+    conn.executemany("UPDATE sessions SET last_activity = ? WHERE session_id = ?", updates)
+
+
+# ---------------------------------------------------------
+# Schema migrations: (version, [SQL string or callable(conn)]), in order.
+# The applied version is stored in PRAGMA user_version.
+# ---------------------------------------------------------
+MIGRATIONS = [
+    # v1: base tables (matches databases created before migrations existed)
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            preview TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(session_id) REFERENCES sessions(session_id)
+        )
+        """,
+    ]),
+    # v2: composite indexes for the two hot queries
+    #   sessions WHERE user_id = ? ORDER BY timestamp DESC
+    #   messages WHERE session_id = ? ORDER BY id
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_ts ON sessions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages (session_id, id)",
+    ]),
+    # v3: persisted message count per session, so saves can append only
+    #   the messages added since the last save
+    (3, [
+        "ALTER TABLE sessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0",
+        """
+        UPDATE sessions SET message_count = (
+            SELECT COUNT(*) FROM messages WHERE messages.session_id = sessions.session_id
+        )
+        """,
+    ]),
+    # v4: session_id in the sessions index as the tie-breaker of the
+    #   (timestamp, session_id) pagination cursor
+    (4, [
+        "DROP INDEX IF EXISTS idx_sessions_user_ts",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_ts_id ON sessions (user_id, timestamp, session_id)",
+    ]),
+    # v5: FTS5 full-text index over message content (see _create_fts)
+    (5, [
+        _create_fts,
+    ]),
+    # v6: ULID session ids; sessions are listed by id, no timestamp sort
+    (6, [
+        _migrate_session_ids,
+        "DROP INDEX IF EXISTS idx_sessions_user_ts_id",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id, session_id)",
+    ]),
+    # v7: running hash of the saved messages, checked before appending
+    (7, [
+        "ALTER TABLE sessions ADD COLUMN content_hash TEXT",
+        _backfill_content_hashes,
+    ]),
+    # v8: sessions listed by last activity, so a continued chat moves to the top
+    (8, [
+        "ALTER TABLE sessions ADD COLUMN last_activity TEXT",
+        _backfill_last_activity,
+        "DROP INDEX IF EXISTS idx_sessions_user_id",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_user_activity ON sessions (user_id, last_activity)",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
 
 class HistoryManager:
-    def __init__(self, db_path: str = "chat_history.db"):
+    def __init__(self, db_path: str = "chat_history.db", migrate: bool = True):
         self.db_path = db_path
-        self._init_db()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # SQLite allows one writer at a time and its busy handler waits by
+        # sleeping; queueing this process's writers on a lock hands the
+        # write slot straight to the next one instead.
+        self._write_lock = threading.Lock()
+        self._fts = None
+        if migrate:
+            self._init_db()
 
     def _get_conn(self):
-        return sqlite3.connect(self.db_path)
+        """
+        Return this thread's cached connection, opening and tuning it on
+        first use. sqlite3 connections must not be shared across threads,
+        so each worker thread keeps its own for the life of the process.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=256)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close every pooled connection (all threads)."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass  # owned by another thread that already exited
+            self._connections = []
+        self._local = threading.local()
 
     def _init_db(self):
-        """Creates the necessary tables if they don't exist."""
+        """Creates the schema, or migrates an existing database in place."""
+        self._migrate()
+
+    def schema_version(self) -> int:
+        return self._get_conn().execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self):
+        """
+        Apply every migration newer than the database's PRAGMA user_version.
+        Each migration runs in its own IMMEDIATE transaction together with
+        the version bump, so a crash never leaves a half-applied step and two
+        processes starting at once cannot both apply it.
+        """
         conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        # Table for Chat Sessions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                session_id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                preview TEXT
-            )
-        """)
-
-        # Table for Messages within a Session
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                type TEXT NOT NULL,
-                content TEXT NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(session_id) REFERENCES sessions(session_id)
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-
-
-    def save_session(self, user_id: str, messages: List[Any]) -> str:
-        """
-        Saves a full chat session and its messages.
+        for version, steps in MIGRATIONS:
+            if version <= self.schema_version():
+                continue
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-check under the write lock
+                if version <= self.schema_version():
+                    conn.rollback()
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            print(f"🗄️ chat history schema migrated to v{version}")
+
+
+    @staticmethod
+    def _message_fields(m):
+        # Handle LangChain message objects or dicts
+        content = m.content if hasattr(m, "content") else m.get("content", "")
+        type_ = m.type if hasattr(m, "type") else m.get("type", "unknown")
+        return type_, content
+
+    @classmethod
+    def _preview(cls, messages) -> str:
+        # Preview from the first user message, or just the first message
+        for m in messages:
+            type_, content = cls._message_fields(m)
+            if type_ == "human":
+                break
+        else:
+            _, content = cls._message_fields(messages[0])
+        return content[:50] + "..." if len(content) > 50 else content
+
+    def save_session(self, user_id: str, messages: List[Any], session_id: Optional[str] = None) -> str:
+        """
+        Persists a chat session incrementally. `messages` is the full
+        conversation; only the ones added since the last save of `session_id`
+        are written, so a save costs O(new messages) writes.
+
+        A new session is created when no session_id is given, the id is
+        unknown or belongs to another user, or the conversation does not
+        start with exactly the messages saved so far (history was cleared,
+        or a different chat was sent under that id).
         Returns the session_id.
         """
         if not messages:
             return None
 
+        fields = [self._message_fields(m) for m in messages]
         conn = self._get_conn()
-        cursor = conn.cursor()
+        with self._write_lock:
+            # IMMEDIATE so two concurrent saves of one session (e.g. from
+            # another process) can't both append the same tail
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                saved = 0
+                saved_hash = EMPTY_CONTENT_HASH
+                head = None
+                if session_id:
+                    session_id = self.resolve_session_id(session_id)
+                    head = conn.execute(SESSION_HEAD_SQL, (session_id,)).fetchone()
+                if head is not None and head[0] == user_id and head[1] <= len(fields):
+                    saved, saved_hash = head[1], chain_hash(fields[:head[1]])
+                    if head[2] is not None and head[2] != saved_hash:
+                        head = None
+                else:
+                    head = None
 
-        # Generate a unique session ID
-        session_id = f"{user_id}_{int(datetime.now().timestamp())}"
-        
-        # Create a preview from the first user message or just the first message
-        preview = "Empty chat"
-        for m in messages:
-            # Handle LangChain message objects or dicts
-            content = m.content if hasattr(m, "content") else m.get("content", "")
-            type_ = m.type if hasattr(m, "type") else m.get("type", "unknown")
-            
-            if type_ == "human":
-                preview = content[:50] + "..." if len(content) > 50 else content
-                break
-        else:
-             # Fallback if no human message found
-             first_msg = messages[0]
-             content = first_msg.content if hasattr(first_msg, "content") else first_msg.get("content", "")
-             preview = content[:50] + "..." if len(content) > 50 else content
-
-        # Insert Session
-        cursor.execute(
-            "INSERT INTO sessions (session_id, user_id, preview) VALUES (?, ?, ?)",
-            (session_id, user_id, preview)
-        )
+                if head is None:
+                    saved, saved_hash = 0, EMPTY_CONTENT_HASH
+                    session_id = new_session_id()
+                    conn.execute(INSERT_SESSION_SQL,
+                                 (session_id, user_id, self._preview(messages), saved_hash, session_id))
 
-        # Insert Messages
-        for m in messages:
-            content = m.content if hasattr(m, "content") else m.get("content", "")
-            type_ = m.type if hasattr(m, "type") else m.get("type", "unknown")
-            
-            cursor.execute(
-                "INSERT INTO messages (session_id, type, content) VALUES (?, ?, ?)",
-                (session_id, type_, content)
-            )
+                rows = [(session_id, type_, content) for type_, content in fields[saved:]]
+                if rows:
+                    conn.executemany(INSERT_MESSAGE_SQL, rows)
+                    # A fresh ULID moves the session to the top of the user's list
+                    conn.execute(BUMP_MESSAGE_COUNT_SQL,
+                                 (len(rows), chain_hash(fields[saved:], saved_hash), new_session_id(), session_id))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-        conn.commit()
-        conn.close()
         return session_id
 
+    def resolve_session_id(self, session_id: str) -> str:
+        """Map a pre-ULID session id to its current one (see migration v6);
+        any other id is returned unchanged."""
+        try:
+            row = self._get_conn().execute(SESSION_ALIAS_SQL, (session_id,)).fetchone()
+        except sqlite3.OperationalError:
+            return session_id  # database not migrated to v6
+        return row[0] if row else session_id
+
     def get_recent_sessions(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
         Returns the latest 'limit' sessions for a user.
         """
+        return self.get_sessions_page(user_id, limit=limit)[0]
+
+    def get_sessions_page(self, user_id: str, limit: int = 20,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a user's sessions, most recently active first (a chat
+        that was continued moves back to the top).
+        Returns (sessions, next_cursor); next_cursor (the last_activity key
+        of the last session on the page, opaque to clients) is None on the
+        last page. A session saved to while paging moves to page one.
+        """
         conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT session_id, timestamp, preview 
-            FROM sessions 
-            WHERE user_id = ? 
-            ORDER BY timestamp DESC 
-            LIMIT ?
-        """, (user_id, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        if cursor is None:
+            queries, params = (RECENT_SESSIONS_SQL, LEGACY_RECENT_SESSIONS_SQL), (user_id, limit + 1)
+        else:
+            queries, params = (SESSIONS_PAGE_SQL, LEGACY_SESSIONS_PAGE_SQL), (user_id, cursor, limit + 1)
+        try:
+            rows = conn.execute(queries[0], params).fetchall()
+        except sqlite3.OperationalError:
+            rows = conn.execute(queries[1], params).fetchall()  # database not migrated to v8
 
         sessions = []
-        for r in rows:
+        for r in rows[:limit]:
             sessions.append({
                 "session_id": r[0],
                 "timestamp": r[1],
                 "preview": r[2]
             })
-        
-        return sessions
+
+        next_cursor = rows[limit - 1][3] if len(rows) > limit and sessions else None
+        return sessions, next_cursor
 
     def get_session_messages(self, session_id: str) -> List[Dict[str, Any]]:
         """
         Retrieves all messages for a specific session.
         """
-        conn = self._get_conn()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT type, content, timestamp 
-            FROM messages 
-            WHERE session_id = ? 
-            ORDER BY id ASC
-        """, (session_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        session_id = self.resolve_session_id(session_id)
+        rows = self._get_conn().execute(SESSION_MESSAGES_SQL, (session_id,)).fetchall()
 
         messages = []
         for r in rows:
@@ -147,15 +591,82 @@ class HistoryManager:
             
         return messages
 
+    def get_messages_page(self, session_id: str, limit: int = 50,
+                          cursor: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        One page of a session's messages, oldest first, starting after the
+        message id `cursor`. Returns (messages, next_cursor).
+        Legacy session ids are resolved on every page, not only the first.
+        """
+        session_id = self.resolve_session_id(session_id)
+        rows = self._get_conn().execute(MESSAGES_PAGE_SQL, (session_id, cursor or 0, limit + 1)).fetchall()
+
+        messages = []
+        for r in rows[:limit]:
+            messages.append({
+                "type": r[1],
+                "content": r[2],
+                "timestamp": r[3]
+            })
+
+        next_cursor = rows[limit - 1][0] if len(rows) > limit and limit > 0 else None
+        return messages, next_cursor
+
+    def has_fts(self) -> bool:
+        if self._fts is None:
+            row = self._get_conn().execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'"
+            ).fetchone()
+            self._fts = row is not None
+        return self._fts
+
+    def search_messages(self, user_id: str, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Full-text search over one user's saved messages, newest first (every
+        hit contains all query words; bm25 ranking would have to count each
+        word's matches across the whole index, which is too slow on big ones).
+        Each hit carries a snippet with the matched words wrapped in <mark>.
+        """
+        match = fts_match_query(query, user_id)
+        if match is None:
+            return []
+
+        if self.has_fts():
+            rows = self._get_conn().execute(SEARCH_FTS_SQL, (match, user_id, limit)).fetchall()
+        else:
+            rows = self._search_like(user_id, SEARCH_TOKEN_PATTERN.findall(query.lower()), limit)
+
+        results = []
+        for r in rows:
+            results.append({
+                "session_id": r[0],
+                "type": r[1],
+                "snippet": r[2],
+                "timestamp": r[3],
+                "preview": r[4]
+            })
+        return results
+
+    def _search_like(self, user_id, terms, limit):
+        """Substring search, newest first (SQLite without FTS5)."""
+        sql = (
+            "SELECT m.session_id, m.type, m.content, m.timestamp, s.preview "
+            "FROM messages m JOIN sessions s ON s.session_id = m.session_id "
+            "WHERE s.user_id = ? "
+            + "".join(" AND m.content LIKE ?" for _ in terms)
+            + " ORDER BY m.id DESC LIMIT ?"
+        )
+        # Terms are alphanumeric only, so no LIKE wildcards to escape
+        patterns = [f"%{t}%" for t in terms]
+        rows = self._get_conn().execute(sql, (user_id, *patterns, limit)).fetchall()
+        return [(r[0], r[1], highlight(r[2], terms), r[3], r[4]) for r in rows]
+
     def delete_session(self, session_id: str):
         """
         Deletes a session and its messages.
         """
+        session_id = self.resolve_session_id(session_id)
         conn = self._get_conn()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
-        cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._write_lock, conn:
+            conn.execute(DELETE_MESSAGES_SQL, (session_id,))
+            conn.execute(DELETE_SESSION_SQL, (session_id,))
@@ -0,0 +1,62 @@
+# src/index_version.py
+"""
+Index version tracking shared by serving and ingestion.
+
+Kept free of heavy imports: the chat request path reads the ingestion
+manifest's location and version from here without pulling in the ingest
+stack (text splitters, process pools).
+"""
+
+import os
+import json
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Written by src/ingest/pipeline.py: source → chunk ids, plus the index version
+DEFAULT_MANIFEST = os.getenv("INGEST_MANIFEST", "ingest_manifest.json")
+
+
+class IndexVersionWatcher:
+    """
+    Reads the `version` field of a manifest file, re-reading it only when the
+    file's mtime changes and stat-ing at most once per `check_interval` seconds.
+    """
+
+    def __init__(self, manifest_path: str, check_interval: float = 1.0):
+        self.manifest_path = manifest_path
+        self.check_interval = check_interval
+        self._mtime = None
+        self._version = 0
+        self._checked_at = 0.0
+
+    def version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._version
+        self._checked_at = now
+
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return self._version
+
+        if mtime != self._mtime:
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._version = json.load(f).get("version", 0)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+        return self._version
+
+
+class VersionSet:
+    """Several version sources read as one key (hybrid: dense + BM25)."""
+
+    def __init__(self, watchers):
+        self.watchers = list(watchers)
+
+    def version(self):
+        return tuple(w.version() for w in self.watchers)
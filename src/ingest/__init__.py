@@ -0,0 +1,9 @@
+# src/ingest/__init__.py
+"""
+Corpus ingestion: stream legal source files → chunk → embed → upsert.
+Run with `python -m src.ingest <paths>`.
+"""
+
+from src.ingest.pipeline import run_ingestion
+
+__all__ = ["run_ingestion"]
@@ -0,0 +1,54 @@
+# src/ingest/__main__.py
+"""
+CLI entry point:
+
+    python -m src.ingest data/legal_corpus --backend local --workers 4
+"""
+
+import argparse
+
+from src.ingest.pipeline import run_ingestion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest legal source files into the vector index.")
+    parser.add_argument("paths", nargs="+", help="Files or directories (.txt / .md)")
+    parser.add_argument("--backend", choices=["local", "pinecone"], help="Defaults to VECTOR_BACKEND")
+    parser.add_argument("--index-dir", help="Local index directory (defaults to LOCAL_INDEX_DIR)")
+    parser.add_argument("--manifest", help="Chunk manifest path (defaults to INGEST_MANIFEST)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, help="Embedding processes (default: CPU count, 1 = in-process)")
+    parser.add_argument("--bm25-dir", help="BM25 index directory (defaults to BM25_INDEX_DIR)")
+    parser.add_argument("--no-bm25", action="store_true", help="Skip building the BM25 index")
+    args = parser.parse_args()
+
+    stats = run_ingestion(
+        args.paths,
+        backend=args.backend,
+        index_dir=args.index_dir,
+        manifest_path=args.manifest,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        bm25_dir=args.bm25_dir,
+        build_bm25=not args.no_bm25,
+    )
+
+    print("\n========== INGESTION SUMMARY ==========")
+    print(f"Files:           {stats['files']}")
+    print(f"Chunks:          {stats['chunks']}")
+    print(f"Unchanged:       {stats['skipped']}")
+    print(f"Embedded:        {stats['embedded']}")
+    print(f"Deleted:         {stats['deleted']} ({stats['sources_removed']} files removed)")
+    print(f"Elapsed:         {stats['seconds']:.2f}s")
+    print(f"Throughput:      {stats['chunks_per_sec']:.1f} chunks/sec")
+    print(f"Index version:   {stats['index_version']}")
+    if "bm25_version" in stats:
+        print(f"BM25 version:    {stats['bm25_version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+# src/ingest/pipeline.py
+"""
+Ingestion pipeline for the legal corpus.
+
+1. Stream source files (.txt / .md) from the given paths
+2. Chunk them with langchain-text-splitters
+3. Content-hash every chunk; chunks already in the manifest are skipped
+4. Embed new chunks in large batches across a process pool
+5. Bulk-upsert to the configured vector backend (local index or Pinecone)
+6. Rebuild the BM25 index (src/bm25.py) over the same chunks
+
+The manifest maps each source file to the chunk ids it produced, so a
+re-run only embeds changed text and deletes chunks that disappeared,
+including every chunk of a source file deleted from an ingested directory.
+"""
+
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.index_version import DEFAULT_MANIFEST
+
+load_dotenv()
+
+SOURCE_EXTENSIONS = (".txt", ".md")
+
+
+# ------------------------------------------------------------
+# Source streaming + chunking
+# ------------------------------------------------------------
+def iter_source_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield os.path.normpath(path)
+            continue
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.lower().endswith(SOURCE_EXTENSIONS):
+                    yield os.path.normpath(os.path.join(root, name))
+
+
+def chunk_id(text: str):
+    """Content hash → stable id, identical text always maps to the same id."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def iter_chunks(files, splitter):
+    """Yield (source, [chunk dicts]) one file at a time."""
+    for source in files:
+        with open(source, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+
+        chunks = []
+        for i, piece in enumerate(splitter.split_text(text)):
+            chunks.append({
+                "id": chunk_id(piece),
+                "text": piece,
+                "source": source,
+                "chunk": i,
+            })
+        yield source, chunks
+
+
+# ------------------------------------------------------------
+# Embedding (process pool workers)
+# ------------------------------------------------------------
+_worker_embeddings = None
+
+
+def _init_worker():
+    global _worker_embeddings
+    from src.embeddings import load_embedding_model
+    _worker_embeddings = load_embedding_model()
+
+
+def _embed_batch(texts):
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+class InlineEmbedder:
+    """Single-process fallback (workers <= 1) using the shared model."""
+
+    def __init__(self):
+        from src.resources import get_embeddings
+        self.embeddings = get_embeddings()
+
+    def submit(self, texts):
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def close(self):
+        pass
+
+
+class PoolEmbedder:
+    """Each worker process loads its own copy of the model once."""
+
+    def __init__(self, workers: int):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    def submit(self, texts):
+        return self.pool.submit(_embed_batch, texts)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+# ------------------------------------------------------------
+# Vector backends
+# ------------------------------------------------------------
+class LocalIndexWriter:
+    def __init__(self, index_dir: str):
+        from src.local_index import LocalVectorIndex
+
+        self.index_dir = index_dir
+        if os.path.exists(os.path.join(index_dir, "manifest.json")):
+            self.index = LocalVectorIndex.load(index_dir)
+        else:
+            self.index = LocalVectorIndex(index_dir)
+
+    def upsert(self, chunks, vectors):
+        self.index.upsert(
+            [c["id"] for c in chunks],
+            vectors,
+            [{"text": c["text"], "source": c["source"], "chunk": c["chunk"]} for c in chunks]
+        )
+
+    def delete(self, ids):
+        self.index.delete(ids)
+
+    def commit(self):
+        self.index.save()
+        return self.index.version
+
+
+class PineconeWriter:
+    UPSERT_BATCH = 100
+
+    def __init__(self):
+        from src.retriever import init_pinecone
+        self.index = init_pinecone()
+
+    def upsert(self, chunks, vectors):
+        records = [
+            {
+                "id": c["id"],
+                "values": vec.tolist(),
+                "metadata": {"text": c["text"], "source": c["source"], "chunk": c["chunk"]},
+            }
+            for c, vec in zip(chunks, vectors)
+        ]
+        for i in range(0, len(records), self.UPSERT_BATCH):
+            self.index.upsert(vectors=records[i:i + self.UPSERT_BATCH])
+
+    def delete(self, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[i:i + 1000])
+
+    def commit(self):
+        return None
+
+
+class BM25Writer:
+    """
+    Keeps chunk texts by id and rebuilds the BM25 arrays on commit.
+    Independent of the vector backend, so it also serves Pinecone setups.
+    """
+
+    def __init__(self, index_dir: str):
+        from src.bm25 import BM25Index
+
+        self.index_dir = index_dir
+        self.version = 0
+        self.chunks = {}
+        self.dirty = False
+        if os.path.exists(os.path.join(index_dir, "manifest.json")):
+            index = BM25Index.load(index_dir)
+            self.version = index.version
+            self.chunks = dict(zip(index.ids, index.metadatas))
+
+    def __contains__(self, id_):
+        return id_ in self.chunks
+
+    def upsert(self, chunks):
+        for c in chunks:
+            self.chunks[c["id"]] = {"text": c["text"], "source": c["source"], "chunk": c["chunk"]}
+        self.dirty = self.dirty or bool(chunks)
+
+    def delete(self, ids):
+        for id_ in ids:
+            if self.chunks.pop(id_, None) is not None:
+                self.dirty = True
+
+    def commit(self):
+        from src.bm25 import BM25Index
+
+        index = BM25Index.build(list(self.chunks), list(self.chunks.values()), self.index_dir)
+        index.version = self.version
+        index.save()
+        self.version = index.version
+        self.dirty = False
+        return index.version
+
+
+def make_writer(backend: str, index_dir: str = None):
+    if backend == "local":
+        from src.retriever import LOCAL_INDEX_DIR
+        return LocalIndexWriter(index_dir or LOCAL_INDEX_DIR)
+    if backend == "pinecone":
+        return PineconeWriter()
+    raise ValueError(f"Unknown vector backend: {backend}")
+
+
+# ------------------------------------------------------------
+# Manifest (source → chunk ids, plus index version)
+# ------------------------------------------------------------
+def deleted_sources(manifest: dict, paths, seen):
+    """
+    Manifest sources under the ingested `paths` that this run did not see
+    and that no longer exist on disk. Sources outside `paths` are left
+    alone (a partial re-ingest must not drop the rest of the corpus).
+    """
+    roots = [os.path.normpath(p) for p in paths]
+    stale = []
+    for source in manifest["sources"]:
+        if source in seen or os.path.exists(source):
+            continue
+        if any(source == root or source.startswith(root + os.sep) for root in roots):
+            stale.append(source)
+    return stale
+
+
+def load_manifest(path: str):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"version": 0, "sources": {}}
+
+
+def save_manifest(path: str, manifest: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ------------------------------------------------------------
+# Main pipeline
+# ------------------------------------------------------------
+def run_ingestion(
+    paths,
+    backend: str = None,
+    index_dir: str = None,
+    manifest_path: str = None,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    batch_size: int = 256,
+    workers: int = None,
+    bm25_dir: str = None,
+    build_bm25: bool = True,
+):
+    """
+    Ingest every source file under `paths` and return throughput stats.
+    """
+    from src.retriever import VECTOR_BACKEND, BM25_INDEX_DIR
+
+    backend = (backend or VECTOR_BACKEND).lower()
+    manifest_path = manifest_path or DEFAULT_MANIFEST
+    workers = os.cpu_count() if workers is None else workers
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    manifest = load_manifest(manifest_path)
+    known_ids = {cid for ids in manifest["sources"].values() for cid in ids}
+
+    writer = make_writer(backend, index_dir)
+    sparse = BM25Writer(bm25_dir or BM25_INDEX_DIR) if build_bm25 else None
+    embedder = PoolEmbedder(workers) if workers > 1 else InlineEmbedder()
+
+    stats = {"files": 0, "chunks": 0, "skipped": 0, "embedded": 0, "deleted": 0, "sources_removed": 0}
+    seen = set()
+    start = time.perf_counter()
+
+    pending = []       # chunks waiting to fill a batch
+    in_flight = []     # (chunks, future or vectors)
+    max_in_flight = max(2, workers * 2)
+
+    def drain(limit):
+        while len(in_flight) > limit:
+            chunks, result = in_flight.pop(0)
+            vectors = result.result() if hasattr(result, "result") else result
+            writer.upsert(chunks, vectors)
+            stats["embedded"] += len(chunks)
+            elapsed = time.perf_counter() - start
+            print(f"  embedded {stats['embedded']} chunks "
+                  f"({stats['embedded'] / elapsed:.1f} chunks/sec)")
+
+    def flush_batch():
+        batch = pending[:batch_size]
+        del pending[:batch_size]
+        in_flight.append((batch, embedder.submit([c["text"] for c in batch])))
+        drain(max_in_flight)
+
+    try:
+        for source, chunks in iter_chunks(iter_source_files(paths), splitter):
+            stats["files"] += 1
+            stats["chunks"] += len(chunks)
+            seen.add(source)
+
+            new_ids = [c["id"] for c in chunks]
+            old_ids = manifest["sources"].get(source, [])
+
+            # Chunks that vanished from this file and are not used elsewhere
+            removed = set(old_ids) - set(new_ids)
+            manifest["sources"][source] = new_ids
+            if removed:
+                still_used = {cid for ids in manifest["sources"].values() for cid in ids}
+                removed -= still_used
+                if removed:
+                    writer.delete(removed)
+                    if sparse is not None:
+                        sparse.delete(removed)
+                    known_ids -= removed
+                    stats["deleted"] += len(removed)
+
+            for c in chunks:
+                if c["id"] in known_ids:
+                    stats["skipped"] += 1
+                    # Already embedded, but missing from a new/older BM25 index
+                    if sparse is not None and c["id"] not in sparse:
+                        sparse.upsert([c])
+                    continue
+                known_ids.add(c["id"])
+                pending.append(c)
+                if sparse is not None:
+                    sparse.upsert([c])
+
+            while len(pending) >= batch_size:
+                flush_batch()
+
+        while pending:
+            flush_batch()
+        drain(0)
+    finally:
+        embedder.close()
+
+    # Files deleted from disk since the last run: drop them and their chunks
+    for source in deleted_sources(manifest, paths, seen):
+        removed = set(manifest["sources"].pop(source))
+        removed -= {cid for ids in manifest["sources"].values() for cid in ids}
+        if removed:
+            writer.delete(removed)
+            if sparse is not None:
+                sparse.delete(removed)
+            known_ids -= removed
+            stats["deleted"] += len(removed)
+        stats["sources_removed"] += 1
+
+    # Only a real change bumps the index version (and invalidates caches)
+    if stats["embedded"] or stats["deleted"]:
+        version = writer.commit()
+        manifest["version"] = version or manifest.get("version", 0) + 1
+    if sparse is not None and sparse.dirty:
+        stats["bm25_version"] = sparse.commit()
+    save_manifest(manifest_path, manifest)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["chunks_per_sec"] = stats["embedded"] / elapsed if elapsed else 0.0
+    stats["index_version"] = manifest["version"]
+    return stats
@@ -0,0 +1,308 @@
+# src/intent_router.py
+"""
+Single-pass intent router for chat messages.
+
+Every keyword phrase of every intent is compiled into one regex (a prefix
+trie written as nested alternations) with word boundaries, so a message is
+scanned once and "fir" no longer matches "first". Each phrase carries one or more labels:
+- legal          → legal question, retrieve context (RAG)
+- personal       → question or statement about the user (memory)
+- greeting       → small talk
+- document       → drafting verb ("draft", "prepare", ...)
+- first_person   → I / my / me ... (such a message may carry a fact)
+- template:<id>  → one of src/templates
+
+Question form ("what ...", "... ?") is flagged alongside, so memory fact
+extraction and the fast path read everything from one route() call.
+
+An optional embedding tier (INTENT_EMBEDDINGS=1) classifies the messages
+the keywords leave as "other", by cosine similarity to a few example
+sentences per intent.
+"""
+
+import os
+import re
+import asyncio
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from dotenv import load_dotenv
+
+from src.resources import get_or_create
+
+load_dotenv()
+
+INTENT_EMBEDDINGS = os.getenv("INTENT_EMBEDDINGS", "0") == "1"
+INTENT_EMBED_THRESHOLD = float(os.getenv("INTENT_EMBED_THRESHOLD", 0.55))
+
+# Longer "greetings" are treated as real messages
+GREETING_MAX_WORDS = 6
+
+
+# ---------------------------------------------------------
+# Keyword phrases (lowercase)
+# ---------------------------------------------------------
+LEGAL_TERMS = [
+    "dispute", "rights", "law", "lawful", "lawsuit", "lawyer", "legal", "illegal",
+    "illegally", "how to file", "fir", "rti", "tenant", "tenancy", "landlord",
+    "evict", "eviction", "rent agreement", "harassment", "harass", "harassed",
+    "police", "policeman", "court", "magistrate", "advocate", "bail", "arrest",
+    "arrested", "complaint", "dowry", "divorce", "domestic violence", "crpc", "ipc",
+    "section", "consumer", "fraud", "cheating", "wages", "inheritance",
+]
+
+PERSONAL_PHRASES = [
+    "my name", "who am i", "where do i live", "i live", "i am a", "what do i do",
+    "what is my", "what's my", "how old am i", "my age",
+]
+
+GREETING_PHRASES = [
+    "hi", "hii", "hello", "hey", "namaste", "namaskar", "good morning",
+    "good afternoon", "good evening", "good night", "how are you", "thanks",
+    "thank you", "thx", "bye", "goodbye", "see you", "ok", "okay", "great", "cool",
+]
+
+# Words that may pad a greeting without making it a real message
+# ("hi there", "thank you so much")
+GREETING_FILLERS = frozenset(
+    "there all everyone again so very much a lot sir madam ji bro friend".split()
+)
+
+FIRST_PERSON_WORDS = ["i", "i'm", "im", "i've", "i'd", "my", "mine", "me", "myself"]
+
+QUESTION_START_PATTERN = re.compile(
+    r"^\s*(what|how|who|whom|whose|where|when|why|which|can|could|should|would|"
+    r"is|are|am|do|does|did|will|shall|may|tell me|explain)\b",
+    re.IGNORECASE
+)
+
+DOCUMENT_VERBS = ["draft", "generate", "write", "prepare", "create", "make", "fill"]
+
+TEMPLATE_PHRASES = {
+    "fir": ["fir", "first information report"],
+    "rti": ["rti", "rti application", "right to information"],
+    "complaint": ["complaint", "police complaint"],
+    "legal_notice": ["legal notice"],
+    "income_certificate": ["income certificate"],
+    "tenancy_complain": ["tenancy complaint", "tenant complaint", "landlord complaint", "rent complaint"],
+}
+# A phrase match consumes the words inside it ("legal notice" hides "legal"),
+# so template phrases of legal documents carry the legal label themselves
+LEGAL_TEMPLATES = {"fir", "rti", "complaint", "legal_notice", "tenancy_complain"}
+
+
+def _phrase_labels():
+    labels = {}
+
+    def add(phrases, label):
+        for phrase in phrases:
+            labels.setdefault(phrase, set()).add(label)
+
+    add(LEGAL_TERMS, "legal")
+    add(PERSONAL_PHRASES, "personal")
+    add(GREETING_PHRASES, "greeting")
+    add(FIRST_PERSON_WORDS, "first_person")
+    add(DOCUMENT_VERBS, "document")
+    for template, phrases in TEMPLATE_PHRASES.items():
+        add(phrases, f"template:{template}")
+        if template in LEGAL_TEMPLATES:
+            add(phrases, "legal")
+    return {phrase: frozenset(l) for phrase, l in labels.items()}
+
+
+PHRASE_LABELS = _phrase_labels()
+
+# Nouns that also match their plural ("FIRs", "laws"); never the short
+# words, or "i" would match "is" and "hi" would match "his"
+PLURAL_PHRASES = set(LEGAL_TERMS) | {p for phrases in TEMPLATE_PHRASES.values() for p in phrases}
+
+
+def trie_pattern(phrases, plural=()):
+    """
+    Regex alternation factored through a prefix trie: shared prefixes are
+    tried once instead of once per phrase, and the greedy optional tails
+    make the longest phrase win ("first information report" over "fir").
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = phrase in plural  # end of phrase (+ may take an "s")
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if node.get(""):
+            alternatives.append("s")
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+INTENT_PATTERN = re.compile(r"\b(" + trie_pattern(PHRASE_LABELS, PLURAL_PHRASES) + r")\b")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+# ---------------------------------------------------------
+# Result
+# ---------------------------------------------------------
+class Intent(NamedTuple):
+    name: str                     # document / legal / personal / greeting / other
+    legal: bool = False
+    personal: bool = False
+    greeting: bool = False
+    first_person: bool = False
+    question: bool = False
+    template: Optional[str] = None
+    source: str = "keywords"      # or "embeddings"
+
+
+def normalize_message(text: str):
+    return " ".join(text.lower().replace("’", "'").split())
+
+
+def scan_labels(text: str):
+    """Every label hit in one pass over the normalized message."""
+    labels = set()
+    for match in INTENT_PATTERN.finditer(normalize_message(text)):
+        phrase = match.group(1)
+        labels |= PHRASE_LABELS.get(phrase) or PHRASE_LABELS[phrase[:-1]]
+    return labels
+
+
+def is_only_greeting(text: str):
+    """True if nothing but greeting phrases, fillers and punctuation is left."""
+    rest = INTENT_PATTERN.sub(" ", normalize_message(text))
+    return all(word in GREETING_FILLERS for word in WORD_PATTERN.findall(rest))
+
+
+def keyword_intent(text: str):
+    labels = scan_labels(text)
+    template = next((l.split(":", 1)[1] for l in sorted(labels) if l.startswith("template:")), None)
+
+    legal = "legal" in labels
+    personal = "personal" in labels
+    # Personal phrases ("i live", "my name") swallow their own I / my
+    first_person = "first_person" in labels or personal
+    # Only pure small talk counts: "hi, my landlord ..." and "ok, can you
+    # explain more?" are real messages
+    small_talk = labels == {"greeting"} and is_only_greeting(text)
+    # "How are you?" is small talk, not a question to answer
+    question = not small_talk and (
+        text.rstrip().endswith("?") or bool(QUESTION_START_PATTERN.match(text))
+    )
+    greeting = small_talk and not question and len(text.split()) <= GREETING_MAX_WORDS
+
+    if template and "document" in labels:
+        name = "document"
+    elif legal:
+        name = "legal"
+    elif personal:
+        name = "personal"
+    elif greeting:
+        name = "greeting"
+    else:
+        name = "other"
+
+    return Intent(name, legal, personal, greeting, first_person, question, template)
+
+
+# ---------------------------------------------------------
+# Optional embedding tier
+# ---------------------------------------------------------
+INTENT_EXAMPLES = {
+    "legal": [
+        "What can I do if my employer fires me without notice?",
+        "My neighbour has built a wall on my land.",
+        "Someone took my money and refuses to return it.",
+        "Is it allowed to record a phone call without consent?",
+        "My husband beats me and threatens me.",
+        "The shop refuses to replace a faulty product.",
+    ],
+    "personal": [
+        "What do you know about me?",
+        "Do you remember where I work?",
+        "Tell me what I told you earlier about myself.",
+    ],
+    "greeting": [
+        "Nice to meet you",
+        "Have a nice day",
+        "Who are you?",
+    ],
+}
+
+
+class EmbeddingIntentClassifier:
+    """Nearest example sentence by cosine similarity, above a threshold."""
+
+    def __init__(self, embeddings, threshold: float = INTENT_EMBED_THRESHOLD):
+        import numpy as np
+
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.labels = [label for label, examples in INTENT_EXAMPLES.items() for _ in examples]
+        texts = [text for examples in INTENT_EXAMPLES.values() for text in examples]
+        matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        self.matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    def classify(self, text: str):
+        import numpy as np
+
+        embed = getattr(self.embeddings, "embed_query_array", None) or self.embeddings.embed_query
+        vector = np.asarray(embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        scores = self.matrix @ (vector / norm)
+        best = int(np.argmax(scores))
+        return self.labels[best] if scores[best] >= self.threshold else None
+
+
+def get_embedding_classifier():
+    from src.resources import get_embeddings
+    return get_or_create("intent_classifier", lambda: EmbeddingIntentClassifier(get_embeddings()))
+
+
+# ---------------------------------------------------------
+# Public entry point
+# ---------------------------------------------------------
+@lru_cache(maxsize=4096)
+def route(text: str, use_embeddings: bool = INTENT_EMBEDDINGS):
+    """
+    Classify a message. The keyword tier always runs; the embedding tier
+    only sees messages it left as "other" (the query embedding is cached,
+    so retrieval reuses it for free).
+    """
+    intent = keyword_intent(text)
+    if intent.name != "other" or not use_embeddings or len(text.split()) < 3:
+        return intent
+
+    try:
+        label = get_embedding_classifier().classify(text)
+    except Exception as e:
+        print(f"⚠️ Embedding intent tier unavailable: {e}")
+        return intent
+
+    # A first-person message is never dismissed as small talk
+    if label is None or (label == "greeting" and intent.first_person):
+        return intent
+    return intent._replace(
+        name=label,
+        legal=label == "legal",
+        personal=label == "personal",
+        greeting=label == "greeting" and not intent.question,
+        source="embeddings",
+    )
+
+
+async def aroute(text: str):
+    """
+    route() for async callers. A message the embedding tier may see is
+    classified in a worker thread (a query-embedding cache miss would block
+    the event loop); route(text) afterwards is an lru_cache hit.
+    """
+    if INTENT_EMBEDDINGS and len(text.split()) >= 3 and keyword_intent(text).name == "other":
+        return await asyncio.to_thread(route, text)
+    return route(text)
@@ -0,0 +1,314 @@
+# src/local_index.py
+"""
+Local on-disk vector index (offline alternative to Pinecone).
+
+Layout of an index directory:
+- vectors.v<N>.npy     float32 [n, dim], L2-normalized, memory-mapped on load
+- metadata.v<N>.jsonl  one JSON object per row: {"id": ..., "metadata": {...}}
+- manifest.json        {"dim", "count", "version", "text_key", "files"}
+
+Every save writes the data files of the new version next to the old ones
+and then switches manifest.json to them, so a file that a reader still has
+memory-mapped is never replaced (Windows refuses that) and a load always
+sees one consistent version. Files older than the previous version are
+removed on the next save. Indexes written before versioned names
+(vectors.npy / metadata.jsonl, no "files" key) still load.
+
+Search is an exact (flat) cosine similarity scan, which is a single
+matrix-vector product for corpora of this size.
+
+A serving process holds the index through LiveIndex, which re-loads it when
+ingestion writes a new manifest version (no restart needed).
+"""
+
+import os
+import re
+import json
+import asyncio
+import threading
+import numpy as np
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.metrics import span
+from src.index_version import IndexVersionWatcher
+from src.resources import get_or_create
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.jsonl"
+MANIFEST_FILE = "manifest.json"
+# vectors.v3.npy / metadata.v3.jsonl, plus the unversioned legacy names
+DATA_FILE_PATTERN = re.compile(r"^(vectors|metadata)(\.v\d+)?\.(npy|jsonl)(\.tmp)?$")
+
+
+def versioned_name(name: str, version: int):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.v{version}{ext}"
+
+
+def manifest_files(index_dir: str):
+    """Data file names the manifest in `index_dir` points to (empty if none)."""
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    files = manifest.get("files") or {"vectors": VECTORS_FILE, "metadata": METADATA_FILE}
+    return set(files.values())
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    def __init__(self, index_dir: str, text_key: str = "text"):
+        self.index_dir = index_dir
+        self.text_key = text_key
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.ids = []
+        self.metadatas = []
+        self.version = 0
+        self._row_by_id = {}
+
+    # ------------------------------------------------------------
+    # Load / save
+    # ------------------------------------------------------------
+    @classmethod
+    def load(cls, index_dir: str, text_key: str = "text"):
+        """Memory-map the vectors and read the metadata sidecar."""
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Local vector index not found at: {index_dir}")
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        index = cls(index_dir, text_key=manifest.get("text_key", text_key))
+        index.version = manifest.get("version", 0)
+
+        files = manifest.get("files", {})
+        if manifest.get("count", 0):
+            vectors_file = files.get("vectors", VECTORS_FILE)
+            index.vectors = np.load(os.path.join(index_dir, vectors_file), mmap_mode="r")
+
+        metadata_file = files.get("metadata", METADATA_FILE)
+        with open(os.path.join(index_dir, metadata_file), "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                index.ids.append(row["id"])
+                index.metadatas.append(row.get("metadata", {}))
+
+        index._row_by_id = {id_: i for i, id_ in enumerate(index.ids)}
+        return index
+
+    def save(self):
+        """Write the next version's files, then switch the manifest to them."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        previous_files = manifest_files(self.index_dir)
+        # Never reuse a version number that may still be on disk
+        self.version = max(self.version, self._disk_version()) + 1
+
+        files = {
+            "vectors": versioned_name(VECTORS_FILE, self.version),
+            "metadata": versioned_name(METADATA_FILE, self.version),
+        }
+        # Fresh names: no reader has these open yet
+        np.save(os.path.join(self.index_dir, files["vectors"]),
+                np.ascontiguousarray(self.vectors, dtype=np.float32))
+        with open(os.path.join(self.index_dir, files["metadata"]), "w", encoding="utf-8") as f:
+            for id_, meta in zip(self.ids, self.metadatas):
+                f.write(json.dumps({"id": id_, "metadata": meta}) + "\n")
+
+        tmp_manifest = os.path.join(self.index_dir, MANIFEST_FILE + ".tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "count": len(self.ids),
+                "version": self.version,
+                "text_key": self.text_key,
+                "files": files,
+            }, f, indent=2)
+        # The switch: readers see either the old or the new version, whole
+        os.replace(tmp_manifest, os.path.join(self.index_dir, MANIFEST_FILE))
+
+        # Keep the previous version for loads that read the old manifest a
+        # moment ago; anything older goes (a file still mapped on Windows
+        # can't be removed, the next save retries)
+        self._remove_data_files(keep=set(files.values()) | previous_files)
+
+    def _disk_version(self):
+        try:
+            with open(os.path.join(self.index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return json.load(f).get("version", 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _remove_data_files(self, keep):
+        for name in os.listdir(self.index_dir):
+            if name in keep or not DATA_FILE_PATTERN.match(name):
+                continue
+            try:
+                os.remove(os.path.join(self.index_dir, name))
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------
+    @property
+    def dim(self):
+        return int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self._row_by_id
+
+    def upsert(self, ids: List[str], vectors, metadatas: List[dict]):
+        """Insert new rows or overwrite rows with the same id (in memory)."""
+        if not len(ids):
+            return
+        vectors = _normalize(vectors)
+
+        # Copy out of the read-only memory map before modifying
+        if len(self.ids):
+            base = np.array(self.vectors, dtype=np.float32)
+        else:
+            base = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+        new_rows = []
+        for id_, vec, meta in zip(ids, vectors, metadatas):
+            row = self._row_by_id.get(id_)
+            if row is None:
+                self._row_by_id[id_] = len(self.ids) + len(new_rows)
+                new_rows.append(vec)
+                self.ids.append(id_)
+                self.metadatas.append(meta)
+            else:
+                base[row] = vec
+                self.metadatas[row] = meta
+
+        if new_rows:
+            base = np.vstack([base, np.stack(new_rows)])
+        self.vectors = base
+
+    def delete(self, ids: List[str]):
+        drop = {self._row_by_id[i] for i in ids if i in self._row_by_id}
+        if not drop:
+            return
+        keep = [r for r in range(len(self.ids)) if r not in drop]
+        self.vectors = np.array(self.vectors[keep], dtype=np.float32)
+        self.ids = [self.ids[r] for r in keep]
+        self.metadatas = [self.metadatas[r] for r in keep]
+        self._row_by_id = {id_: i for i, id_ in enumerate(self.ids)}
+
+    # ------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------
+    def search(self, query_vector, k: int = 5):
+        """Return [(row, score)] for the top-k rows by cosine similarity."""
+        if not len(self.ids):
+            return []
+
+        query = _normalize(query_vector).reshape(-1)
+        scores = self.vectors @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(r), float(scores[r])) for r in top]
+
+    def to_document(self, row: int, score: float = None):
+        meta = dict(self.metadatas[row])
+        text = meta.pop(self.text_key, "")
+        meta["id"] = self.ids[row]
+        if score is not None:
+            meta["score"] = score
+        return Document(page_content=text, metadata=meta)
+
+
+# ------------------------------------------------------------
+# Live (auto-reloading) index
+# ------------------------------------------------------------
+class LiveIndex:
+    """
+    The loaded index of a directory, swapped for a fresh load when the
+    manifest version on disk changes. current() returns one consistent
+    snapshot: search and to_document must use the same one.
+
+    `loader` defaults to LocalVectorIndex.load; src/bm25.py passes
+    BM25Index.load, whose directory has the same manifest.json/version.
+    """
+
+    def __init__(self, index_dir: str, check_interval: float = 1.0, loader=None,
+                 label: str = "local vector index"):
+        self.index_dir = index_dir
+        self.loader = loader or LocalVectorIndex.load
+        self.label = label
+        self.watcher = IndexVersionWatcher(os.path.join(index_dir, MANIFEST_FILE), check_interval)
+        self.index = self.loader(index_dir)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.index)
+
+    def current(self):
+        index = self.index
+        if self.watcher.version() == index.version:
+            return index
+        with self._lock:
+            if self.watcher.version() != self.index.version:
+                try:
+                    self.index = self.loader(self.index_dir)
+                    print(f"🔄 Reloaded {self.label}: {self.index_dir} "
+                          f"(version {self.index.version}, {len(self.index)} entries)")
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Failed to reload {self.label}: {e}")
+            return self.index
+
+    def version(self):
+        """Version of the loaded index (IndexVersionWatcher interface)."""
+        return self.current().version
+
+
+def get_live_index(index_dir: str):
+    """One shared LiveIndex per directory (retrievers and the retrieval cache)."""
+    return get_or_create(f"local_index:{os.path.abspath(index_dir)}", lambda: LiveIndex(index_dir))
+
+
+class LocalIndexRetriever(BaseRetriever):
+    """LangChain retriever over a LocalVectorIndex or a LiveIndex."""
+
+    index: Any
+    embeddings: Any
+    k: int = 5
+
+    def _snapshot(self):
+        current = getattr(self.index, "current", None)
+        return current() if current else self.index
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        # Prefer the cached float32 array over a Python list when available
+        embed = getattr(self.embeddings, "embed_query_array", None) or self.embeddings.embed_query
+        query_vector = embed(query)
+        index = self._snapshot()
+        with span("vector_search"):
+            hits = index.search(query_vector, self.k)
+        return [index.to_document(row, score) for row, score in hits]
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        # Await the embedding (micro-batched with other requests) instead of
+        # parking a worker thread on it; the scan itself runs off the loop.
+        aembed = getattr(self.embeddings, "aembed_query_array", None) or self.embeddings.aembed_query
+        query_vector = await aembed(query)
+        index = self._snapshot()
+        with span("vector_search"):
+            hits = await asyncio.to_thread(index.search, query_vector, self.k)
+        return [index.to_document(row, score) for row, score in hits]
@@ -114,62 +114,215 @@
 
 # src/memory_chain.py
 
+import os
 import re
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_ollama import ChatOllama
+from dotenv import load_dotenv
+
+from src.resources import get_llm, get_or_create
+from src.metrics import span
+from src.intent_router import route, normalize_message
+
+load_dotenv()
+
+# Run LLM fact extraction on a background worker after the reply is sent
+BACKGROUND_EXTRACTION = os.getenv("MEMORY_BACKGROUND_EXTRACTION", "1") == "1"
+
+
+# -------------------------------------------------------------------
+# Cheap pre-filter: only first-person statements can carry a new fact
+# -------------------------------------------------------------------
+def may_contain_fact(text: str):
+    """
+    True if a message looks like a first-person statement
+    ("my landlord is ...", "I moved to ...").
+    Questions and messages without I/my/me never reach the LLM.
+    Reads the (cached) intent router result, no extra scan.
+    """
+    intent = route(text)
+    return intent.first_person and not intent.question
+
+
+# -------------------------------------------------------------------
+# Known facts → stored directly. Every field's phrasings are alternatives
+# of one regex (one named group each), so a message is scanned once.
+# -------------------------------------------------------------------
+FACT_PHRASES = {
+    "name": [
+        r"my name is ([a-zA-Z ]+)",
+    ],
+    "location": [
+        r"i live in ([a-zA-Z ]+)",
+        r"i am from ([a-zA-Z ]+)",
+    ],
+    "age": [
+        r"i am (\d{1,2}) years old",
+        r"my age is (\d{1,2})"
+    ],
+    "occupation": [
+        r"i work as ([a-zA-Z ]+)",
+        r"i am a ([a-zA-Z ]+)"
+    ],
+    "phone": [
+        r"my phone number is (\d{10})",
+    ],
+    "email": [
+        r"my email is ([^\s@]+@[^\s@]+)"
+    ]
+}
+
+
+def _fact_pattern(phrases):
+    alternatives, group_fields = [], {}
+    for field, patterns in phrases.items():
+        for i, pattern in enumerate(patterns):
+            group = f"{field}_{i}"
+            group_fields[group] = field
+            alternatives.append(pattern.replace("(", f"(?P<{group}>", 1))
+    return re.compile("|".join(alternatives)), group_fields
+
+
+FACT_PATTERN, FACT_GROUP_FIELDS = _fact_pattern(FACT_PHRASES)
+
+
+# Process-wide counters (how many LLM extraction calls were avoided)
+extraction_stats = {
+    "messages": 0,
+    "regex_hits": 0,
+    "llm_skipped": 0,
+    "llm_queued": 0,
+    "llm_inline": 0,
+    "llm_failed": 0,
+}
+# Updated from request threads and the worker thread
+_stats_lock = threading.Lock()
+
+
+def count(stat: str):
+    with _stats_lock:
+        extraction_stats[stat] += 1
+
+
+def extraction_snapshot():
+    with _stats_lock:
+        return dict(extraction_stats)
+
+
+# -------------------------------------------------------------------
+# Background worker shared by every MemoryChatbot in the process
+# -------------------------------------------------------------------
+class FactExtractionWorker:
+    """
+    Single daemon thread draining a queue of (memory, text, version) jobs.
+    Each job runs the LLM extraction and merges the result back into the
+    owning MemoryChatbot with its message version (through memory.live(),
+    so a session evicted in the meantime gets the fact after rehydration).
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="fact-extraction", daemon=True)
+        self.thread.start()
+
+    def submit(self, memory, text: str, version: int):
+        count("llm_queued")
+        self.queue.put((memory, text, version))
+
+    def wait_idle(self):
+        """Block until every queued message has been processed."""
+        self.queue.join()
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def _run(self):
+        while True:
+            memory, text, version = self.queue.get()
+            try:
+                extracted = memory._extract_fact_llm(text)
+                with memory.live() as target:
+                    target._merge_fact(extracted, version)
+            except Exception as e:
+                count("llm_failed")
+                print(f"⚠️ Background fact extraction failed: {e}")
+            finally:
+                self.queue.task_done()
+
+
+def get_fact_worker():
+    return get_or_create("fact_worker", FactExtractionWorker)
 
 
 class MemoryChatbot:
     """
     Hybrid memory:
     - Regex-based extraction for known common facts
-    - LLM-based extraction for all other arbitrary facts
+    - LLM-based extraction for all other arbitrary facts, run in the
+      background after the reply and only for first-person statements
     """
 
-    def __init__(self):
+    def __init__(self, llm=None, background=None):
         self.history = ChatMessageHistory()
         self.memory_store = {}  # fully flexible key-value memory
-        self.llm = ChatOllama(model="llama2", temperature=0)
+        # Fact-extraction client is shared across sessions unless one is given
+        self.llm = llm or get_llm("llama2", temperature=0, max_tokens=None)
+        self.background = BACKGROUND_EXTRACTION if background is None else background
+
+        # Versioning: every user message gets a version number, every fact
+        # remembers the version of the message it came from. Late background
+        # results never overwrite a fact set by a newer message.
+        self.message_version = 0
+        self.fact_versions = {}
+        self._lock = threading.Lock()
+        self._pending_extraction = []
+        # Set by the session store: () -> context manager yielding the live
+        # MemoryChatbot of this conversation (rehydrated if it was evicted)
+        self.live_session = None
 
         # Known patterns → stored directly
-        self.regex_patterns = {
-            "name": [
-                r"my name is ([a-zA-Z ]+)",
-            ],
-            "location": [
-                r"i live in ([a-zA-Z ]]+)",
-                r"i am from ([a-zA-Z ]]+)",
-            ],
-            "age": [
-                r"i am (\d{1,2}) years old",
-                r"my age is (\d{1,2})"
-            ],
-            "occupation": [
-                r"i work as ([a-zA-Z ]+)",
-                r"i am a ([a-zA-Z ]+)"
-            ],
-            "phone": [
-                r"my phone number is (\d{10})",
-            ],
-            "email": [
-                r"my email is ([^\s@]+@[^\s@]+)"
-            ]
-        }
+        self.fact_pattern = FACT_PATTERN
 
 
     # -------------------------------------------------------------------
     # Main interface
     # -------------------------------------------------------------------
-    def add_user_message(self, text: str):
+    def add_user_message(self, text: str, extract: bool = True):
         self.history.add_message(HumanMessage(content=text))
-        self._extract_facts(text)
+        if extract:
+            self._extract_facts(text)
+
+
+    async def aadd_user_message(self, text: str, extract: bool = True):
+        self.history.add_message(HumanMessage(content=text))
+        if extract:
+            await self._aextract_facts(text)
 
 
     def add_assistant_response(self, text: str):
         self.history.add_message(AIMessage(content=text))
 
+        # Reply is out: hand deferred extraction jobs to the worker
+        if self._pending_extraction:
+            worker = get_fact_worker()
+            for msg_text, version in self._pending_extraction:
+                worker.submit(self, msg_text, version)
+            self._pending_extraction = []
+
+
+    @contextmanager
+    def live(self):
+        """The MemoryChatbot late results should go to (self outside a store)."""
+        if self.live_session is None:
+            yield self
+            return
+        with self.live_session() as memory:
+            yield memory
+
 
     def get_fact(self, key: str):
         return self.memory_store.get(key)
@@ -187,38 +340,135 @@ class MemoryChatbot:
         """
         return self.history.messages
 
+    # -------------------------------------------------------------------
+    # Snapshot / restore (used by the session store to spill to disk)
+    # -------------------------------------------------------------------
+    def export_state(self):
+        return {
+            "history": [
+                {"type": m.type, "content": m.content}
+                for m in self.history.messages
+            ],
+            "memory_store": dict(self.memory_store),
+            "fact_versions": dict(self.fact_versions),
+            "message_version": self.message_version,
+        }
+
+    def load_state(self, state: dict):
+        """
+        Restore history and facts verbatim.
+        Messages are appended directly, so no fact extraction is replayed.
+        """
+        self.history.clear()
+        for m in state.get("history", []):
+            if m.get("type") == "human":
+                self.history.add_message(HumanMessage(content=m.get("content", "")))
+            else:
+                self.history.add_message(AIMessage(content=m.get("content", "")))
+
+        self.memory_store = dict(state.get("memory_store", {}))
+        self.fact_versions = dict(state.get("fact_versions", {}))
+        self.message_version = state.get("message_version", 0)
+
     # -------------------------------------------------------------------
     # Extraction logic (Regex first → LLM fallback)
     # -------------------------------------------------------------------
     def _extract_facts(self, text: str):
-        text_lower = text.lower()
+        version = self._next_version()
 
         # 1. Check regex patterns first
-        for field, patterns in self.regex_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text_lower)
-                if match:
-                    value = match.group(1).strip()
-                    self.memory_store[field] = value
-                    return  # stop once matched
-
-        # 2. LLM fallback: detect arbitrary facts
-        extracted = self._extract_fact_llm(text)
+        if self._extract_fact_regex(text, version):
+            return
+
+        # 2. Cheap pre-filter: no first-person statement → no LLM call
+        if not may_contain_fact(text):
+            count("llm_skipped")
+            return
+
+        # 3. LLM fallback: deferred to the background worker, or inline
+        if self.background:
+            self._pending_extraction.append((text, version))
+        else:
+            count("llm_inline")
+            try:
+                self._merge_fact(self._extract_fact_llm(text), version)
+            except Exception as e:
+                count("llm_failed")
+                print(f"⚠️ Fact extraction failed: {e}")
+
+
+    async def _aextract_facts(self, text: str):
+        version = self._next_version()
+
+        if self._extract_fact_regex(text, version):
+            return
+
+        if not may_contain_fact(text):
+            count("llm_skipped")
+            return
+
+        if self.background:
+            self._pending_extraction.append((text, version))
+        else:
+            count("llm_inline")
+            try:
+                self._merge_fact(await self._aextract_fact_llm(text), version)
+            except Exception as e:
+                count("llm_failed")
+                print(f"⚠️ Fact extraction failed: {e}")
+
+
+    def _next_version(self):
+        with self._lock:
+            self.message_version += 1
+            version = self.message_version
+        count("messages")
+        return version
+
+
+    def _extract_fact_regex(self, text: str, version: int):
+        """
+        Store every known fact in one scan of the message. Returns True if
+        a fact was found. All phrasings are first person, so the router's
+        first_person flag skips the scan for everything else.
+        """
+        if not route(text).first_person:
+            return False
+
+        found = False
+        for match in self.fact_pattern.finditer(normalize_message(text)):
+            field = FACT_GROUP_FIELDS[match.lastgroup]
+            self._set_fact(field, match.group(match.lastgroup).strip(), version)
+            found = True
+        if found:
+            count("regex_hits")
+        return found
+
+
+    def _merge_fact(self, extracted, version: int):
         if extracted:
             key = extracted.get("key")
             value = extracted.get("value")
             if key and value:
-                self.memory_store[key] = value
+                self._set_fact(key, value, version)
 
 
-    def _extract_fact_llm(self, message: str):
+    def _set_fact(self, key, value, version: int):
         """
-        Use LLM to extract arbitrary personal facts such as:
-        - my father's name is X
-        - my college is Y
-        - my landlord is Z
+        Copy-on-write update so readers iterating memory_store on another
+        thread never see it change size mid-iteration.
         """
-        prompt = f"""
+        with self._lock:
+            if self.fact_versions.get(key, 0) > version:
+                return  # a newer message already set this fact
+            store = dict(self.memory_store)
+            store[key] = value
+            self.memory_store = store
+            self.fact_versions[key] = version
+
+
+    def _fact_prompt(self, message: str):
+        return f"""
 Extract ONE personal fact from this sentence only if it clearly states a fact.
 
 Return strict JSON:
@@ -234,9 +484,23 @@ Sentence:
 "{message}"
 """
 
-        try:
-            response = self.llm.invoke(prompt).content.strip()
-            data = json.loads(response)
-            return data
-        except:
-            return {}
+
+    def _extract_fact_llm(self, message: str):
+        """
+        Use LLM to extract arbitrary personal facts such as:
+        - my father's name is X
+        - my college is Y
+        - my landlord is Z
+
+        Raises on an LLM or JSON error, so callers can count the failure.
+        """
+        with span("fact_extraction"):
+            response = self.llm.invoke(self._fact_prompt(message)).content.strip()
+        return json.loads(response)
+
+
+    async def _aextract_fact_llm(self, message: str):
+        """Async variant of _extract_fact_llm (does not block the event loop)."""
+        with span("fact_extraction"):
+            response = (await self.llm.ainvoke(self._fact_prompt(message))).content.strip()
+        return json.loads(response)
@@ -0,0 +1,268 @@
+# src/metrics.py
+"""
+Per-stage latency instrumentation for the chat pipeline.
+
+Each stage of a reply (memory update, LLM fact extraction, retrieval,
+embedding, vector search, BM25 search, prompt build, LLM time-to-first-token
+and total) is recorded twice:
+- in a process-wide histogram, exported in Prometheus text format on /metrics
+- in the current request's trace (a contextvar), so the API can return the
+  breakdown of one reply in a Server-Timing header
+
+Work done off the request (background fact extraction) only reaches the
+histograms.
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# Attach Server-Timing to every chat response, not only when the client
+# sends an `X-Debug-Timings` header
+DEBUG_TIMINGS = os.getenv("DEBUG_TIMINGS", "0") == "1"
+
+STAGES = (
+    "generate",
+    "memory_update",
+    "fact_extraction",
+    "retrieval",
+    "embedding",
+    "vector_search",
+    "sparse_search",
+    "prompt_build",
+    "llm_ttft",
+    "llm_total",
+)
+
+# Seconds: sub-millisecond cache hits up to multi-second Ollama replies
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_RATE_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+
+
+# ---------------------------------------------------------
+# Histograms
+# ---------------------------------------------------------
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[slot] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """(cumulative bucket counts incl. +Inf, sum, count)."""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.stage_seconds = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.tokens_per_second = Histogram(TOKEN_RATE_BUCKETS)
+        self._lock = threading.Lock()
+
+    def observe_stage(self, stage: str, seconds: float):
+        histogram = self.stage_seconds.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stage_seconds.setdefault(stage, Histogram(LATENCY_BUCKETS))
+        histogram.observe(seconds)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP legal_aid_stage_seconds Latency of each stage of a chat reply.",
+            "# TYPE legal_aid_stage_seconds histogram",
+        ]
+        for stage, histogram in list(self.stage_seconds.items()):
+            lines += _histogram_lines("legal_aid_stage_seconds", histogram, f'stage="{stage}"')
+
+        lines += [
+            "# HELP legal_aid_llm_tokens_per_second Decode rate of chat replies.",
+            "# TYPE legal_aid_llm_tokens_per_second histogram",
+        ]
+        lines += _histogram_lines("legal_aid_llm_tokens_per_second", self.tokens_per_second)
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, histogram, labels=""):
+    cumulative, total, count = histogram.snapshot()
+    prefix = f"{labels}," if labels else ""
+    lines = [
+        f'{name}_bucket{{{prefix}le="{bound:g}"}} {n}'
+        for bound, n in zip(histogram.buckets, cumulative)
+    ]
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {cumulative[-1]}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {total}")
+    lines.append(f"{name}_count{suffix} {count}")
+    return lines
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def render_prometheus():
+    return _registry.render()
+
+
+# ---------------------------------------------------------
+# Spans (histogram + current request trace)
+# ---------------------------------------------------------
+_trace = contextvars.ContextVar("stage_trace", default=None)
+
+
+def start_trace():
+    """
+    Begin collecting stage timings for the current request.
+    The dict is shared with tasks and threads spawned from this context
+    (asyncio.gather, asyncio.to_thread), so their spans land in it too.
+    """
+    trace = {}
+    _trace.set(trace)
+    return trace
+
+
+def record(stage: str, seconds: float):
+    if not METRICS_ENABLED:
+        return
+    _registry.observe_stage(stage, seconds)
+    trace = _trace.get()
+    if trace is not None:
+        trace[stage] = trace.get(stage, 0.0) + seconds
+
+
+def record_token_rate(tokens_per_second: float):
+    if not METRICS_ENABLED or tokens_per_second <= 0:
+        return
+    _registry.tokens_per_second.observe(tokens_per_second)
+    trace = _trace.get()
+    if trace is not None:
+        trace["tokens_per_sec"] = tokens_per_second
+
+
+@contextmanager
+def span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator form of span() for plain and async functions."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing(trace):
+    """Format a trace as a Server-Timing header value (durations in ms)."""
+    parts = [
+        f"{stage};dur={seconds * 1000:.1f}"
+        for stage, seconds in trace.items()
+        if stage != "tokens_per_sec"
+    ]
+    if "tokens_per_sec" in trace:
+        parts.append(f'llm_tokens_per_sec;desc="{trace["tokens_per_sec"]:.1f}"')
+    return ", ".join(parts)
+
+
+# ---------------------------------------------------------
+# LLM timings
+# ---------------------------------------------------------
+def _ollama_token_rate(metadata):
+    # Ollama reports eval_count tokens generated in eval_duration nanoseconds
+    count, duration = metadata.get("eval_count"), metadata.get("eval_duration")
+    if count and duration:
+        return count / (duration / 1e9)
+    return None
+
+
+def observe_llm_reply(message, elapsed: float):
+    """
+    Record a non-streamed reply: llm_total from wall time, TTFT and
+    tokens/sec from the timings Ollama returns with the message.
+    """
+    record("llm_total", elapsed)
+    metadata = getattr(message, "response_metadata", None) or {}
+    if metadata.get("prompt_eval_duration") is not None:
+        # Model load + prompt processing = time before the first output token
+        ttft_ns = (metadata.get("load_duration") or 0) + metadata["prompt_eval_duration"]
+        record("llm_ttft", ttft_ns / 1e9)
+    rate = _ollama_token_rate(metadata)
+    if rate:
+        record_token_rate(rate)
+
+
+class StreamTimer:
+    """
+    Times one streamed reply: TTFT at the first non-empty chunk,
+    llm_total and tokens/sec at finish().
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.chunks = 0
+        self.metadata = {}
+
+    def chunk(self, chunk):
+        if chunk.content:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+                record("llm_ttft", self.first_token_at - self.start)
+            self.chunks += 1
+        # Ollama sends its own timings on the final chunk
+        metadata = getattr(chunk, "response_metadata", None)
+        if metadata:
+            self.metadata.update(metadata)
+
+    def finish(self):
+        end = time.perf_counter()
+        record("llm_total", end - self.start)
+        rate = _ollama_token_rate(self.metadata)
+        if rate is None and self.chunks > 1 and end > self.first_token_at:
+            rate = (self.chunks - 1) / (end - self.first_token_at)
+        if rate:
+            record_token_rate(rate)
@@ -0,0 +1,135 @@
+# src/resources.py
+"""
+Process-wide registry for heavy, shareable resources.
+
+The embedding model, the vector index handle and the Ollama chat clients are
+expensive to build but stateless between users, so they are created once per
+process and handed out to every chatbot session. Sessions only keep their own
+lightweight state (history, memory_store, document state).
+"""
+
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# How long Ollama keeps a model loaded after each request (Ollama's own
+# default is 5m, after which the next request pays the model load again)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+_lock = threading.RLock()
+_resources = {}
+
+
+# ---------------------------------------------------------
+# Generic get-or-create
+# ---------------------------------------------------------
+def get_or_create(key, factory):
+    """
+    Return the resource registered under `key`, building it with `factory()`
+    on first use. Construction happens under a lock so a burst of new
+    sessions never builds the same resource twice.
+    """
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+
+    with _lock:
+        resource = _resources.get(key)
+        if resource is None:
+            resource = factory()
+            _resources[key] = resource
+        return resource
+
+
+def get_resource(key, default=None):
+    """Return an already-built resource without creating it."""
+    return _resources.get(key, default)
+
+
+def register(key, resource):
+    """Explicitly register (or replace) a shared resource."""
+    with _lock:
+        _resources[key] = resource
+
+
+def clear():
+    """Drop every cached resource (mainly for tests / reloads)."""
+    with _lock:
+        _resources.clear()
+
+
+def loaded_resources():
+    return sorted(_resources.keys())
+
+
+# ---------------------------------------------------------
+# Shared resources
+# ---------------------------------------------------------
+def get_embeddings():
+    from src.embeddings import load_embedding_model
+    return get_or_create("embeddings", load_embedding_model)
+
+
+def get_retriever(top_k: int = 5):
+    from src.retriever import build_retriever, MockRetriever
+
+    def build():
+        try:
+            embeddings = get_embeddings()
+        except Exception as e:
+            # Same degradation build_retriever applies to index failures
+            print(f"⚠️ Failed to load embedding model: {e}")
+            print("⚠️ Using MockRetriever instead.")
+            return MockRetriever()
+        return build_retriever(top_k, embeddings=embeddings)
+
+    return get_or_create(f"retriever:{top_k}", build)
+
+
+def llm_key(model_name, temperature, max_tokens):
+    """Registry key of the shared chat client for one parameter combination."""
+    return f"llm:{model_name}:{temperature}:{max_tokens}"
+
+
+def get_llm(model_name="llama2", temperature=0.2, max_tokens=200):
+    """
+    One ChatOllama client per (model, temperature, max_tokens) combination.
+    ChatOllama holds no conversation state, so it is safe to share.
+    """
+    from langchain_ollama import ChatOllama
+
+    kwargs = {"model": model_name, "temperature": temperature}
+    if OLLAMA_KEEP_ALIVE:
+        kwargs["keep_alive"] = OLLAMA_KEEP_ALIVE
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    key = llm_key(model_name, temperature, max_tokens)
+    return get_or_create(key, lambda: ChatOllama(**kwargs))
+
+
+# ---------------------------------------------------------
+# Process memory
+# ---------------------------------------------------------
+def process_rss_mb():
+    """
+    Current resident set size of this process in MB.
+    Reads /proc on Linux, falls back to peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KB on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return 0.0
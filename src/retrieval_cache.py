@@ -0,0 +1,120 @@
+# src/retrieval_cache.py
+"""
+Shared cache of top-k retrieval results.
+
+Keyed by (normalized query, k, index version). The index version comes from
+the manifest written on every index change (local index manifest.json, or the
+ingestion manifest for Pinecone), so re-ingesting automatically invalidates
+every cached result. With the local backend the version is that of the
+shared LiveIndex the retriever searches, which reloads on the same change.
+In hybrid mode the BM25 index version is part of the key as well.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+from src.embeddings import normalize_query
+from src.resources import get_or_create
+from src.index_version import DEFAULT_MANIFEST, IndexVersionWatcher, VersionSet
+
+load_dotenv()
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "1") == "1"
+
+
+def default_version_watcher():
+    from src.retriever import VECTOR_BACKEND, LOCAL_INDEX_DIR, RETRIEVER_MODE, BM25_INDEX_DIR
+
+    if VECTOR_BACKEND == "local":
+        # Key on the version the retriever actually has loaded (and reload it
+        # on change), not just on what the manifest on disk says
+        from src.local_index import get_live_index
+        try:
+            dense = get_live_index(LOCAL_INDEX_DIR)
+        except FileNotFoundError:
+            dense = IndexVersionWatcher(os.path.join(LOCAL_INDEX_DIR, "manifest.json"))
+    else:
+        dense = IndexVersionWatcher(DEFAULT_MANIFEST)
+
+    if RETRIEVER_MODE != "hybrid":
+        return dense
+
+    # Hybrid results also depend on the BM25 index, which has its own version
+    from src.bm25 import get_live_bm25_index
+    try:
+        sparse = get_live_bm25_index(BM25_INDEX_DIR)
+    except FileNotFoundError:
+        sparse = IndexVersionWatcher(os.path.join(BM25_INDEX_DIR, "manifest.json"))
+    return VersionSet([dense, sparse])
+
+
+class RetrievalCache:
+    def __init__(self, max_entries=None, ttl=None, version_watcher=None):
+        self.max_entries = int(max_entries or os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", 2048))
+        # Safety net for index changes made outside the ingestion pipeline
+        self.ttl = float(ttl or os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", 600))
+        self.version_watcher = version_watcher or default_version_watcher()
+
+        # (query, k) -> (docs, created_at)
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, query: str, k: int):
+        key = (normalize_query(query), k)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, query: str, k: int, docs):
+        key = (normalize_query(query), k)
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (tuple(docs), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "index_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _check_version(self):
+        version = self.version_watcher.version()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+
+def get_retrieval_cache():
+    return get_or_create("retrieval_cache", RetrievalCache)
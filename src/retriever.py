@@ -2,23 +2,30 @@
 """
 Retriever module for LangChain-based Legal Aid System.
 Uses:
-- Pinecone v5/v7 client
-- langchain-pinecone wrapper
+- Pinecone v5/v7 client + langchain-pinecone wrapper (VECTOR_BACKEND=pinecone)
+- Local memory-mapped NumPy index (VECTOR_BACKEND=local), see src/local_index.py
+- Optional BM25 + dense hybrid with RRF fusion (RETRIEVER_MODE=hybrid), see src/bm25.py
 """
 
 import os
 from dotenv import load_dotenv
 
-from pinecone import Pinecone
-from langchain_pinecone import PineconeVectorStore
-
-from src.embeddings import load_embedding_model
+load_dotenv()
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "vector_index")
+# dense | hybrid (dense + BM25, fused with reciprocal-rank fusion)
+RETRIEVER_MODE = os.getenv("RETRIEVER_MODE", "dense").lower()
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "bm25_index")
+# Documents each side contributes to the fusion, per result returned
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "4"))
 
 
 # ---------------------------------------------------------
 # Initialize Pinecone client
 # ---------------------------------------------------------
 def init_pinecone():
+    from pinecone import Pinecone
+
     load_dotenv()
 
     api_key = os.getenv("PINECONE_API_KEY")
@@ -59,18 +66,83 @@ class MockRetriever:
     def invoke(self, query):
         return [MockDocument(page_content="Pinecone is not connected. This is a mock document.")]
 
+    async def ainvoke(self, query):
+        return self.invoke(query)
+
+# ---------------------------------------------------------
+# Local on-disk index
+# ---------------------------------------------------------
+def init_local_index(index_dir: str = None):
+    """Shared LiveIndex: reloads when ingestion bumps the manifest version."""
+    from src.local_index import get_live_index
+
+    index_dir = index_dir or LOCAL_INDEX_DIR
+    index = get_live_index(index_dir)
+    print(f"📦 Loaded local vector index: {index_dir} ({len(index)} vectors)")
+    return index
+
+
+def init_bm25_index(index_dir: str = None):
+    """Shared LiveIndex over the BM25 arrays, reloaded with the dense index."""
+    from src.bm25 import get_live_bm25_index
+
+    index_dir = index_dir or BM25_INDEX_DIR
+    index = get_live_bm25_index(index_dir)
+    print(f"📦 Loaded BM25 index: {index_dir} ({len(index)} chunks, {len(index.current().vocab)} terms)")
+    return index
+
+
 # ---------------------------------------------------------
 # Build LangChain Retriever
 # ---------------------------------------------------------
-def build_retriever(top_k: int = 5):
+def build_retriever(top_k: int = 5, embeddings=None, backend: str = None, mode: str = None):
     """
     Creates a LangChain retriever using:
-    - local embeddings
-    - Pinecone vector index
+    - local embeddings (pass a preloaded model to share it across retrievers)
+    - Pinecone or local vector index (VECTOR_BACKEND / `backend`)
     - cosine similarity search
+    - in hybrid mode (RETRIEVER_MODE / `mode`), BM25 in parallel, fused with RRF
     """
+    backend = (backend or VECTOR_BACKEND).lower()
+    mode = (mode or RETRIEVER_MODE).lower()
+
+    sparse = None
+    if mode == "hybrid":
+        try:
+            sparse = init_bm25_index()
+        except Exception as e:
+            print(f"⚠️ Failed to load BM25 index: {e}")
+            print("⚠️ Falling back to dense-only retrieval.")
+
+    # The dense side fetches deeper so fusion has candidates to re-rank
+    dense_k = top_k * HYBRID_CANDIDATE_FACTOR if sparse is not None else top_k
+
+    def wrap(dense):
+        if sparse is None:
+            return dense
+        from src.bm25 import HybridRetriever
+
+        print("Hybrid retrieval enabled (dense + BM25, RRF).")
+        return HybridRetriever(dense=dense, sparse=sparse, k=top_k, candidates=dense_k)
+
     try:
-        embeddings = load_embedding_model()
+        if embeddings is None:
+            from src.embeddings import load_embedding_model
+            embeddings = load_embedding_model()
+
+        if backend == "local":
+            from src.local_index import LocalIndexRetriever
+
+            retriever = LocalIndexRetriever(
+                index=init_local_index(),
+                embeddings=embeddings,
+                k=dense_k
+            )
+            print("Retriever initialized using local vector index.")
+            return wrap(retriever)
+
+        from langchain_pinecone import PineconeVectorStore
+
         index = init_pinecone()
 
         # langchain-pinecone wrapper
@@ -82,12 +154,12 @@ def build_retriever(top_k: int = 5):
         )
 
         retriever = vectorstore.as_retriever(
-            search_kwargs={"k": top_k}
+            search_kwargs={"k": dense_k}
         )
 
         print("Retriever initialized using langchain-pinecone.")
-        return retriever
+        return wrap(retriever)
     except Exception as e:
-        print(f"⚠️ Failed to initialize Pinecone retriever: {e}")
+        print(f"⚠️ Failed to initialize {backend} retriever: {e}")
         print("⚠️ Using MockRetriever instead.")
         return MockRetriever()
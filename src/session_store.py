@@ -0,0 +1,343 @@
+# src/session_store.py
+"""
+Bounded store for per-user chatbot sessions.
+
+- LRU ordering: the least recently used session is evicted first
+- Idle TTL: sessions untouched for longer than `idle_ttl` seconds are evicted
+- Memory cap: estimated session footprint is kept under `memory_cap_mb`
+
+Evicted sessions are spilled to disk as JSON (history, memory_store,
+document state) and rehydrated on the next access with `load_state`, so no
+LLM fact extraction is replayed. The spill file is deleted once loaded.
+The state is exported under the store lock but written outside it; until
+the write lands, a returning user is rehydrated from the exported state.
+
+Sessions are built and rehydrated outside the store lock (one build per
+user, concurrent callers wait on it), and sessions held through
+acquire() / use() are pinned: eviction skips them until released.
+
+Each session's MemoryChatbot gets a `live_session` hook, so a background
+fact extraction that finishes after an eviction merges into the live
+(rehydrated) session rather than the dropped object.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rough fixed cost of a live session (objects, dicts, message wrappers)
+SESSION_OVERHEAD_BYTES = 16 * 1024
+SPILL_LOCK_STRIPES = 64
+
+
+class SessionStore:
+    def __init__(
+        self,
+        factory,
+        spill_dir=None,
+        max_sessions=None,
+        idle_ttl=None,
+        memory_cap_mb=None
+    ):
+        """
+        factory: zero-argument callable that builds a fresh session object.
+                 Sessions must provide export_state() and load_state(state).
+        """
+        self.factory = factory
+        self.spill_dir = spill_dir or os.getenv("SESSION_SPILL_DIR", "session_cache")
+        self.max_sessions = int(max_sessions or os.getenv("SESSION_MAX_ACTIVE", 500))
+        self.idle_ttl = float(idle_ttl or os.getenv("SESSION_IDLE_TTL_SECONDS", 1800))
+        self.memory_cap_bytes = int(
+            float(memory_cap_mb or os.getenv("SESSION_MEMORY_CAP_MB", 256)) * 1024 * 1024
+        )
+
+        # user_id -> [session, last_access, estimated_bytes, pins]
+        self._sessions = OrderedDict()
+        # user_id -> Future of the session being built / rehydrated
+        self._loading = {}
+        # user_id -> exported state evicted but not yet on disk (or not yet
+        # known to be); the dict identity tells a write whether it is current
+        self._spilled = {}
+        # Serialize each user's spill file write/read/remove (striped by user)
+        self._file_locks = [threading.Lock() for _ in range(SPILL_LOCK_STRIPES)]
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+        self.counters = {
+            "created": 0,
+            "rehydrated": 0,
+            "evicted_lru": 0,
+            "evicted_idle": 0,
+            "evicted_memory": 0,
+        }
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    # -----------------------------------------------------
+    # Public interface
+    # -----------------------------------------------------
+    def get(self, user_id: str):
+        """Return the live session for `user_id`, rehydrating or creating it (unpinned)."""
+        return self._get(user_id, pin=False)
+
+    def acquire(self, user_id: str):
+        """Like get(), but pin the session until release(user_id)."""
+        return self._get(user_id, pin=True)
+
+    def release(self, user_id: str):
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is not None and entry[3] > 0:
+                entry[3] -= 1
+
+    @contextmanager
+    def use(self, user_id: str):
+        """Pinned session for the duration of a `with` block."""
+        session = self.acquire(user_id)
+        try:
+            yield session
+        finally:
+            self.release(user_id)
+
+    @contextmanager
+    def _use_memory(self, user_id):
+        with self.use(user_id) as session:
+            yield session.memory
+
+    def _get(self, user_id, pin):
+        while True:
+            spills = []
+            with self._lock:
+                now = time.monotonic()
+                spills = self._evict_idle(now)
+
+                entry = self._sessions.get(user_id)
+                if entry is not None:
+                    self._sessions.move_to_end(user_id)
+                    entry[1] = now
+                    entry[3] += pin
+                    self._resize(entry, self._estimate_bytes(entry[0]))
+                    return entry[0]
+
+                future = self._loading.get(user_id)
+                owner = future is None
+                if owner:
+                    future = self._loading[user_id] = Future()
+                    # Evicted moments ago: its file may not be written yet
+                    pending_state = self._spilled.pop(user_id, None)
+
+            self._write_spills(spills)
+
+            if not owner:
+                # Another request is building this session; then look it up again
+                future.result()
+                continue
+
+            try:
+                session, rehydrated = self._build(user_id, pending_state)
+            except BaseException as e:
+                with self._lock:
+                    self._loading.pop(user_id, None)
+                future.set_exception(e)
+                raise
+
+            with self._lock:
+                self._loading.pop(user_id, None)
+                self.counters["rehydrated" if rehydrated else "created"] += 1
+                entry = [session, time.monotonic(), 0, int(pin)]
+                self._sessions[user_id] = entry
+                self._resize(entry, self._estimate_bytes(session))
+                spills = self._enforce_limits(keep=user_id)
+            future.set_result(None)
+            self._write_spills(spills)
+            return session
+
+    def _build(self, user_id, state=None):
+        """Fresh session, with spilled state loaded into it if there is any."""
+        session = self.factory()
+        session.memory.live_session = lambda: self._use_memory(user_id)
+        with self._file_lock(user_id):
+            if state is None:
+                state = self._load_spilled(user_id)
+            if state is None:
+                return session, False
+            session.load_state(state)
+            # The live session is now the source of truth; a stale file must
+            # not be rehydrated again after a later crash or eviction race
+            self._remove_spilled(user_id)
+        return session, True
+
+    def __contains__(self, user_id):
+        return user_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def evict(self, user_id: str):
+        """Spill a session to disk and drop it from memory (not if pinned)."""
+        with self._lock:
+            spill = self._detach(user_id)
+        if spill is None:
+            return False
+        self._write_spills([spill])
+        return True
+
+    def flush(self):
+        """Spill every live session to disk (e.g. on shutdown)."""
+        with self._lock:
+            states = [(user_id, entry[0].export_state()) for user_id, entry in self._sessions.items()]
+        for user_id, state in states:
+            with self._file_lock(user_id):
+                self._spill(user_id, state)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "estimated_mb": round(self._total_bytes / (1024 * 1024), 3),
+                "max_sessions": self.max_sessions,
+                "idle_ttl_seconds": self.idle_ttl,
+                "memory_cap_mb": self.memory_cap_bytes / (1024 * 1024),
+                "pinned": sum(1 for entry in self._sessions.values() if entry[3] > 0),
+                **self.counters,
+            }
+
+    # -----------------------------------------------------
+    # Eviction
+    # -----------------------------------------------------
+    # The _evict* helpers run under the store lock and only detach sessions;
+    # callers pass the returned spills to _write_spills once it is released.
+    def _detach(self, user_id):
+        """Drop an unpinned session from memory; returns (user_id, state) or None."""
+        entry = self._sessions.get(user_id)
+        if entry is None or entry[3] > 0:
+            return None
+        del self._sessions[user_id]
+        self._total_bytes -= entry[2]
+        state = entry[0].export_state()
+        self._spilled[user_id] = state
+        return user_id, state
+
+    def _evict_idle(self, now):
+        spills = []
+        # OrderedDict is in access order, so idle sessions sit at the front
+        for user_id, entry in list(self._sessions.items()):
+            if now - entry[1] < self.idle_ttl:
+                break
+            spill = self._detach(user_id)
+            if spill is not None:
+                spills.append(spill)
+                self.counters["evicted_idle"] += 1
+        return spills
+
+    def _enforce_limits(self, keep=None):
+        spills = []
+        while len(self._sessions) > self.max_sessions:
+            spill = self._evict_oldest(keep)
+            if spill is None:
+                break
+            spills.append(spill)
+            self.counters["evicted_lru"] += 1
+
+        while self._total_bytes > self.memory_cap_bytes and len(self._sessions) > 1:
+            spill = self._evict_oldest(keep)
+            if spill is None:
+                break
+            spills.append(spill)
+            self.counters["evicted_memory"] += 1
+        return spills
+
+    def _evict_oldest(self, keep):
+        for user_id, entry in self._sessions.items():
+            if user_id != keep and entry[3] == 0:
+                return self._detach(user_id)
+        return None
+
+    # -----------------------------------------------------
+    # Size estimation
+    # -----------------------------------------------------
+    def _estimate_bytes(self, session):
+        """
+        Cheap footprint estimate: message text + facts + a fixed overhead.
+        Refreshed every time the session is accessed.
+        """
+        memory = session.memory
+        size = SESSION_OVERHEAD_BYTES
+        for m in memory.history.messages:
+            size += len(m.content) + 200
+        for k, v in memory.memory_store.items():
+            size += len(str(k)) + len(str(v)) + 100
+        return size
+
+    def _resize(self, entry, new_size):
+        self._total_bytes += new_size - entry[2]
+        entry[2] = new_size
+
+    # -----------------------------------------------------
+    # Disk spill
+    # -----------------------------------------------------
+    def _spill_path(self, user_id):
+        # user ids are emails, hash them into safe file names
+        name = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.json")
+
+    def _file_lock(self, user_id):
+        # Never taken while holding the store lock
+        return self._file_locks[hash(user_id) % SPILL_LOCK_STRIPES]
+
+    def _write_spills(self, spills):
+        """Write detached states to disk, outside the store lock."""
+        for user_id, state in spills:
+            with self._file_lock(user_id):
+                with self._lock:
+                    # Already rehydrated from memory, or evicted again since
+                    if self._spilled.get(user_id) is not state:
+                        continue
+                if not self._spill(user_id, state):
+                    continue  # keep it in memory rather than lose it
+                with self._lock:
+                    if self._spilled.get(user_id) is state:
+                        del self._spilled[user_id]
+
+    def _spill(self, user_id, state):
+        path = self._spill_path(user_id)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"user_id": user_id, "state": state}, f)
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Failed to spill session for {user_id}: {e}")
+            return False
+
+    def _load_spilled(self, user_id):
+        path = self._spill_path(user_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Failed to read spilled session for {user_id}: {e}")
+            return None
+
+        if data.get("user_id") != user_id:
+            return None
+        return data.get("state")
+
+    def _remove_spilled(self, user_id):
+        try:
+            os.remove(self._spill_path(user_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Failed to remove spilled session for {user_id}: {e}")
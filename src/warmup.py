@@ -0,0 +1,124 @@
+# src/warmup.py
+"""
+Startup warm-up.
+
+Loads everything the first request would otherwise pay for: the embedding
+model (plus one dummy encode), the vector store connection, the chains and
+their ChatOllama clients, and a one-token prompt per Ollama model so the
+weights are resident (kept alive via OLLAMA_KEEP_ALIVE). Readiness flips only
+once every step has run; each step's duration is recorded in warmup_state.
+"""
+
+import os
+import time
+import threading
+from dotenv import load_dotenv
+
+from src.resources import get_embeddings, get_retriever, get_resource, loaded_resources
+
+load_dotenv()
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+warmup_state = {
+    "status": "pending",   # pending -> running -> ready | degraded (| skipped)
+    "started_at": None,
+    "finished_at": None,
+    "total_ms": None,
+    "steps": {},           # step name -> duration in ms
+    "errors": {},          # step name -> error message
+}
+_ready = threading.Event()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def mark_ready(status="skipped"):
+    """Flip readiness without warming up (WARMUP_ON_STARTUP=0)."""
+    warmup_state["status"] = status
+    _ready.set()
+
+
+# ---------------------------------------------------------
+# Steps
+# ---------------------------------------------------------
+def warm_embeddings():
+    embeddings = get_embeddings()
+    # embed_documents bypasses the query cache, so this really runs the model
+    embeddings.embed_documents(["warm up"])
+
+
+def warm_vector_store():
+    # Opens the Pinecone connection / maps the local index and runs one query
+    get_retriever(5).invoke("tenant rights")
+
+
+def warm_chains():
+    # Building one chatbot creates every shared ChatOllama client it uses
+    from src.combined_chain import CombinedLegalChatbot
+    CombinedLegalChatbot()
+
+
+def warm_document_chain():
+    from src.document_chain import get_document_chain
+    get_document_chain()
+
+
+def warm_ollama():
+    """One-token prompt per distinct Ollama model so its weights get loaded."""
+    pinged = set()
+    for key in loaded_resources():
+        if not key.startswith("llm:"):
+            continue
+        llm = get_resource(key)
+        if llm is None or llm.model in pinged:
+            continue
+        llm.invoke("Reply with OK.", options={"num_predict": 1})
+        pinged.add(llm.model)
+
+
+DEFAULT_STEPS = [
+    ("embeddings", warm_embeddings),
+    ("vector_store", warm_vector_store),
+    ("chains", warm_chains),
+    ("document_chain", warm_document_chain),
+    ("ollama", warm_ollama),
+]
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def run_warmup(steps=None):
+    """
+    Run every step in order, timing each. A failing step is recorded and the
+    rest still run (the app then serves in a degraded state, exactly as it
+    would have on first request); readiness flips at the end either way.
+    """
+    warmup_state["status"] = "running"
+    warmup_state["started_at"] = time.time()
+    start = time.perf_counter()
+
+    for name, step in steps or DEFAULT_STEPS:
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            warmup_state["errors"][name] = str(e)
+            print(f"⚠️ Warm-up step '{name}' failed: {e}")
+        warmup_state["steps"][name] = round((time.perf_counter() - step_start) * 1000, 1)
+
+    warmup_state["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    warmup_state["finished_at"] = time.time()
+    warmup_state["status"] = "degraded" if warmup_state["errors"] else "ready"
+    print(f"🔥 Warm-up {warmup_state['status']} in {warmup_state['total_ms']:.0f} ms: {warmup_state['steps']}")
+    _ready.set()
+    return warmup_state
+
+
+def start_warmup_thread(steps=None):
+    thread = threading.Thread(target=run_warmup, args=(steps,), name="warmup", daemon=True)
+    thread.start()
+    return thread
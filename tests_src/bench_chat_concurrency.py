@@ -0,0 +1,130 @@
+# tests_src/bench_chat_concurrency.py
+# Load test for the /chat endpoint: p50/p99 latency vs. number of concurrent users.
+#
+# Usage (server must be running, e.g. `uvicorn app.api_server:app`):
+#   python tests_src/bench_chat_concurrency.py --label after --output after.json
+#
+# To compare with the old synchronous handler, check out the previous revision,
+# run the same command with `--label before --output before.json`, then:
+#   python tests_src/bench_chat_concurrency.py --compare before.json after.json
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+QUERIES = [
+    "How to file an FIR for theft?",
+    "What are my rights as a tenant?",
+    "My name is Ravi",
+    "Is police harassment illegal?",
+    "How do I file an RTI application?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def one_client(base_url, client_id, requests_per_client):
+    latencies = []
+    errors = 0
+    session = requests.Session()
+    for i in range(requests_per_client):
+        payload = {
+            "user_query": QUERIES[i % len(QUERIES)],
+            "user_id": f"loadtest_user_{client_id}",
+        }
+        start = time.perf_counter()
+        try:
+            resp = session.post(f"{base_url}/chat", json=payload, timeout=300)
+            if resp.status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run_level(base_url, concurrency, requests_per_client):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda c: one_client(base_url, c, requests_per_client),
+            range(concurrency)
+        ))
+    wall = time.perf_counter() - start
+
+    latencies = [l for lats, _ in results for l in lats]
+    errors = sum(e for _, e in results)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+        "mean_s": statistics.mean(latencies),
+        "throughput_rps": len(latencies) / wall,
+    }
+
+
+def print_table(label, rows):
+    print(f"\n=== {label} ===")
+    print(f"{'users':>6} {'reqs':>6} {'err':>4} {'p50 (s)':>9} {'p99 (s)':>9} {'req/s':>8}")
+    for r in rows:
+        print(f"{r['concurrency']:>6} {r['requests']:>6} {r['errors']:>4} "
+              f"{r['p50_s']:>9.3f} {r['p99_s']:>9.3f} {r['throughput_rps']:>8.2f}")
+
+
+def compare(before_path, after_path):
+    before = json.load(open(before_path))
+    after = json.load(open(after_path))
+    after_rows = {r["concurrency"]: r for r in after["results"]}
+
+    print(f"\n{'users':>6} {'p50 before':>11} {'p50 after':>10} {'p99 before':>11} {'p99 after':>10}")
+    for b in before["results"]:
+        a = after_rows.get(b["concurrency"])
+        if not a:
+            continue
+        print(f"{b['concurrency']:>6} {b['p50_s']:>11.3f} {a['p50_s']:>10.3f} "
+              f"{b['p99_s']:>11.3f} {a['p99_s']:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--levels", default="1,4,16,32")
+    parser.add_argument("--requests-per-client", type=int, default=5)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    rows = []
+    for level in [int(x) for x in args.levels.split(",")]:
+        print(f"Running {level} concurrent users...")
+        rows.append(run_level(args.base_url, level, args.requests_per_client))
+
+    print_table(args.label, rows)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "results": rows}, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    print("Make sure 'uvicorn app.api_server:app' is running!")
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# tests_src/bench_embedding_backends.py
+# Load time, resident memory and query latency of each embedding backend
+# (EMBEDDING_BACKEND=torch | int8 | onnx). Every backend runs in a fresh
+# subprocess so RSS numbers are not polluted by the previous one.
+#
+# Usage:
+#   python tests_src/bench_embedding_backends.py
+#   python tests_src/bench_embedding_backends.py --backends torch int8 --queries 500
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+QUERY = "My landlord is asking me to vacate the house without giving any notice, what can I do?"
+
+
+def measure(backend, queries, batch):
+    from src.resources import process_rss_mb
+    from src.embeddings import load_sentence_transformer, MODEL_PATH, DEFAULT_HF_MODEL
+
+    model_path = MODEL_PATH if MODEL_PATH and os.path.exists(MODEL_PATH) else DEFAULT_HF_MODEL
+    rss_before = process_rss_mb()
+    start = time.perf_counter()
+    model = load_sentence_transformer(model_path, backend)
+    model.encode("warm up", show_progress_bar=False)
+    load_s = time.perf_counter() - start
+
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        model.encode(f"{QUERY} ({i})", show_progress_bar=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    texts = [f"{QUERY} ({i})" for i in range(batch)]
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch, show_progress_bar=False)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "load_s": load_s,
+        "rss_mb": process_rss_mb(),
+        "model_rss_mb": process_rss_mb() - rss_before,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "batch_per_s": batch / batch_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.queries, args.batch)))
+        return
+
+    print(f"{'backend':<8} {'load s':>7} {'RSS MB':>8} {'model MB':>9} {'p50 ms':>7} {'p95 ms':>7} {'batch emb/s':>12}")
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend,
+             "--queries", str(args.queries), "--batch", str(args.batch)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"{backend:<8} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:<8} {r['load_s']:>7.2f} {r['rss_mb']:>8.0f} {r['model_rss_mb']:>9.0f} "
+              f"{r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['batch_per_s']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# tests_src/bench_embedding_batching.py
+# Query embeddings/sec with N concurrent clients: one model.encode per query
+# (old behaviour) vs the shared EmbeddingMicroBatcher.
+# Every query is unique, so the query-embedding cache never hides the cost.
+#
+# Usage:
+#   python tests_src/bench_embedding_batching.py
+#   python tests_src/bench_embedding_batching.py --clients 1 8 32 --seconds 5 --wait-ms 5
+
+import os
+import sys
+import time
+import argparse
+import threading
+import itertools
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from sentence_transformers import SentenceTransformer
+from src.embeddings import EmbeddingMicroBatcher, MODEL_PATH, DEFAULT_HF_MODEL
+
+QUERIES = [
+    "What are my rights if my landlord refuses to return the deposit",
+    "How do I file a complaint in consumer court",
+    "Can my employer withhold salary after resignation",
+    "What is the punishment for cheque bounce",
+    "How to apply for free legal aid",
+]
+
+
+def run(embed_fn, clients, seconds):
+    counter = itertools.count()
+    stop = threading.Event()
+    done = [0] * clients
+    latencies = [[] for _ in range(clients)]
+
+    def client(i):
+        while not stop.is_set():
+            text = f"{QUERIES[i % len(QUERIES)]} #{next(counter)}"
+            start = time.perf_counter()
+            embed_fn(text)
+            latencies[i].append(time.perf_counter() - start)
+            done[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    all_lat = sorted(l for per_client in latencies for l in per_client)
+    p50 = all_lat[len(all_lat) // 2] * 1000 if all_lat else 0.0
+    return sum(done) / elapsed, p50
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model_path = MODEL_PATH if MODEL_PATH and os.path.exists(MODEL_PATH) else DEFAULT_HF_MODEL
+    print(f"Model: {model_path}")
+    model = SentenceTransformer(model_path)
+    model.encode("warm up", show_progress_bar=False)
+
+    batcher = EmbeddingMicroBatcher(
+        lambda texts: model.encode(texts, batch_size=len(texts), show_progress_bar=False),
+        max_batch=args.max_batch, max_wait_ms=args.wait_ms,
+    )
+
+    print(f"\n{'clients':>7} {'per-query emb/s':>16} {'p50 ms':>8} {'batched emb/s':>14} {'p50 ms':>8} {'speedup':>8}")
+    for clients in args.clients:
+        single_rate, single_p50 = run(lambda t: model.encode(t, show_progress_bar=False), clients, args.seconds)
+        batched_rate, batched_p50 = run(batcher.embed, clients, args.seconds)
+        print(f"{clients:>7} {single_rate:>16.1f} {single_p50:>8.1f} "
+              f"{batched_rate:>14.1f} {batched_p50:>8.1f} {batched_rate / single_rate:>7.2f}x")
+
+    print(f"\nBatcher: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
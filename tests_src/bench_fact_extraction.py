@@ -0,0 +1,65 @@
+# tests_src/bench_fact_extraction.py
+# Replays a chat log through MemoryChatbot's extraction path and reports how
+# many LLM fact-extraction calls the first-person pre-filter avoids.
+#
+# Usage:
+#   python tests_src/bench_fact_extraction.py                 # replay chat_history.db
+#   python tests_src/bench_fact_extraction.py --log chat.txt  # one user message per line
+
+import os
+import sys
+import sqlite3
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.memory_chain import MemoryChatbot, may_contain_fact
+
+
+def load_messages(db_path, log_path):
+    if log_path:
+        with open(log_path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT content FROM messages WHERE type = 'human' ORDER BY id"
+    ).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join(ROOT, "chat_history.db"))
+    parser.add_argument("--log")
+    args = parser.parse_args()
+
+    messages = load_messages(args.db, args.log)
+    bot = MemoryChatbot(background=True)
+
+    regex_hits = 0
+    llm_before = 0  # old behaviour: every regex miss went to the LLM
+    llm_after = 0   # new behaviour: only first-person statements do
+
+    for text in messages:
+        if bot._extract_fact_regex(text, version=0):
+            regex_hits += 1
+            continue
+        llm_before += 1
+        if may_contain_fact(text):
+            llm_after += 1
+
+    avoided = llm_before - llm_after
+    print(f"Messages replayed:          {len(messages)}")
+    print(f"Regex hits:                 {regex_hits}")
+    print(f"LLM calls (before):         {llm_before}")
+    print(f"LLM calls (after):          {llm_after}")
+    if llm_before:
+        print(f"LLM calls avoided:          {avoided} ({avoided / llm_before:.0%})")
+    print("Remaining calls now run in the background, after the reply is sent.")
+
+
+if __name__ == "__main__":
+    main()
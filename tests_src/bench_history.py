@@ -0,0 +1,114 @@
+# tests_src/bench_history.py
+# Throughput of HistoryManager under concurrent writers and readers.
+# Runs against a throwaway database, never the real chat_history.db.
+#
+# Usage:
+#   python tests_src/bench_history.py --writers 8 --readers 8 --seconds 5
+#   python tests_src/bench_history.py --incremental   # grow one session per writer
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.history_manager import HistoryManager
+
+
+def make_messages(n):
+    msgs = []
+    for i in range(n):
+        msgs.append({
+            "type": "human" if i % 2 == 0 else "ai",
+            "content": f"Message {i}: what are my rights as a tenant in Mysuru?",
+        })
+    return msgs
+
+
+def writer(hm, user_id, messages, stop, counts, written):
+    written.append(user_id)
+    while not stop.is_set():
+        hm.save_session(user_id, messages)
+        counts["saves"] += 1
+        counts["messages"] += len(messages)
+
+
+def incremental_writer(hm, user_id, messages, stop, counts, written):
+    """One growing conversation per writer, saved after every turn (2 messages)."""
+    written.append(user_id)
+    history = []
+    session_id = None
+    while not stop.is_set():
+        history.extend(messages[:2])
+        session_id = hm.save_session(user_id, history, session_id=session_id)
+        counts["saves"] += 1
+        counts["messages"] += 2
+
+
+def reader(hm, written, stop, counts):
+    while not stop.is_set():
+        if not written:
+            continue
+        sessions = hm.get_recent_sessions(random.choice(written), limit=3)
+        counts["reads"] += 1
+        if sessions:
+            hm.get_session_messages(sessions[0]["session_id"])
+            counts["reads"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=10, help="messages per saved session")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--incremental", action="store_true",
+                        help="append to a growing session instead of saving whole sessions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hm = HistoryManager(db_path=os.path.join(tmp, "bench_history.db"))
+        users = [f"bench_user_{i}" for i in range(args.writers)]
+        messages = make_messages(args.messages)
+
+        written = []
+        stop = threading.Event()
+        write_counts = [{"saves": 0, "messages": 0} for _ in range(args.writers)]
+        write_fn = incremental_writer if args.incremental else writer
+        read_counts = [{"reads": 0} for _ in range(args.readers)]
+
+        threads = [
+            threading.Thread(target=write_fn, args=(hm, users[i], messages, stop, write_counts[i], written))
+            for i in range(args.writers)
+        ] + [
+            threading.Thread(target=reader, args=(hm, written, stop, read_counts[i]))
+            for i in range(args.readers)
+        ]
+
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        hm.close()
+
+    saves = sum(c["saves"] for c in write_counts)
+    written_msgs = sum(c["messages"] for c in write_counts)
+    reads = sum(c["reads"] for c in read_counts)
+    print(f"Writers: {args.writers}  Readers: {args.readers}  "
+          f"Messages/session: {'incremental' if args.incremental else args.messages}  Duration: {elapsed:.1f}s")
+    print(f"Saves/sec:    {saves / elapsed:.1f}")
+    print(f"Messages/sec: {written_msgs / elapsed:.1f}")
+    print(f"Reads/sec:    {reads / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# tests_src/bench_history_indexes.py
+# Query latency on a large synthetic chat_history database, before and after
+# HistoryManager's migrations add the composite indexes.
+#
+# Usage:
+#   python tests_src/bench_history_indexes.py                       # 1M messages
+#   python tests_src/bench_history_indexes.py --messages 200000
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.history_manager import HistoryManager, MIGRATIONS
+
+
+def build_unindexed_db(path, users, sessions_per_user, messages_per_session):
+    """Schema v1 only (what pre-migration databases look like) + bulk data."""
+    conn = sqlite3.connect(path)
+    for sql in MIGRATIONS[0][1]:
+        conn.execute(sql)
+    conn.execute("PRAGMA user_version = 1")
+
+    session_rows = []
+    message_rows = []
+    for u in range(users):
+        for s in range(sessions_per_user):
+            session_id = f"user{u}_{1700000000 + s}"
+            ts = f"2025-01-{1 + s % 28:02d} {s % 24:02d}:00:00"
+            session_rows.append((session_id, f"user{u}", ts, "preview"))
+            for m in range(messages_per_session):
+                message_rows.append((session_id, "human" if m % 2 == 0 else "ai", f"message {m} about tenancy rights"))
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO sessions (session_id, user_id, timestamp, preview) VALUES (?, ?, ?, ?)",
+            session_rows
+        )
+        conn.executemany(
+            "INSERT INTO messages (session_id, type, content) VALUES (?, ?, ?)",
+            message_rows
+        )
+    conn.close()
+    return [r[0] for r in session_rows], [f"user{u}" for u in range(users)]
+
+
+def time_queries(hm, session_ids, user_ids, samples):
+    random.seed(0)
+    start = time.perf_counter()
+    for _ in range(samples):
+        hm.get_recent_sessions(random.choice(user_ids), limit=3)
+    sessions_ms = (time.perf_counter() - start) / samples * 1000
+
+    start = time.perf_counter()
+    for _ in range(samples):
+        hm.get_session_messages(random.choice(session_ids))
+    messages_ms = (time.perf_counter() - start) / samples * 1000
+    return sessions_ms, messages_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--sessions-per-user", type=int, default=10)
+    parser.add_argument("--messages-per-session", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    users = max(1, args.messages // (args.sessions_per_user * args.messages_per_session))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_indexes.db")
+
+        print(f"Building synthetic DB: {users} users, "
+              f"{users * args.sessions_per_user} sessions, "
+              f"{users * args.sessions_per_user * args.messages_per_session} messages...")
+        start = time.perf_counter()
+        session_ids, user_ids = build_unindexed_db(
+            path, users, args.sessions_per_user, args.messages_per_session
+        )
+        print(f"  built in {time.perf_counter() - start:.1f}s")
+
+        before = HistoryManager(db_path=path, migrate=False)
+        sessions_before, messages_before = time_queries(before, session_ids, user_ids, args.samples)
+        before.close()
+
+        start = time.perf_counter()
+        hm = HistoryManager(db_path=path)
+        migrate_s = time.perf_counter() - start
+        sessions_after, messages_after = time_queries(hm, session_ids, user_ids, args.samples)
+        hm.close()
+
+    print(f"\nMigration to v{MIGRATIONS[-1][0]} took {migrate_s:.1f}s\n")
+    print(f"{'query':<28} {'before (ms)':>12} {'after (ms)':>11}")
+    print(f"{'get_recent_sessions':<28} {sessions_before:>12.3f} {sessions_after:>11.3f}")
+    print(f"{'get_session_messages':<28} {messages_before:>12.3f} {messages_after:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# tests_src/bench_history_search.py
+# Latency of HistoryManager.search_messages (SQLite FTS5) on a large
+# synthetic history, with one heavy user holding a big share of the rows.
+#
+# Usage:
+#   python tests_src/bench_history_search.py                     # 1M messages
+#   python tests_src/bench_history_search.py --messages 200000
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.history_manager import HistoryManager
+
+TOPICS = [
+    "my landlord served an eviction notice without any reason",
+    "how do I file for divorce and claim maintenance",
+    "the employer has not paid my salary for three months",
+    "police refused to register my FIR about the theft",
+    "can my neighbour build a wall on the shared property line",
+    "consumer court complaint about a defective refrigerator",
+    "what is the procedure to get a rental agreement registered",
+    "domestic violence protection order and interim relief",
+]
+
+QUERIES = ["eviction notice", "salary", "consumer complaint", "protection order", "rent", "divorce maintenance"]
+
+
+def populate(hm, users, messages_per_session, total, heavy_share):
+    random.seed(0)
+    heavy = users[0]
+    written = 0
+    while written < total:
+        user = heavy if random.random() < heavy_share else random.choice(users[1:])
+        messages = [
+            {"type": "human" if i % 2 == 0 else "ai",
+             "content": f"{random.choice(TOPICS)} (case {written + i})"}
+            for i in range(messages_per_session)
+        ]
+        hm.save_session(user, messages)
+        written += messages_per_session
+    return heavy
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--messages-per-session", type=int, default=20)
+    parser.add_argument("--heavy-share", type=float, default=0.2,
+                        help="fraction of all messages owned by the heaviest user")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    users = [f"user{i}@example.com" for i in range(args.users)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hm = HistoryManager(db_path=os.path.join(tmp, "bench_search.db"))
+        print(f"Populating {args.messages} messages...")
+        start = time.perf_counter()
+        heavy = populate(hm, users, args.messages_per_session, args.messages, args.heavy_share)
+        print(f"  done in {time.perf_counter() - start:.1f}s (FTS5: {hm.has_fts()})\n")
+
+        print(f"{'query':<22} {'heavy user (ms)':>16} {'typical user (ms)':>18}")
+        for query in QUERIES:
+            timings = []
+            for user in (heavy, users[1]):
+                start = time.perf_counter()
+                for _ in range(args.samples):
+                    hm.search_messages(user, query, limit=args.limit)
+                timings.append((time.perf_counter() - start) / args.samples * 1000)
+            print(f"{query:<22} {timings[0]:>16.2f} {timings[1]:>18.2f}")
+        hm.close()
+
+
+if __name__ == "__main__":
+    main()
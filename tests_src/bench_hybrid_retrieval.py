@@ -0,0 +1,125 @@
+# tests_src/bench_hybrid_retrieval.py
+# Query latency and recall@k of dense-only retrieval (the current setup),
+# BM25 alone and the hybrid (dense + BM25, RRF) retriever, on the benchmark
+# corpus padded with seeded distractor passages. Labelled queries are the
+# benchmark's RAG_QUERIES plus EXACT_QUERIES (section numbers, act names).
+#
+# Offline by default (HashingEmbeddings); --model uses the real embedding
+# model from src/embeddings.py.
+#
+# Usage:
+#   python tests_src/bench_hybrid_retrieval.py
+#   python tests_src/bench_hybrid_retrieval.py --distractors 20000 --k 5 --model
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from benchmarks.dataset import CORPUS, RAG_QUERIES, EXACT_QUERIES
+from benchmarks.fakes import HashingEmbeddings
+from src.bm25 import BM25Index, BM25Retriever, HybridRetriever
+from src.local_index import LocalVectorIndex, LocalIndexRetriever
+
+ACTS = ["CrPC", "IPC", "CPC", "RTI Act", "Companies Act", "Evidence Act", "Motor Vehicles Act"]
+
+
+def make_distractors(n, seed=7):
+    """Legal-sounding passages built from corpus words, citing random sections."""
+    rng = random.Random(seed)
+    # No numbers from the corpus: a distractor may only cite one by chance
+    words = [w for w in " ".join(CORPUS.values()).replace(";", "").replace(",", "").split()
+             if not any(ch.isdigit() for ch in w)]
+    passages = {}
+    for i in range(n):
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(20, 35)))
+        section = f"Section {rng.randint(1, 600)}{rng.choice(['', 'A', 'B'])} {rng.choice(ACTS)}"
+        passages[f"distractor-{i}"] = f"{body} under {section}."
+    return passages
+
+
+def evaluate(retriever, queries, k):
+    recall, mrr = [], []
+    for query, relevant in queries:
+        ids = [d.metadata.get("id") for d in retriever.invoke(query)][:k]
+        recall.append(len([i for i in ids if i in relevant]) / len(relevant))
+        rank = next((n for n, i in enumerate(ids, start=1) if i in relevant), None)
+        mrr.append(1 / rank if rank else 0.0)
+    return statistics.mean(recall), statistics.mean(mrr)
+
+
+def latency_ms(retriever, queries, passes):
+    times = []
+    for _ in range(passes):
+        for query, _ in queries:
+            start = time.perf_counter()
+            retriever.invoke(query)
+            times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--distractors", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=20, help="depth each side feeds into RRF")
+    parser.add_argument("--passes", type=int, default=10)
+    parser.add_argument("--model", action="store_true", help="use the real embedding model")
+    args = parser.parse_args()
+
+    if args.model:
+        from src.embeddings import load_embedding_model
+        embeddings = load_embedding_model()
+    else:
+        embeddings = HashingEmbeddings()
+
+    corpus = dict(CORPUS)
+    corpus.update(make_distractors(args.distractors))
+    ids = list(corpus)
+    metadatas = [{"text": corpus[i], "source": i} for i in ids]
+
+    with tempfile.TemporaryDirectory(prefix="bench_hybrid_") as workdir:
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents([corpus[i] for i in ids])
+        dense_index = LocalVectorIndex(os.path.join(workdir, "vector_index"))
+        dense_index.upsert(ids, vectors, metadatas)
+        embed_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bm25 = BM25Index.build(ids, metadatas, os.path.join(workdir, "bm25_index"))
+        bm25.save()
+        build_s = time.perf_counter() - start
+        bm25 = BM25Index.load(bm25.index_dir)
+
+        size_kb = sum(
+            os.path.getsize(os.path.join(bm25.index_dir, name)) for name in os.listdir(bm25.index_dir)
+        ) / 1024
+        print(f"📦 {len(ids)} chunks, {len(bm25.vocab)} terms, {len(bm25.doc_ids)} postings")
+        print(f"   dense index {embed_s:.2f}s (embedding)  BM25 build+save {build_s:.2f}s  "
+              f"BM25 on disk {size_kb:.0f} KB")
+
+        dense_deep = LocalIndexRetriever(index=dense_index, embeddings=embeddings, k=args.candidates)
+        retrievers = {
+            "dense (current)": LocalIndexRetriever(index=dense_index, embeddings=embeddings, k=args.k),
+            "bm25": BM25Retriever(index=bm25, k=args.k),
+            "hybrid (RRF)": HybridRetriever(dense=dense_deep, sparse=bm25, k=args.k, candidates=args.candidates),
+        }
+
+        print(f"\n{'retriever':<18} {'recall@' + str(args.k):>9} {'exact':>7} {'mrr':>6} "
+              f"{'p50 ms':>8} {'p95 ms':>8}")
+        for name, retriever in retrievers.items():
+            recall, mrr = evaluate(retriever, RAG_QUERIES + EXACT_QUERIES, args.k)
+            exact_recall, _ = evaluate(retriever, EXACT_QUERIES, args.k)
+            p50, p95 = latency_ms(retriever, RAG_QUERIES + EXACT_QUERIES, args.passes)
+            print(f"{name:<18} {recall:>9.2f} {exact_recall:>7.2f} {mrr:>6.2f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# tests_src/bench_intent_router.py
+# Per-message cost of intent classification: the old loop of re.search calls
+# over LEGAL_PATTERNS / PERSONAL_PATTERNS vs. the single-pass intent router,
+# plus the messages the two classify differently.
+#
+# Usage:
+#   python tests_src/bench_intent_router.py
+#   python tests_src/bench_intent_router.py --repeat 20000
+
+import os
+import sys
+import re
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.intent_router import keyword_intent
+
+# Pre-router classification, kept here for comparison
+OLD_LEGAL_PATTERNS = [
+    r"dispute", r"rights", r"law", r"illegal", r"how to file",
+    r"fir", r"rti", r"tenant", r"harassment", r"police",
+]
+OLD_PERSONAL_PATTERNS = [
+    r"my name", r"who am i", r"where do i live", r"i live",
+    r"i am a", r"what do i do", r"what is my",
+]
+
+MESSAGES = [
+    "Hello",
+    "Thanks, that helps",
+    "What is the first step?",
+    "My landlord refuses to return my security deposit",
+    "How to file an FIR for a stolen phone?",
+    "Please draft a legal notice to my landlord",
+    "What is my name?",
+    "I live in Mysuru",
+    "Can I get free legal aid?",
+    "Is firing an employee without notice allowed?",
+    "My employer has not paid wages for three months",
+    "Where do I report online banking fraud?",
+]
+
+
+def old_classify(text):
+    q = text.lower()
+    return {
+        "legal": any(re.search(p, q) for p in OLD_LEGAL_PATTERNS),
+        "personal": any(re.search(p, q) for p in OLD_PERSONAL_PATTERNS),
+    }
+
+
+def time_per_message(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            fn(message)
+    return (time.perf_counter() - start) / (repeat * len(MESSAGES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    # keyword_intent (not the lru-cached route) so the scan itself is timed
+    old_us = time_per_message(old_classify, args.repeat)
+    new_us = time_per_message(keyword_intent, args.repeat)
+
+    print(f"{'classifier':<28} {'µs/message':>11}")
+    print(f"{'re.search loop (old)':<28} {old_us:>11.2f}")
+    print(f"{'intent router':<28} {new_us:>11.2f}")
+
+    print(f"\n{'message':<52} {'old legal':>9} {'new':>9}")
+    for message in MESSAGES:
+        old = old_classify(message)
+        new = keyword_intent(message)
+        marker = "" if old["legal"] == new.legal else "  ← changed"
+        print(f"{message:<52} {str(old['legal']):>9} {new.name:>9}{marker}")
+
+
+if __name__ == "__main__":
+    main()
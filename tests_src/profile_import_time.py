@@ -0,0 +1,89 @@
+# tests_src/profile_import_time.py
+# Import-time profile of the API server (python -X importtime), optionally
+# side by side with another git revision to show boot time before/after.
+#
+# Usage:
+#   python tests_src/profile_import_time.py
+#   python tests_src/profile_import_time.py --compare HEAD~1 --top 15
+
+import os
+import re
+import sys
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = [
+    "torch", "sentence_transformers", "transformers", "pinecone",
+    "langchain_pinecone", "langchain_ollama", "langchain_community", "pyrebase",
+]
+
+LINE_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(tree, module, runs):
+    """Best-of-`runs` (total_ms, {module: (self_us, cumulative_us)})."""
+    best = None
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [tree, os.environ.get("PYTHONPATH")])))
+    for _ in range(runs):
+        # Throwaway cwd: the server creates chat_history.db etc. on import
+        with tempfile.TemporaryDirectory() as cwd:
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                cwd=cwd, env=env, capture_output=True, text=True
+            )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed in {tree}:\n{proc.stderr[-2000:]}")
+
+        modules = {}
+        for line in proc.stderr.splitlines():
+            match = LINE_PATTERN.match(line)
+            if match:
+                modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+        total_ms = modules.get(module, (0, 0))[1] / 1000
+        if best is None or total_ms < best[0]:
+            best = (total_ms, modules)
+    return best
+
+
+def report(label, total_ms, modules, top):
+    print(f"\n=== {label}: import {total_ms:.0f} ms, {len(modules)} modules ===")
+    heavy = [m for m in HEAVY_MODULES if m in modules]
+    print(f"Heavy modules loaded at import: {', '.join(heavy) or 'none'}")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    ranked = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in ranked[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+
+def export_revision(rev, dest):
+    archive = subprocess.run(["git", "archive", rev], cwd=ROOT, capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.api_server")
+    parser.add_argument("--compare", metavar="REV", help="git revision to profile as the 'before' tree")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    after_ms, after = profile(ROOT, args.module, args.runs)
+
+    if args.compare:
+        with tempfile.TemporaryDirectory() as tree:
+            export_revision(args.compare, tree)
+            before_ms, before = profile(tree, args.module, args.runs)
+        report(f"{args.compare}", before_ms, before, args.top)
+
+    report("working tree", after_ms, after, args.top)
+
+    if args.compare:
+        print(f"\nBoot import time: {before_ms:.0f} ms -> {after_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
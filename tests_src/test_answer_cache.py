@@ -0,0 +1,84 @@
+# tests_src/test_answer_cache.py
+# The shared answer cache must never hand one user's personal details to
+# another. Runs offline: fake LLM and hashing embeddings from benchmarks/.
+#
+# Usage:
+#   python tests_src/test_answer_cache.py
+#   python -m pytest tests_src/test_answer_cache.py
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from benchmarks.dataset import CORPUS
+from benchmarks.fakes import FakeOllama, HashingEmbeddings, default_responder
+from src import resources
+from src.answer_cache import get_answer_cache
+from src.local_index import LocalVectorIndex, LocalIndexRetriever
+
+QUESTION = "How to file an FIR?"
+
+
+def echo_memory(prompt):
+    """Canned answer plus whatever user facts the prompt carried."""
+    reply = default_responder(prompt)
+    if "Return strict JSON" in prompt:
+        return reply
+    facts = prompt.split("Known user facts:", 1)[1].split("Legal context:", 1)[0].strip()
+    return f"{reply} [facts: {facts}]"
+
+
+def setup(workdir):
+    embeddings = HashingEmbeddings()
+    index = LocalVectorIndex(os.path.join(workdir, "vector_index"))
+    ids = list(CORPUS)
+    index.upsert(ids, embeddings.embed_documents([CORPUS[i] for i in ids]),
+                 [{"text": CORPUS[i], "source": i} for i in ids])
+
+    resources.clear()
+    resources.register("embeddings", embeddings)
+    resources.register("retriever:5", LocalIndexRetriever(index=index, embeddings=embeddings, k=5))
+    # Chat replies and fact extraction
+    for temperature, max_tokens in [(0.2, 200), (0, None)]:
+        resources.register(resources.llm_key("llama2", temperature, max_tokens),
+                           FakeOllama(latency_ms=0, responder=echo_memory))
+    get_answer_cache().clear()
+
+
+def chat(name, city, question):
+    from src.combined_chain import CombinedLegalChatbot
+
+    bot = CombinedLegalChatbot()
+    bot.generate(f"My name is {name}")
+    bot.generate(f"I live in {city}")
+    return bot.generate(question)
+
+
+def test_cached_answer_has_no_user_facts():
+    with tempfile.TemporaryDirectory(prefix="test_answer_cache_") as workdir:
+        setup(workdir)
+        first = chat("Ramesh", "Mysuru", QUESTION)
+        second = chat("Priya", "Pune", QUESTION)
+
+    assert get_answer_cache().stats()["hits"] >= 1
+    assert first == second
+    for reply in (first, second):
+        assert "ramesh" not in reply.lower() and "mysuru" not in reply.lower(), reply
+        assert "priya" not in reply.lower() and "pune" not in reply.lower(), reply
+
+
+def test_personal_question_keeps_user_facts():
+    with tempfile.TemporaryDirectory(prefix="test_answer_cache_") as workdir:
+        setup(workdir)
+        reply = chat("Ramesh", "Mysuru", "What are my rights if my landlord keeps my deposit?")
+
+    assert "ramesh" in reply.lower(), reply
+
+
+if __name__ == "__main__":
+    test_cached_answer_has_no_user_facts()
+    test_personal_question_keeps_user_facts()
+    print("✅ answer cache tests passed")
@@ -0,0 +1,101 @@
+# tests_src/test_bm25.py
+# BM25 index, reciprocal-rank fusion and the hybrid retriever, including a
+# reload after re-ingestion. Offline: hashing embeddings from benchmarks/.
+#
+# Usage:
+#   python tests_src/test_bm25.py
+#   python -m pytest tests_src/test_bm25.py
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from langchain_core.documents import Document
+
+from benchmarks.fakes import HashingEmbeddings
+from src.bm25 import BM25Index, BM25Retriever, HybridRetriever, rrf_fuse, tokenize
+from src.local_index import LiveIndex, LocalVectorIndex, LocalIndexRetriever
+
+CHUNKS = {
+    "fir": "The officer in charge must register an FIR under Section 154 CrPC.",
+    "dowry": "Demanding dowry is an offence under Section 498A IPC.",
+    "rent": "A landlord cannot evict a tenant without a court order.",
+    "rti": "Any citizen may file an RTI application for public information.",
+}
+
+
+def metadatas(chunks):
+    return [{"text": text, "source": id_} for id_, text in chunks.items()]
+
+
+def ids_of(docs):
+    return [d.metadata["id"] for d in docs]
+
+
+def test_tokenize_keeps_numbers():
+    assert tokenize("Section 498A of the IPC") == ["section", "498a", "ipc"]
+
+
+def test_exact_term_ranks_first():
+    index = BM25Index.build(list(CHUNKS), metadatas(CHUNKS))
+    assert ids_of(BM25Retriever(index=index, k=2).invoke("section 498a"))[0] == "dowry"
+    assert index.search("unrelated words only", 3) == []
+
+
+def test_save_load_roundtrip():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index.build(list(CHUNKS), metadatas(CHUNKS), tmp)
+        index.save()
+        loaded = BM25Index.load(tmp)
+        assert loaded.version == 1
+        assert loaded.search("tenant evict", 4) == index.search("tenant evict", 4)
+
+
+def test_rrf_prefers_documents_both_sides_found():
+    a, b, c = (Document(page_content=t, metadata={"id": t}) for t in "abc")
+    fused = rrf_fuse([[a, b], [c, b]], k=3)
+    assert ids_of(fused)[0] == "b"
+    assert set(ids_of(fused)) == {"a", "b", "c"}
+
+
+def test_hybrid_reloads_bm25_after_reingest():
+    embeddings = HashingEmbeddings()
+    with tempfile.TemporaryDirectory() as tmp:
+        dense_dir, sparse_dir = os.path.join(tmp, "vector_index"), os.path.join(tmp, "bm25_index")
+        dense = LocalVectorIndex(dense_dir)
+        dense.upsert(list(CHUNKS), embeddings.embed_documents(list(CHUNKS.values())), metadatas(CHUNKS))
+        dense.save()
+        BM25Index.build(list(CHUNKS), metadatas(CHUNKS), sparse_dir).save()
+
+        live = LiveIndex(sparse_dir, check_interval=0, loader=BM25Index.load, label="BM25 index")
+        hybrid = HybridRetriever(
+            dense=LocalIndexRetriever(index=LiveIndex(dense_dir, check_interval=0), embeddings=embeddings, k=4),
+            sparse=live, k=2, candidates=4,
+        )
+        assert "wages" not in ids_of(hybrid.invoke("unpaid wages employer"))
+
+        # Re-ingest: "rti" removed, "wages" added (same version bump as ingestion)
+        chunks = {id_: text for id_, text in CHUNKS.items() if id_ != "rti"}
+        chunks["wages"] = "An employer who withholds wages can be taken to the labour court."
+        updated = BM25Index.build(list(chunks), metadatas(chunks), sparse_dir)
+        updated.version = live.version()
+        updated.save()
+
+        dense = LocalVectorIndex.load(dense_dir)
+        dense.delete(["rti"])
+        dense.upsert(["wages"], embeddings.embed_documents([chunks["wages"]]), metadatas({"wages": chunks["wages"]}))
+        dense.save()
+
+        assert ids_of(hybrid.invoke("unpaid wages employer"))[0] == "wages"
+        assert "rti" not in ids_of(BM25Retriever(index=live, k=4).invoke("rti application"))
+        assert live.version() == 2
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,75 @@
+# tests_src/test_embedding_parity.py
+# Checks that the int8 / ONNX embedding backends agree with fp32 torch:
+# per-text cosine similarity and the top-1 document each query retrieves.
+#
+# Usage:
+#   python tests_src/test_embedding_parity.py                  # int8 and onnx
+#   python tests_src/test_embedding_parity.py --backends int8 --min-cosine 0.98
+
+import os
+import sys
+import argparse
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.embeddings import load_sentence_transformer, MODEL_PATH, DEFAULT_HF_MODEL
+
+DOCUMENTS = [
+    "A landlord must give the tenant written notice before eviction.",
+    "The security deposit must be returned when the tenancy ends.",
+    "An FIR can be filed at any police station for a cognizable offence.",
+    "Consumer complaints up to one crore go to the district commission.",
+    "Wages must be paid before the seventh day of the following month.",
+    "A wife may claim maintenance under Section 125 of the CrPC.",
+    "Free legal aid is available to women, children and low-income persons.",
+    "Dishonour of a cheque is punishable under Section 138 of the NI Act.",
+]
+
+QUERIES = [
+    "my landlord wants to evict me without notice",
+    "how do I get my deposit back",
+    "police station refused to register my complaint",
+    "defective product complaint forum",
+    "employer has not paid salary",
+    "how can I claim maintenance from my husband",
+    "am I eligible for a free lawyer",
+    "cheque bounced what can I do",
+]
+
+
+def encode(model, texts):
+    vectors = np.asarray(model.encode(texts, show_progress_bar=False), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx"])
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    model_path = MODEL_PATH if MODEL_PATH and os.path.exists(MODEL_PATH) else DEFAULT_HF_MODEL
+    texts = DOCUMENTS + QUERIES
+
+    reference = encode(load_sentence_transformer(model_path, "torch"), texts)
+    ref_top1 = (reference[len(DOCUMENTS):] @ reference[:len(DOCUMENTS)].T).argmax(axis=1)
+
+    failed = False
+    for backend in args.backends:
+        vectors = encode(load_sentence_transformer(model_path, backend), texts)
+        cosines = (vectors * reference).sum(axis=1)
+        top1 = (vectors[len(DOCUMENTS):] @ vectors[:len(DOCUMENTS)].T).argmax(axis=1)
+        same_top1 = int((top1 == ref_top1).sum())
+
+        ok = cosines.min() >= args.min_cosine and same_top1 == len(QUERIES)
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {backend:<5} cosine vs fp32: min {cosines.min():.4f} "
+              f"mean {cosines.mean():.4f} | same top-1 document: {same_top1}/{len(QUERIES)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# tests_src/test_fast_path.py
+# Which messages the fast path answers without the LLM, and with what.
+# Needs no model: only src/fast_path.py and the intent router.
+#
+# Usage:
+#   python tests_src/test_fast_path.py
+#   python -m pytest tests_src/test_fast_path.py
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from src.fast_path import fast_reply, fast_path_snapshot
+from src.intent_router import route
+
+memory_store = {"name": "ramesh kumar", "location": "mysuru", "age": "34", "occupation": "a daily wage worker"}
+
+GREETINGS = [
+    ("Hello", "Hello, Ramesh! I'm your legal assistant. How can I help you today?"),
+    ("Hi there!", "Hello, Ramesh! I'm your legal assistant. How can I help you today?"),
+    ("Thank you so much", "You're welcome, Ramesh! Let me know if you have any other legal questions."),
+    ("How are you?", "I'm doing well, thank you, Ramesh! How can I help you with a legal question today?"),
+    ("ok bye", "Goodbye, Ramesh! Take care, and come back any time you need legal help."),
+]
+
+FACT_ANSWERS = [
+    ("What is my name?", "Your name is Ramesh Kumar."),
+    ("who am i", "Your name is Ramesh Kumar."),
+    ("Where do I live and how old am I?", "You live in Mysuru. You are 34 years old."),
+    ("What's my name and my age?", "Your name is Ramesh Kumar. You are 34 years old."),
+    ("what do i do?", "Your occupation is daily wage worker."),
+]
+
+# Greeting words around a real message: the LLM answers, facts are extracted
+FOLLOW_UPS = [
+    "Thanks, that helps",
+    "ok, can you explain more?",
+    "great, why?",
+    "cool so what next",
+    "hello, what can you do?",
+    "Hi, my landlord cut the electricity",
+]
+
+# Goes to the LLM
+FACT_MISSES = [
+    "What is my phone number?",                               # not stored yet
+    "My name is Ramesh Kumar",                                # statement, not a question
+    "What are my rights if my landlord keeps my deposit?",
+    # Mention a stored fact but ask something else
+    "How do I change my name after marriage?",
+    "Can you change my name?",
+    "Should I put my address on the notice?",
+    "Is my age enough to sign a contract?",
+    "Where do I live if my house is sealed?",
+]
+
+
+def test_greetings():
+    for message, expected in GREETINGS:
+        assert route(message).greeting, message
+        assert fast_reply(message, memory_store) == expected, message
+
+
+def test_follow_ups_are_not_greetings():
+    for message in FOLLOW_UPS:
+        assert not route(message).greeting, message
+        assert fast_reply(message, memory_store) is None, message
+
+
+def test_fact_answers():
+    for message, expected in FACT_ANSWERS:
+        assert fast_reply(message, memory_store) == expected, message
+
+
+def test_fact_misses():
+    for message in FACT_MISSES:
+        assert fast_reply(message, memory_store) is None, message
+
+
+if __name__ == "__main__":
+    failures = 0
+    cases = GREETINGS + FACT_ANSWERS + [(m, None) for m in FOLLOW_UPS + FACT_MISSES]
+    for message, expected in cases:
+        reply = fast_reply(message, memory_store)
+        ok = reply == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {message!r:55} -> {reply!r}")
+
+    print(fast_path_snapshot())
+    sys.exit(1 if failures else 0)
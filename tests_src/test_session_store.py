@@ -0,0 +1,156 @@
+# tests_src/test_session_store.py
+# SessionStore: LRU / idle / memory-cap eviction, spill and rehydrate,
+# pinning, spill writes outside the store lock, and background facts that
+# land after their session was evicted. Offline: fake LLM from benchmarks/.
+#
+# Usage:
+#   python tests_src/test_session_store.py
+#   python -m pytest tests_src/test_session_store.py
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from benchmarks.fakes import FakeOllama
+from src.memory_chain import MemoryChatbot, get_fact_worker
+from src.session_store import SessionStore
+
+LANDLORD_FACT = '{"key": "landlord", "value": "Mr Rao"}'
+
+
+class FakeSession:
+    """Just the parts of CombinedLegalChatbot the store relies on."""
+
+    def __init__(self, llm_latency_ms=0):
+        llm = FakeOllama(latency_ms=llm_latency_ms, responder=lambda prompt: LANDLORD_FACT)
+        self.memory = MemoryChatbot(llm=llm, background=True)
+
+    def export_state(self):
+        return self.memory.export_state()
+
+    def load_state(self, state):
+        self.memory.load_state(state)
+
+
+def make_store(tmp, factory=FakeSession, **kwargs):
+    kwargs.setdefault("max_sessions", 10)
+    kwargs.setdefault("idle_ttl", 3600)
+    kwargs.setdefault("memory_cap_mb", 64)
+    return SessionStore(factory=factory, spill_dir=tmp, **kwargs)
+
+
+def test_lru_spill_and_rehydrate():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, max_sessions=2)
+        store.get("a").memory.add_user_message("My name is Ramesh")
+        store.get("b")
+        store.get("c")
+
+        assert "a" not in store and len(store) == 2
+        assert store.counters["evicted_lru"] == 1
+        assert os.path.exists(store._spill_path("a"))
+
+        session = store.get("a")
+        assert session.memory.get_fact("name") == "ramesh"
+        assert store.counters["rehydrated"] == 1
+        assert not os.path.exists(store._spill_path("a"))
+
+
+def test_idle_ttl():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, idle_ttl=0.05)
+        store.get("a")
+        time.sleep(0.1)
+        store.get("b")
+        assert "a" not in store and store.counters["evicted_idle"] == 1
+
+
+def test_memory_cap():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, memory_cap_mb=0.04)  # room for about two sessions
+        for user_id in "abcd":
+            store.get(user_id)
+        assert store.counters["evicted_memory"] >= 1
+        assert store.stats()["estimated_mb"] <= 0.04
+
+
+def test_pinned_sessions_are_not_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, max_sessions=1)
+        with store.use("a") as pinned:
+            store.get("b")
+            assert "a" in store and store.stats()["pinned"] == 1
+            assert not store.evict("a")
+        assert store.get("a") is pinned
+        assert store.evict("a")
+
+
+def test_concurrent_gets_build_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        built = []
+
+        def slow_factory():
+            time.sleep(0.1)
+            built.append(1)
+            return FakeSession()
+
+        store = make_store(tmp, factory=slow_factory)
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(store.get("a"))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(built) == 1 and len({id(s) for s in sessions}) == 1
+
+
+def test_spill_write_does_not_block_other_users():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, max_sessions=1)
+        store.get("a")
+        write = store._spill
+
+        def slow_spill(user_id, state):
+            time.sleep(0.3)
+            return write(user_id, state)
+
+        store._spill = slow_spill
+        evicting = threading.Thread(target=store.get, args=("b",))  # spills "a"
+        evicting.start()
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        store.stats()
+        store.get("b")
+        assert time.perf_counter() - start < 0.2
+
+        # Returning mid-write: rehydrated from the exported state, not lost
+        assert store.get("a") is not None
+        evicting.join()
+        assert store.counters["rehydrated"] == 1
+        assert not os.path.exists(store._spill_path("a"))
+
+
+def test_late_background_fact_reaches_rehydrated_session():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(tmp, factory=lambda: FakeSession(llm_latency_ms=200))
+        memory = store.get("a").memory
+        memory.add_user_message("My landlord is Mr Rao")
+        memory.add_assistant_response("Noted.")  # hands the job to the worker
+
+        assert store.evict("a")
+        get_fact_worker().wait_idle()
+
+        assert store.get("a").memory.get_fact("landlord") == "Mr Rao"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")